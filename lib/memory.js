@@ -1,9 +1,9 @@
-import { readFileSync, writeFileSync, existsSync } from 'fs';
+import { readFileSync, writeFileSync, appendFileSync, mkdirSync } from 'fs';
 import path from 'path';
 
 const root = process.cwd();
 const memoryPath = path.join(root, 'brain', 'memory.json');
-const logPath = path.join(root, 'brain', 'learning_log.json');
+const logDir = path.join(root, 'brain', 'learning_log');
 
 export function loadMemory() {
   try {
@@ -32,17 +32,24 @@ export function appendMemory(section, item) {
   return memory;
 }
 
+// ISO week key (e.g. 2025-W07); matches scripts/brain_store.py partitions.
+function weekKey(date) {
+  const d = new Date(Date.UTC(date.getUTCFullYear(), date.getUTCMonth(), date.getUTCDate()));
+  const day = d.getUTCDay() || 7;
+  d.setUTCDate(d.getUTCDate() + 4 - day);
+  const yearStart = new Date(Date.UTC(d.getUTCFullYear(), 0, 1));
+  const week = Math.ceil(((d - yearStart) / 86400000 + 1) / 7);
+  return `${d.getUTCFullYear()}-W${String(week).padStart(2, '0')}`;
+}
+
 export function logLearning(entry) {
-  let log = [];
-  if (existsSync(logPath)) {
-    try {
-      log = JSON.parse(readFileSync(logPath, 'utf8'));
-      if (!Array.isArray(log)) log = [];
-    } catch (e) {
-      log = [];
-    }
+  const now = new Date();
+  const record = { ts: now.toISOString(), ...entry };
+  try {
+    mkdirSync(logDir, { recursive: true });
+    appendFileSync(path.join(logDir, `${weekKey(now)}.jsonl`), JSON.stringify(record) + '\n');
+  } catch (e) {
+    return null;
   }
-  log.push({ ts: new Date().toISOString(), ...entry });
-  writeFileSync(logPath, JSON.stringify(log, null, 2));
-  return log;
+  return record;
 }
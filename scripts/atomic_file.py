@@ -0,0 +1,25 @@
+"""Crash-safe file replacement shared by the JSON stores in ``scripts/``.
+
+``atomic_write`` writes to a temporary file next to the target and renames
+it into place, so readers see either the old or the new contents. The
+temporary name includes the pid and thread id: concurrent writers from
+different processes or threads never share a temp file, and the last rename
+wins.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+
+
+def atomic_write(path: Path, text: str) -> None:
+    """Replace ``path`` with ``text`` (UTF-8), creating parent directories."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Decode a source's audio once and share it as memory-mapped PCM.
+
+The first audio stream is decoded by a single ffmpeg run to 16 kHz mono
+float32 (the format Whisper consumes) and stored as raw samples in
+``.cache/audio/<sha256>.f32``. Consumers open it with ``open_pcm`` and get a
+copy-on-write ``numpy.memmap``: Whisper, highlight ranking and VAD read the
+same pages from the OS cache, even across processes, instead of each
+decoding the video again.
+
+Usage::
+
+    python scripts/audio_cache.py list
+    python scripts/audio_cache.py prune [--max-mb 2048]
+    python scripts/audio_cache.py clear
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import subprocess
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np  # type: ignore
+
+CACHE_DIR = Path(os.getenv("AUDIO_CACHE_DIR", ".cache/audio"))
+MAX_BYTES = int(float(os.getenv("AUDIO_CACHE_MAX_MB", "2048")) * 1024 * 1024)
+SAMPLE_RATE = 16000
+VAD_FRAME = 0.03
+VAD_MARGIN_DB = 10.0
+VAD_MIN_DB = -50.0
+VAD_PAD = float(os.getenv("VAD_PAD", "0.5"))
+
+
+def cache_path(video: Path, sha256: str | None = None, root: Path = CACHE_DIR) -> Path:
+    if not sha256:
+        st = video.stat()
+        sha256 = hashlib.sha1(f"{video.resolve()}:{st.st_size}:{st.st_mtime_ns}".encode()).hexdigest()
+    return root / f"{sha256}.f32"
+
+
+def extract(video: Path, sha256: str | None = None, root: Path = CACHE_DIR) -> Path:
+    """Decode ``video`` to the PCM cache unless it is already there; returns the file."""
+    dest = cache_path(video, sha256, root)
+    if dest.exists():
+        os.utime(dest)
+        return dest
+    root.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(dest.name + f".{os.getpid()}.tmp")
+    try:
+        with tmp.open("wb") as fh:
+            subprocess.run(
+                [
+                    "ffmpeg", "-v", "error", "-nostdin", "-i", str(video),
+                    "-map", "0:a:0", "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE),
+                    "-f", "f32le", "pipe:1",
+                ],
+                stdout=fh,
+                stderr=subprocess.PIPE,
+                check=True,
+            )
+        os.replace(tmp, dest)
+    finally:
+        tmp.unlink(missing_ok=True)
+    prune(root=root, keep=dest)
+    return dest
+
+
+def open_pcm(path: Path) -> np.ndarray:
+    """Map a cached PCM file; writes stay private to the caller (copy-on-write)."""
+    if path.stat().st_size < 4:
+        return np.zeros(0, dtype=np.float32)
+    return np.memmap(path, dtype=np.float32, mode="c")
+
+
+def frame_rms(pcm: np.ndarray, size: int) -> np.ndarray:
+    """RMS of consecutive ``size``-sample frames (a trailing partial frame is dropped)."""
+    count = len(pcm) // size if size else 0
+    if not count:
+        return np.zeros(0, dtype=np.float32)
+    frames = pcm[: count * size].reshape(count, size)
+    return np.sqrt(np.einsum("ij,ij->i", frames, frames) / size)
+
+
+def speech_bounds(pcm: np.ndarray, rate: int = SAMPLE_RATE, pad: float = VAD_PAD) -> Tuple[int, int]:
+    """Sample range from the first to the last voiced frame, padded by ``pad`` seconds.
+
+    A frame is voiced when it is ``VAD_MARGIN_DB`` above the recording's
+    noise floor (10th percentile) and above ``VAD_MIN_DB`` dBFS. When nothing
+    qualifies the whole range is returned rather than dropping the audio.
+    """
+    size = int(rate * VAD_FRAME)
+    db = 20 * np.log10(np.maximum(frame_rms(pcm, size), 1e-6))
+    if not len(db):
+        return 0, len(pcm)
+    active = np.flatnonzero(db > max(float(np.percentile(db, 10)) + VAD_MARGIN_DB, VAD_MIN_DB))
+    if not len(active):
+        return 0, len(pcm)
+    start = max(int(active[0] * size - pad * rate), 0)
+    end = min(int((active[-1] + 1) * size + pad * rate), len(pcm))
+    return start, end
+
+
+def entries(root: Path = CACHE_DIR) -> List[Path]:
+    """Return cached PCM files, least recently used first."""
+    if not root.exists():
+        return []
+    return sorted(root.glob("*.f32"), key=lambda p: p.stat().st_mtime)
+
+
+def prune(max_bytes: int = MAX_BYTES, root: Path = CACHE_DIR, keep: Path | None = None) -> List[Path]:
+    """Evict least recently used files until the cache fits in ``max_bytes``."""
+    files = entries(root)
+    total = sum(p.stat().st_size for p in files)
+    removed = []
+    for p in files:
+        if total <= max_bytes:
+            break
+        if p == keep:
+            continue
+        total -= p.stat().st_size
+        p.unlink(missing_ok=True)
+        removed.append(p)
+    return removed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Inspect or prune the decoded audio cache.")
+    parser.add_argument("--dir", type=Path, default=CACHE_DIR, help="cache directory")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list", help="show cached audio, least recently used first")
+    prune_p = sub.add_parser("prune", help="evict least recently used files")
+    prune_p.add_argument("--max-mb", type=float, help="size cap in MB (default AUDIO_CACHE_MAX_MB)")
+    sub.add_parser("clear", help="remove all cached audio")
+    args = parser.parse_args()
+
+    if args.cmd == "list":
+        files = entries(args.dir)
+        for p in files:
+            size = p.stat().st_size
+            print(f"{size / 4 / SAMPLE_RATE:>9.1f}s  {size:>12}  {p.name}")
+        print(f"{len(files)} files, {sum(p.stat().st_size for p in files) / 1024 / 1024:.1f} MB")
+    elif args.cmd == "prune":
+        max_bytes = int(args.max_mb * 1024 * 1024) if args.max_mb is not None else MAX_BYTES
+        print(f"removed {len(prune(max_bytes, args.dir))} files")
+    elif args.cmd == "clear":
+        print(f"removed {len(prune(0, args.dir))} files")
+
+
+if __name__ == "__main__":
+    main()
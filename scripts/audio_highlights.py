@@ -0,0 +1,128 @@
+"""Rank highlight windows of a source video from its soundtrack.
+
+Works on the shared 16 kHz PCM from ``audio_cache``, cut into short hops. Per
+hop, NumPy computes loudness (RMS in dB), bursts (energy jumping above the
+local average with a noisy, broadband character, as laughter and applause
+have) and voice activity. Every candidate window is then scored from those
+curves plus the strongest scene cut inside it, using cumulative sums and
+sliding maxima rather than a Python loop per window, and the best
+non-overlapping windows are returned. Only those windows need to be
+transcribed and cut.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Sequence
+
+import numpy as np  # type: ignore
+from numpy.lib.stride_tricks import sliding_window_view  # type: ignore
+
+from audio_cache import SAMPLE_RATE, frame_rms
+
+HOP = 0.1
+STEP = 0.5
+BASELINE_SECONDS = 3.0
+WEIGHTS = {"loudness": 1.0, "burst": 1.5, "speech": 1.0, "scene": 0.5}
+
+
+def audio_features(pcm: np.ndarray, rate: int = SAMPLE_RATE, hop: float = HOP) -> Dict[str, np.ndarray]:
+    """Per-hop loudness, burst and voice-activity curves (each in 0..1)."""
+    n = int(rate * hop)
+    rms = frame_rms(pcm, n)
+    if not len(rms):
+        empty = np.zeros(0, dtype=np.float32)
+        return {"loudness": empty, "burst": empty, "speech": empty}
+    frames = pcm[: len(rms) * n].reshape(-1, n)
+    db = 20 * np.log10(np.maximum(rms, 1e-5))
+    floor = np.percentile(db, 10)
+    peak = max(float(db.max()), floor + 1e-3)
+    loudness = np.clip((db - floor) / (peak - floor), 0, 1)
+    # Zero-crossing rate: voiced speech is low, laughter/applause/noise is high.
+    zcr = np.mean(np.abs(np.diff(np.signbit(frames), axis=1)), axis=1)
+    # Energy above a trailing average marks sudden bursts.
+    k = max(int(BASELINE_SECONDS / hop), 1)
+    csum = np.concatenate(([0.0], np.cumsum(db)))
+    idx = np.arange(len(db))
+    lo = np.maximum(idx - k, 0)
+    baseline = (csum[idx + 1] - csum[lo]) / (idx + 1 - lo)
+    jump = np.clip((db - baseline) / 12.0, 0, 1)
+    burst = jump * np.clip(zcr / 0.25, 0, 1)
+    speech = ((db > floor + 6) & (zcr < 0.25)).astype(np.float64)
+    return {"loudness": loudness, "burst": burst, "speech": speech}
+
+
+def rank_windows(
+    features: Dict[str, np.ndarray],
+    duration: float,
+    length: float,
+    top: int,
+    scene_times: Sequence[float] = (),
+    scene_scores: Sequence[float] = (),
+    hop: float = HOP,
+    step: float = STEP,
+) -> List[Dict[str, Any]]:
+    """Score every ``length``-second window and keep the ``top`` best that don't overlap."""
+    frames = len(features["loudness"])
+    win = max(int(round(length / hop)), 1)
+    if frames == 0 or top <= 0:
+        return []
+    if frames < win:
+        win = frames
+    stride = max(int(round(step / hop)), 1)
+    starts = np.arange(0, frames - win + 1, stride)
+
+    def window_mean(curve: np.ndarray) -> np.ndarray:
+        csum = np.concatenate(([0.0], np.cumsum(curve)))
+        return (csum[starts + win] - csum[starts]) / win
+
+    loud = window_mean(features["loudness"])
+    speech = window_mean(features["speech"])
+    burst = sliding_window_view(features["burst"], win).max(axis=1)[starts]
+    scene = np.zeros(frames)
+    if len(scene_times):
+        pos = np.clip((np.asarray(scene_times) / hop).astype(int), 0, frames - 1)
+        vals = np.asarray(scene_scores, dtype=np.float64) if len(scene_scores) == len(scene_times) else np.ones(len(pos))
+        np.maximum.at(scene, pos, vals)
+    scene_best = sliding_window_view(scene, win).max(axis=1)[starts]
+    score = (
+        WEIGHTS["loudness"] * loud
+        + WEIGHTS["burst"] * burst
+        + WEIGHTS["speech"] * speech
+        + WEIGHTS["scene"] * scene_best
+    )
+    picked: List[Dict[str, Any]] = []
+    taken = np.zeros(frames, dtype=bool)
+    for i in np.argsort(-score, kind="stable"):
+        s = starts[i]
+        if taken[s : s + win].any():
+            continue
+        taken[s : s + win] = True
+        picked.append(
+            {
+                "start": round(float(s * hop), 2),
+                "end": round(min(float((s + win) * hop), duration or float("inf")), 2),
+                "score": round(float(score[i]), 4),
+                "loudness": round(float(loud[i]), 3),
+                "burst": round(float(burst[i]), 3),
+                "speech": round(float(speech[i]), 3),
+                "scene": round(float(scene_best[i]), 3),
+            }
+        )
+        if len(picked) >= top:
+            break
+    return picked
+
+
+def find_highlights(
+    pcm: np.ndarray,
+    duration: float,
+    length: float,
+    top: int,
+    scene_times: Sequence[float] = (),
+    scene_scores: Sequence[float] = (),
+    rate: int = SAMPLE_RATE,
+) -> List[Dict[str, Any]]:
+    """Return the ``top`` highlight windows of ``pcm``, best first."""
+    return rank_windows(
+        audio_features(pcm, rate), duration, length, top, scene_times, scene_scores
+    )
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""Benchmark clip pipeline stages on synthetic media.
+
+Deterministic test videos (``testsrc2`` followed by ``smptebars`` so there is
+one hard scene cut, with a ``sine`` audio track) are generated locally at a
+few lengths and resolutions. Each stage runs ``--repeat`` times and the
+median wall time is reported together with throughput in seconds of media
+processed per wall second. Results are written as JSON; with ``--baseline``
+the run fails when a stage is slower than the baseline by more than
+``--threshold``.
+
+Usage::
+
+    python scripts/bench_pipeline.py [--profile quick|full] [--repeat 3]
+        [--out results.json] [--baseline old.json --threshold 0.25]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+import audio_cache
+import audio_highlights
+import extract_clips as ec
+
+PROFILES: Dict[str, List[Tuple[int, int, int]]] = {
+    "quick": [(10, 640, 360), (20, 1280, 720)],
+    "full": [(s, w, h) for s in (10, 30, 60) for w, h in ((640, 360), (1280, 720), (1920, 1080))],
+}
+RESULTS_DIR = Path(os.getenv("BENCH_DIR", ".cache/bench"))
+CLIP_SECONDS = 5.0
+TEXT_SEGMENTS = 2000
+
+
+def make_video(dest: Path, seconds: int, width: int, height: int, fps: int = 30) -> Path:
+    """Render a deterministic test video with one scene cut halfway through."""
+    half = seconds / 2
+    graph = (
+        f"testsrc2=size={width}x{height}:rate={fps}:duration={half}[a];"
+        f"smptebars=size={width}x{height}:rate={fps}:duration={half}[b];"
+        "[a][b]concat=n=2:v=1:a=0[v]"
+    )
+    subprocess.run(
+        [
+            "ffmpeg", "-y", "-v", "error",
+            "-filter_complex", graph,
+            "-f", "lavfi", "-i", f"sine=frequency=440:sample_rate=44100:duration={seconds}",
+            "-map", "[v]", "-map", "0:a",
+            "-c:v", "libx264", "-preset", "ultrafast", "-g", str(fps * 2), "-pix_fmt", "yuv420p",
+            "-c:a", "aac", "-fflags", "+bitexact", "-flags:v", "+bitexact",
+            str(dest),
+        ],
+        check=True,
+    )
+    return dest
+
+
+def synthetic_text(count: int) -> List[str]:
+    words = (
+        "love dog park funny pasta grandma running sunset beach laugh coffee "
+        "morning workout city night music dance friends travel heart cry joke"
+    ).split()
+    # Deterministic pseudo-random sentences (LCG) so runs are comparable.
+    state = 12345
+    out = []
+    for _ in range(count):
+        sentence = []
+        for _ in range(30):
+            state = (state * 1103515245 + 12345) & 0x7FFFFFFF
+            sentence.append(words[state % len(words)])
+        out.append(" ".join(sentence))
+    return out
+
+
+def timed(fn: Callable[[], Any], repeat: int, setup: Callable[[], Any] | None = None) -> List[float]:
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def bench_case(src: Path, seconds: int, work: Path, repeat: int) -> Dict[str, Dict[str, Any]]:
+    """Run every video stage on ``src``; returns stage -> result."""
+    clip = work / "clip.mp4"
+    scratch = work / "scratch.mp4"
+    end = min(1 + CLIP_SECONDS, seconds)
+    ec.cut_clip(src, 1.0, end, clip)
+    clip_len = end - 1.0
+
+    def fresh_copy() -> None:
+        shutil.copyfile(clip, scratch)
+
+    audio_dir = work / "audio"
+    pcm_path = audio_cache.extract(src, root=audio_dir)
+
+    def clear_audio() -> None:
+        pcm_path.unlink(missing_ok=True)
+
+    ec.STAGING_DIR = work
+    stages: Dict[str, Tuple[Callable[[], Any], Callable[[], Any] | None, float]] = {
+        "detect_scenes": (lambda: ec.detect_scenes(src), None, seconds),
+        "extract_audio": (lambda: audio_cache.extract(src, root=audio_dir), clear_audio, seconds),
+        "audio_highlights": (
+            lambda: audio_highlights.find_highlights(
+                audio_cache.open_pcm(pcm_path), seconds, CLIP_SECONDS, 5
+            ),
+            None,
+            seconds,
+        ),
+        "cut_clip": (lambda: ec.cut_clip(src, 1.0, end, work / "cut.mp4"), None, clip_len),
+        "overlay_emoji": (lambda: ec.overlay_emoji(scratch, "🫣"), fresh_copy, clip_len),
+        "blur_video": (lambda: ec.blur_video(scratch), fresh_copy, clip_len),
+        "combine_clips": (lambda: ec.combine_clips([clip, clip, clip]), None, clip_len * 3),
+    }
+    results = {}
+    for name, (fn, setup, media) in stages.items():
+        try:
+            times = timed(fn, repeat, setup)
+        except subprocess.CalledProcessError as e:
+            print(f"  {name}: failed (ffmpeg exited with {e.returncode})")
+            results[name] = {"error": f"ffmpeg exited with {e.returncode}"}
+            continue
+        wall = statistics.median(times)
+        results[name] = {
+            "wall_s": round(wall, 4),
+            "min_s": round(min(times), 4),
+            "media_s": media,
+            "throughput": round(media / wall, 2) if wall else None,
+        }
+        print(f"  {name:<14} {wall:8.3f}s  {media / wall:8.1f}x realtime")
+    return results
+
+
+def bench_text(repeat: int) -> Dict[str, Any]:
+    texts = synthetic_text(TEXT_SEGMENTS)
+    times = timed(lambda: [ec.keywords_from_text(t) for t in texts], repeat)
+    wall = statistics.median(times)
+    print(f"  {'keywords':<14} {wall:8.3f}s  {len(texts) / wall:8.0f} segments/s")
+    return {
+        "wall_s": round(wall, 4),
+        "min_s": round(min(times), 4),
+        "segments": len(texts),
+        "throughput": round(len(texts) / wall, 1) if wall else None,
+    }
+
+
+def environment() -> Dict[str, Any]:
+    try:
+        ffmpeg = subprocess.run(["ffmpeg", "-version"], capture_output=True, text=True).stdout.splitlines()[0]
+    except (OSError, IndexError):
+        ffmpeg = None
+    return {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "ffmpeg": ffmpeg,
+        "encoder_preset": ec.ENCODER_PRESET,
+    }
+
+
+def run(profile: str, repeat: int) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        work = Path(tmp)
+        for seconds, width, height in PROFILES[profile]:
+            key = f"{seconds}s@{width}x{height}"
+            print(key)
+            src = make_video(work / f"src_{key.replace('@', '_')}.mp4", seconds, width, height)
+            case_dir = work / key.replace("@", "_")
+            case_dir.mkdir()
+            results[key] = bench_case(src, seconds, case_dir, repeat)
+    print("text")
+    results["text"] = {"keywords_from_text": bench_text(repeat)}
+    return {
+        "created": datetime.utcnow().isoformat() + "Z",
+        "profile": profile,
+        "repeat": repeat,
+        "environment": environment(),
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Return a line per stage slower than ``baseline`` by more than ``threshold``."""
+    regressions = []
+    for case, stages in current["results"].items():
+        for stage, res in stages.items():
+            old = baseline.get("results", {}).get(case, {}).get(stage, {})
+            if not old.get("wall_s"):
+                continue
+            if "wall_s" not in res:
+                regressions.append(f"{case} {stage}: now fails ({res.get('error')})")
+                continue
+            change = res["wall_s"] / old["wall_s"] - 1
+            if change > threshold:
+                regressions.append(
+                    f"{case} {stage}: {old['wall_s']:.3f}s -> {res['wall_s']:.3f}s (+{change:.0%})"
+                )
+    return regressions
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="quick")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", type=Path, help="results file (default .cache/bench/<stamp>.json)")
+    parser.add_argument("--baseline", type=Path, help="fail if slower than this results file")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    report = run(args.profile, max(1, args.repeat))
+    out = args.out or RESULTS_DIR / f"bench-{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2))
+    print(f"results written to {out}")
+    if args.baseline:
+        regressions = compare(report, json.loads(args.baseline.read_text()), args.threshold)
+        for line in regressions:
+            print("REGRESSION", line)
+        if regressions:
+            return 1
+        print(f"no stage slower than baseline by more than {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""Storage for ``brain/``: a week-partitioned learning log and capped memory.
+
+The learning log lives in ``brain/learning_log/<YYYY>-W<WW>.jsonl``, one
+append-only JSON line per event, so logging is a single append and retention
+is deleting whole expired weeks. ``learning_log.json`` is still accepted as an
+inbox: anything found there (e.g. from older tooling) is moved into the
+matching partitions and the file is reset to ``[]``.
+
+``memory.json`` is read once and written once, atomically. Sections that
+automation appends to every run (``CAPPED_SECTIONS``) keep only their newest
+entries; older ones are folded into ``memory["rollups"][section]`` as a count
+plus first/last timestamps, so the file stops growing.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+from atomic_file import atomic_write
+
+ROOT = Path(__file__).resolve().parent.parent
+BRAIN_DIR = ROOT / "brain"
+LOG_RETENTION_DAYS = int(os.getenv("BRAIN_LOG_DAYS", "30"))
+CAPPED_SECTIONS = {"grant_recommendations": 12, "memoir_worthy": 52}
+
+
+def week_key(ts: dt.datetime | dt.date) -> str:
+    year, week, _ = ts.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def week_end(key: str) -> dt.date:
+    year, week = key.split("-W")
+    return dt.date.fromisocalendar(int(year), int(week), 7)
+
+
+class LearningLog:
+    """Append-only learning log partitioned by ISO week."""
+
+    def __init__(self, root: Path = BRAIN_DIR) -> None:
+        self.dir = root / "learning_log"
+        self.inbox = root / "learning_log.json"
+
+    def partition(self, key: str) -> Path:
+        return self.dir / f"{key}.jsonl"
+
+    def partitions(self) -> List[str]:
+        if not self.dir.exists():
+            return []
+        return sorted(p.stem for p in self.dir.glob("*-W*.jsonl"))
+
+    def append(self, entry: Dict[str, Any], now: dt.datetime | None = None) -> None:
+        now = now or dt.datetime.utcnow()
+        entry = {"ts": now.isoformat(), **entry}
+        self.dir.mkdir(parents=True, exist_ok=True)
+        with self.partition(week_key(now)).open("a") as fh:
+            fh.write(json.dumps(entry) + "\n")
+
+    def ingest_inbox(self) -> int:
+        """Move entries from ``learning_log.json`` into their week partitions."""
+        try:
+            entries = json.loads(self.inbox.read_text())
+        except (OSError, ValueError):
+            return 0
+        if not isinstance(entries, list) or not entries:
+            return 0
+        by_week: Dict[str, List[str]] = {}
+        today = week_key(dt.datetime.utcnow())
+        for entry in entries:
+            try:
+                key = week_key(dt.datetime.fromisoformat(str(entry.get("ts", "")).replace("Z", "+00:00")))
+            except ValueError:
+                key = today
+            by_week.setdefault(key, []).append(json.dumps(entry) + "\n")
+        self.dir.mkdir(parents=True, exist_ok=True)
+        for key, lines in by_week.items():
+            with self.partition(key).open("a") as fh:
+                fh.writelines(lines)
+        atomic_write(self.inbox, "[]")
+        return len(entries)
+
+    def prune(self, days: int = LOG_RETENTION_DAYS, today: dt.date | None = None) -> List[str]:
+        """Delete partitions whose whole week is older than ``days``."""
+        cutoff = (today or dt.date.today()) - dt.timedelta(days=days)
+        dropped = []
+        for key in self.partitions():
+            if week_end(key) < cutoff:
+                self.partition(key).unlink()
+                dropped.append(key)
+        return dropped
+
+    def entries(self, since: dt.date | None = None) -> Iterator[Dict[str, Any]]:
+        """Stream entries, reading only partitions that can contain ``since`` or later."""
+        for key in self.partitions():
+            if since and week_end(key) < since:
+                continue
+            with self.partition(key).open() as fh:
+                for line in fh:
+                    if line.strip():
+                        yield json.loads(line)
+
+
+class Memory:
+    """``memory.json`` loaded once, with capped append-only sections."""
+
+    def __init__(self, root: Path = BRAIN_DIR) -> None:
+        self.path = root / "memory.json"
+        try:
+            self.data: Dict[str, Any] = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            self.data = {}
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.data.get(key, default)
+
+    def push(self, section: str, item: Dict[str, Any], cap: int | None = None) -> None:
+        """Append ``item``; beyond ``cap`` the oldest entries are rolled up."""
+        items = self.data.setdefault(section, [])
+        items.append(item)
+        cap = CAPPED_SECTIONS.get(section) if cap is None else cap
+        if cap is not None and len(items) > cap:
+            self._roll_up(section, items[: len(items) - cap])
+            del items[: len(items) - cap]
+
+    def _roll_up(self, section: str, old: List[Dict[str, Any]]) -> None:
+        roll = self.data.setdefault("rollups", {}).setdefault(
+            section, {"count": 0, "first_ts": None, "last_ts": None}
+        )
+        stamps = [o.get("ts") for o in old if isinstance(o, dict) and o.get("ts")]
+        roll["count"] += len(old)
+        if stamps:
+            roll["first_ts"] = roll["first_ts"] or min(stamps)
+            roll["last_ts"] = max([roll["last_ts"] or ""] + stamps)
+
+    def compact(self) -> None:
+        """Apply the caps to sections that grew before they were capped."""
+        for section, cap in CAPPED_SECTIONS.items():
+            items = self.data.get(section)
+            if isinstance(items, list) and len(items) > cap:
+                self._roll_up(section, items[: len(items) - cap])
+                del items[: len(items) - cap]
+
+    def save(self) -> None:
+        atomic_write(self.path, json.dumps(self.data, indent=2))
@@ -0,0 +1,240 @@
+"""Append-only clip log shared by the clip, trend and insights scripts.
+
+Clip records live in ``data/clip-log/`` as JSON lines. New records and
+partial updates are appended to small segment files; ``compact`` folds them
+into ``base.jsonl`` (one merged line per clip) and rebuilds ``index.json``,
+which maps each slug to its byte offset, status and date so single lookups
+and status/date filters do not need a full scan. ``export`` writes the
+merged records in the ``public/mags-log.json`` shape used by the static site.
+
+Every write happens under an exclusive ``flock`` on ``lock`` and files are
+replaced atomically, so concurrent scripts cannot clobber each other. Reads
+hold the same lock shared, so they never see base, index and segments from
+different sides of a compaction.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List
+
+from atomic_file import atomic_write
+
+LOG_DIR = Path(os.getenv("CLIP_LOG_DIR", "data/clip-log"))
+EXPORT_PATH = Path("public/mags-log.json")
+SEGMENT_MAX_BYTES = int(os.getenv("CLIP_LOG_SEGMENT_BYTES", str(1024 * 1024)))
+COMPACT_SEGMENTS = int(os.getenv("CLIP_LOG_COMPACT_SEGMENTS", "8"))
+
+
+def slug_of(record: Dict[str, Any]) -> str:
+    return record.get("slug") or Path(record.get("clip", "")).stem
+
+
+class ClipLog:
+    """Append-only JSONL store of clip records keyed by slug."""
+
+    def __init__(self, root: Path = LOG_DIR, export_path: Path = EXPORT_PATH) -> None:
+        self.root = root
+        self.export_path = export_path
+        self.base = root / "base.jsonl"
+        self.index_path = root / "index.json"
+        self._index: Dict[str, Any] | None = None
+        self._index_stamp: int | None = None
+
+    @contextmanager
+    def locked(self, shared: bool = False) -> Iterator[None]:
+        """Hold the store's ``flock``: exclusive for writers, shared for readers."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        with (self.root / "lock").open("a") as fh:
+            fcntl.flock(fh, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def segments(self) -> List[Path]:
+        return sorted(self.root.glob("segment-*.jsonl"))
+
+    def _active_segment(self) -> Path:
+        segs = self.segments()
+        if segs and segs[-1].stat().st_size < SEGMENT_MAX_BYTES:
+            return segs[-1]
+        n = int(segs[-1].stem.split("-")[1]) + 1 if segs else 1
+        return self.root / f"segment-{n:06d}.jsonl"
+
+    def _ensure_migrated(self) -> None:
+        """Seed the store from an existing ``mags-log.json`` on first use."""
+        if self.base.exists() or self.segments() or not self.export_path.exists():
+            return
+        try:
+            clips = json.loads(self.export_path.read_text()).get("clips", [])
+        except ValueError:
+            return
+        if clips:
+            self._append_locked(clips)
+
+    def _append_locked(self, records: Iterable[Dict[str, Any]]) -> None:
+        lines = []
+        for rec in records:
+            rec = dict(rec)
+            rec["slug"] = slug_of(rec)
+            lines.append(json.dumps(rec, ensure_ascii=False) + "\n")
+        if not lines:
+            return
+        seg = self._active_segment()
+        with seg.open("a", encoding="utf-8") as fh:
+            fh.writelines(lines)
+            fh.flush()
+            os.fsync(fh.fileno())
+
+    def append(self, records: Iterable[Dict[str, Any]]) -> None:
+        """Append new records or partial updates; later fields win per slug."""
+        with self.locked():
+            self._ensure_migrated()
+            self._append_locked(records)
+            if len(self.segments()) > COMPACT_SEGMENTS:
+                self._compact_locked()
+
+    def update(self, slug: str, **fields: Any) -> None:
+        self.append([{"slug": slug, **fields}])
+
+    @staticmethod
+    def _read_lines(path: Path) -> Iterator[Dict[str, Any]]:
+        if not path.exists():
+            return
+        with path.open(encoding="utf-8") as fh:
+            for line in fh:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def _iter_stored(self) -> Iterator[Dict[str, Any]]:
+        yield from self._read_lines(self.base)
+        for seg in self.segments():
+            yield from self._read_lines(seg)
+
+    def migrate(self) -> None:
+        """Import ``mags-log.json`` if the store has not been written yet."""
+        if not self.base.exists() and not self.segments():
+            with self.locked():
+                self._ensure_migrated()
+
+    def iter_lines(self) -> Iterator[Dict[str, Any]]:
+        """Stream raw base and segment lines in write order.
+
+        The shared lock is held until the iterator is exhausted or closed, so
+        don't write to the log from the same process while iterating.
+        """
+        self.migrate()
+        with self.locked(shared=True):
+            yield from self._iter_stored()
+
+    def records(self) -> List[Dict[str, Any]]:
+        """Return merged records in first-seen order."""
+        merged: Dict[str, Dict[str, Any]] = {}
+        for rec in self.iter_lines():
+            merged.setdefault(rec["slug"], {}).update(rec)
+        return list(merged.values())
+
+    def index(self) -> Dict[str, Any]:
+        """Return ``index.json``, re-reading it when another process compacted."""
+        try:
+            stamp: int | None = self.index_path.stat().st_mtime_ns
+        except OSError:
+            stamp = None
+        if self._index is None or stamp != self._index_stamp:
+            try:
+                self._index = json.loads(self.index_path.read_text())
+            except (OSError, ValueError):
+                self._index = {"slugs": {}}
+            self._index_stamp = stamp
+        return self._index
+
+    def get(self, slug: str) -> Dict[str, Any] | None:
+        """Look up one record via the index plus the (small) unmerged segments."""
+        rec: Dict[str, Any] | None = None
+        with self.locked(shared=True):
+            pos = self.index()["slugs"].get(slug)
+            if pos is not None and self.base.exists():
+                with self.base.open(encoding="utf-8") as fh:
+                    fh.seek(pos["offset"])
+                    rec = json.loads(fh.readline())
+            for seg in self.segments():
+                for line in self._read_lines(seg):
+                    if line.get("slug") == slug:
+                        rec = {**(rec or {}), **line}
+        return rec
+
+    def slugs(self, status: str | None = None, date: str | None = None) -> List[str]:
+        """Return slugs matching ``status`` and/or ``date`` (``YYYY-MM-DD``)."""
+        with self.locked(shared=True):
+            meta = {k: dict(v) for k, v in self.index()["slugs"].items()}
+            for seg in self.segments():
+                for line in self._read_lines(seg):
+                    m = meta.setdefault(line["slug"], {})
+                    if "status" in line:
+                        m["status"] = line["status"]
+                    if "timestamp" in line:
+                        m["date"] = str(line["timestamp"])[:10]
+        return [
+            slug
+            for slug, m in meta.items()
+            if (status is None or m.get("status") == status)
+            and (date is None or m.get("date") == date)
+        ]
+
+    def _compact_locked(self) -> None:
+        merged: Dict[str, Dict[str, Any]] = {}
+        for rec in self._iter_stored():
+            merged.setdefault(rec["slug"], {}).update(rec)
+        index: Dict[str, Any] = {"slugs": {}, "compacted": datetime.utcnow().isoformat() + "Z"}
+        chunks = []
+        offset = 0
+        for slug, rec in merged.items():
+            line = json.dumps(rec, ensure_ascii=False) + "\n"
+            index["slugs"][slug] = {
+                "offset": offset,
+                "status": rec.get("status"),
+                "date": str(rec.get("timestamp", ""))[:10] or None,
+            }
+            offset += len(line.encode("utf-8"))
+            chunks.append(line)
+        atomic_write(self.base, "".join(chunks))
+        atomic_write(self.index_path, json.dumps(index))
+        for seg in self.segments():
+            seg.unlink()
+        self._index = index
+        self._index_stamp = self.index_path.stat().st_mtime_ns
+
+    def compact(self) -> None:
+        with self.locked():
+            self._ensure_migrated()
+            self._compact_locked()
+
+    def export(self, path: Path | None = None) -> Dict[str, Any]:
+        """Write merged records to ``path`` in the ``mags-log.json`` shape.
+
+        The file (and its ``updated`` stamp) is left alone when the clips did
+        not change, so scheduled runs without new clips don't produce commits.
+        """
+        path = path or self.export_path
+        clips = self.records()
+        try:
+            current = json.loads(path.read_text())
+        except (OSError, ValueError):
+            current = None
+        if isinstance(current, dict) and current.get("clips") == clips:
+            return current
+        data = {"updated": datetime.utcnow().isoformat() + "Z", "clips": clips}
+        with self.locked():
+            atomic_write(path, json.dumps(data, indent=2))
+        return data
@@ -0,0 +1,133 @@
+"""Persistent per-video processing manifest for the clip pipeline.
+
+Every raw video is identified by the SHA-256 of its contents together with
+its size and mtime. The hash is only recomputed when size or mtime change, so
+an unchanged ``Raw Clips`` folder costs a ``stat`` per file instead of a full
+read. Each entry records which pipeline stages already ran so reruns only do
+the missing work. Updates are serialized with a lock so clip worker threads
+can record progress directly.
+
+Video-level stages (``mark``) are written through immediately. Per-clip
+progress (``mark_clip``) is only kept in memory until the next ``mark`` or
+``flush``, so a run rewrites the manifest once per video stage rather than
+once per clip; after a hard kill the affected clips are simply redone.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict
+
+from atomic_file import atomic_write
+
+MANIFEST_PATH = Path(".clip-manifest.json")
+
+STAGES = ("downloaded", "scenes", "transcribed", "cut", "sanitized", "enqueued")
+
+
+def file_sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat() + "Z"
+
+
+class ClipManifest:
+    """JSON manifest of raw videos keyed by content hash."""
+
+    def __init__(self, path: Path = MANIFEST_PATH) -> None:
+        self.path = path
+        self._lock = threading.RLock()
+        self._dirty = False
+        self.data: Dict[str, Any] = {"videos": {}}
+        if path.exists():
+            try:
+                self.data = json.loads(path.read_text())
+            except Exception:
+                pass
+        self.data.setdefault("videos", {})
+
+    @property
+    def videos(self) -> Dict[str, Dict[str, Any]]:
+        return self.data["videos"]
+
+    def fingerprint(self, video: Path) -> str:
+        """Return the content hash of ``video``, reusing it when size/mtime match."""
+        st = video.stat()
+        for key, entry in self.videos.items():
+            if (
+                entry.get("name") == video.name
+                and entry.get("size") == st.st_size
+                and entry.get("mtime") == st.st_mtime
+            ):
+                return key
+        return file_sha256(video)
+
+    def entry(self, video: Path) -> Dict[str, Any]:
+        """Return (creating if needed) the manifest entry for ``video``."""
+        st = video.stat()
+        key = self.fingerprint(video)
+        with self._lock:
+            entry = self.videos.setdefault(key, {"stages": {}, "clips": {}})
+            entry.update(
+                {"sha256": key, "name": video.name, "size": st.st_size, "mtime": st.st_mtime}
+            )
+            entry.setdefault("stages", {})
+            entry.setdefault("clips", {})
+            return entry
+
+    def reset(self, video: Path) -> Dict[str, Any]:
+        """Forget everything recorded for ``video`` so it is processed again."""
+        entry = self.entry(video)
+        with self._lock:
+            for field in list(entry):
+                if field not in ("sha256", "name", "size", "mtime"):
+                    del entry[field]
+            entry["stages"] = {}
+            entry["clips"] = {}
+        return entry
+
+    @staticmethod
+    def done(entry: Dict[str, Any], stage: str) -> bool:
+        return bool(entry.get("stages", {}).get(stage))
+
+    def mark(self, entry: Dict[str, Any], stage: str, **fields: Any) -> None:
+        """Record ``stage`` as finished for ``entry`` along with any result ``fields``."""
+        with self._lock:
+            entry.update(fields)
+            entry.setdefault("stages", {})[stage] = _now()
+            self.save()
+
+    def clip(self, entry: Dict[str, Any], clip_name: str) -> Dict[str, Any]:
+        with self._lock:
+            return entry.setdefault("clips", {}).setdefault(clip_name, {})
+
+    def clear_clip(self, entry: Dict[str, Any], clip_name: str) -> None:
+        with self._lock:
+            self.clip(entry, clip_name).clear()
+
+    def mark_clip(self, entry: Dict[str, Any], clip_name: str, stage: str, value: Any = True) -> None:
+        """Record per-clip progress; written on the next ``mark`` or ``flush``."""
+        with self._lock:
+            self.clip(entry, clip_name)[stage] = value
+            self._dirty = True
+
+    def flush(self) -> None:
+        """Write pending per-clip progress, if any."""
+        with self._lock:
+            if self._dirty:
+                self.save()
+
+    def save(self) -> None:
+        with self._lock:
+            atomic_write(self.path, json.dumps(self.data, indent=2))
+            self._dirty = False
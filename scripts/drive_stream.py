@@ -0,0 +1,181 @@
+"""Incremental, resumable download of a Google Drive folder.
+
+The folder is listed through the Drive v3 REST API, which reports each file's
+size and MD5. Local files whose size and MD5 already match are skipped (MD5s
+are cached by size and mtime in ``.cache/drive-md5.json`` so they are not
+rehashed every run). The remaining files are fetched in chunks into
+``<name>.part`` with at most ``DRIVE_WORKERS`` downloads in flight; an
+interrupted ``.part`` is resumed with a ``Range`` request on the next run.
+``stream_folder`` yields the files in name order, each as soon as it is
+ready, so callers can start processing the first video while later ones are
+still downloading and still see the same order on every run.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+import requests  # type: ignore
+
+from atomic_file import atomic_write
+from stage_trace import traced
+
+API_URL = "https://www.googleapis.com/drive/v3/files"
+DRIVE_API_KEY = os.getenv("DRIVE_API_KEY") or os.getenv("GOOGLE_API_KEY")
+DRIVE_WORKERS = int(os.getenv("DRIVE_WORKERS", "3"))
+CHUNK_BYTES = int(os.getenv("DRIVE_CHUNK_MB", "8")) * 1024 * 1024
+MD5_CACHE = Path(os.getenv("DRIVE_MD5_CACHE", ".cache/drive-md5.json"))
+TIMEOUT = float(os.getenv("DRIVE_TIMEOUT", "60"))
+
+
+def list_folder(folder_id: str, api_key: str, session: requests.Session | None = None) -> List[Dict[str, Any]]:
+    """Return ``id``, ``name``, ``size`` and ``md5Checksum`` of the folder's files."""
+    session = session or requests.Session()
+    files: List[Dict[str, Any]] = []
+    params: Dict[str, Any] = {
+        "q": f"'{folder_id}' in parents and trashed = false",
+        "fields": "nextPageToken, files(id, name, size, md5Checksum, mimeType)",
+        "pageSize": 1000,
+        "key": api_key,
+    }
+    while True:
+        resp = session.get(API_URL, params=params, timeout=TIMEOUT)
+        resp.raise_for_status()
+        data = resp.json()
+        files += [f for f in data.get("files", []) if f.get("mimeType") != "application/vnd.google-apps.folder"]
+        if not data.get("nextPageToken"):
+            return sorted(files, key=lambda f: f["name"])
+        params["pageToken"] = data["nextPageToken"]
+
+
+class Md5Cache:
+    """MD5 of local files, remembered by path, size and mtime."""
+
+    def __init__(self, path: Path = MD5_CACHE) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            self.data: Dict[str, Any] = json.loads(path.read_text())
+        except (OSError, ValueError):
+            self.data = {}
+
+    def md5(self, file: Path) -> str:
+        st = file.stat()
+        key = str(file)
+        with self._lock:
+            hit = self.data.get(key)
+        if hit and hit["size"] == st.st_size and hit["mtime"] == st.st_mtime_ns:
+            return hit["md5"]
+        h = hashlib.md5()
+        with file.open("rb") as fh:
+            for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+                h.update(chunk)
+        self.remember(file, h.hexdigest())
+        return h.hexdigest()
+
+    def remember(self, file: Path, md5: str) -> None:
+        st = file.stat()
+        with self._lock:
+            self.data[str(file)] = {"size": st.st_size, "mtime": st.st_mtime_ns, "md5": md5}
+
+    def save(self) -> None:
+        with self._lock:
+            text = json.dumps(self.data)
+        atomic_write(self.path, text)
+
+
+def is_current(meta: Dict[str, Any], dest: Path, cache: Md5Cache) -> bool:
+    """True if ``dest`` already holds the Drive file described by ``meta``."""
+    if not dest.exists() or dest.stat().st_size != int(meta.get("size", -1)):
+        return False
+    return not meta.get("md5Checksum") or cache.md5(dest) == meta["md5Checksum"]
+
+
+@traced("download")
+def download_file(
+    meta: Dict[str, Any],
+    dest: Path,
+    api_key: str,
+    cache: Md5Cache,
+    session: requests.Session | None = None,
+) -> Path:
+    """Fetch ``meta`` into ``dest``, resuming a previous ``.part`` if present."""
+    session = session or requests.Session()
+    part = dest.with_name(dest.name + ".part")
+    size = int(meta.get("size", 0))
+    have = part.stat().st_size if part.exists() else 0
+    if size and have > size:
+        have = 0
+    headers = {"Range": f"bytes={have}-"} if have else {}
+    h = hashlib.md5()
+    with session.get(
+        f"{API_URL}/{meta['id']}",
+        params={"alt": "media", "key": api_key},
+        headers=headers,
+        stream=True,
+        timeout=TIMEOUT,
+    ) as resp:
+        if resp.status_code == 416 and have == size:
+            pass  # the .part is already complete
+        else:
+            resp.raise_for_status()
+            if resp.status_code != 206:
+                have = 0
+            with part.open("r+b" if have else "wb") as fh:
+                fh.seek(have)
+                fh.truncate()
+                for chunk in resp.iter_content(CHUNK_BYTES):
+                    fh.write(chunk)
+    with part.open("rb") as fh:
+        for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+            h.update(chunk)
+    expected = meta.get("md5Checksum")
+    if expected and h.hexdigest() != expected:
+        part.unlink()
+        raise IOError(f"checksum mismatch for {meta['name']}")
+    os.replace(part, dest)
+    cache.remember(dest, h.hexdigest())
+    return dest
+
+
+def stream_folder(
+    folder_id: str,
+    dest_dir: Path,
+    api_key: str,
+    workers: int = DRIVE_WORKERS,
+    suffixes: tuple = (".mp4",),
+) -> Iterator[Path]:
+    """Yield local paths of the folder's files in name order.
+
+    All downloads start right away and run concurrently; files that are
+    already up to date are yielded immediately, the others once their
+    download finishes. A failed download is reported and skipped.
+    """
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    cache = Md5Cache()
+    files = [f for f in list_folder(folder_id, api_key) if f["name"].lower().endswith(suffixes)]
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            jobs = []
+            for meta in files:
+                dest = dest_dir / meta["name"]
+                fut = None
+                if not is_current(meta, dest, cache):
+                    fut = pool.submit(download_file, meta, dest, api_key, cache)
+                jobs.append((meta, dest, fut))
+            for meta, dest, fut in jobs:
+                if fut is None:
+                    yield dest
+                    continue
+                try:
+                    yield fut.result()
+                except Exception as e:
+                    print(f"download failed for {meta['name']}", e)
+    finally:
+        cache.save()
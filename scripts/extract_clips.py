@@ -5,26 +5,49 @@ This script downloads videos from the "Raw Clips" folder on Drive and uses
 Whisper, Google Vision, and simple scene detection to surface viral moments.
 Any clip that contains shirtless children or other TikTok-risky visuals is
 automatically covered with an emoji rather than deleted. Metadata for every
-clip is written to ``public/mags-log.json``.
+clip is appended to the shared clip log and exported to ``public/mags-log.json``.
 """
 
 from __future__ import annotations
 
+import argparse
+import bisect
 import json
+import multiprocessing
 import os
 import re
 import subprocess
 import random
+import threading
 import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Iterable, List, Tuple, Dict, Any
+from queue import Queue
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, List, Tuple, Dict, Any
 
 import requests  # type: ignore
 
-import gdown  # type: ignore
-import whisper  # type: ignore
-from google.cloud import vision  # type: ignore
+import audio_cache
+import audio_highlights
+import drive_stream
+import frame_filter
+import stage_trace
+import text_scoring
+import transcribe_worker
+import vision_batcher
+from clip_log import ClipLog
+from clip_manifest import ClipManifest
+from schedule_queue import ScheduleQueue
+from stage_trace import stage, traced
+from telegram_notifier import TelegramNotifier
+from trend_store import TrendIndex, TrendStore, to_trend
+from transcript_cache import TranscriptCache, merge_segments
+
+if TYPE_CHECKING:
+    # gdown and google-cloud-vision are imported where they are used, so the
+    # benchmarks and tests can import this module without them.
+    from google.cloud import vision  # type: ignore
 
 TONE_LIB_PATH = Path("data/chanel_tone.json")
 TONE_LIBRARY = (
@@ -39,120 +62,325 @@ PACK_PATH = Path(".schedule-pack.json")
 USERNAME_PATH = Path("config/tiktok_usernames.json")
 WORKER_URL = "https://tight-snow-2840.messyandmagnetic.workers.dev"
 
+SCENE_THRESHOLD = float(os.getenv("SCENE_THRESHOLD", "0.4"))
+SCENE_FPS = float(os.getenv("SCENE_FPS", "10"))
+SCENE_HEIGHT = int(os.getenv("SCENE_HEIGHT", "180"))
+
+CLIP_MIN_SECONDS = 5.0
+CLIP_MAX_SECONDS = 15.0
+CLIP_MERGE_OVERLAP = float(os.getenv("CLIP_MERGE_OVERLAP", "0.5"))
+CLIP_MAX_PER_SOURCE = int(os.getenv("CLIP_MAX_PER_SOURCE", "10"))
+# Audio highlight windows per source to transcribe; 0 transcribes everything.
+HIGHLIGHT_WINDOWS = int(os.getenv("HIGHLIGHT_WINDOWS", str(CLIP_MAX_PER_SOURCE * 2)))
+
+CUT_BATCH_SIZE = int(os.getenv("CUT_BATCH_SIZE", "32"))
+
+PACK_CHECKPOINT = int(os.getenv("PACK_CHECKPOINT", "25"))
+
 WHISPER_MODEL = os.getenv("WHISPER_MODEL", "small")
-model = whisper.load_model(WHISPER_MODEL)
+WHISPER_WORKER_SOCKET = os.getenv("WHISPER_WORKER_SOCKET")
+# Approximate resident memory of each Whisper model, in GB.
+WHISPER_MODEL_GB = {"tiny": 1, "base": 1, "small": 2, "medium": 5, "large": 10, "turbo": 6}
+
+
+def default_cpu_workers() -> int:
+    """Analysis processes to run: up to 4, fewer when RAM can't hold a model each.
+
+    Every worker loads its own Whisper model unless the resident worker
+    (``WHISPER_WORKER_SOCKET``) is used.
+    """
+    workers = min(4, os.cpu_count() or 1)
+    if WHISPER_WORKER_SOCKET:
+        return workers
+    per_model = WHISPER_MODEL_GB.get(re.split(r"[.-]", WHISPER_MODEL)[0], 2) * 1024**3
+    try:
+        with open("/proc/meminfo") as fh:
+            fields = dict(line.split(":", 1) for line in fh)
+        available = int(fields["MemAvailable"].split()[0]) * 1024
+    except (OSError, KeyError, ValueError):
+        return workers
+    return max(1, min(workers, available // per_model))
+
+
+CPU_WORKERS = int(os.getenv("CLIP_CPU_WORKERS") or default_cpu_workers())
+IO_WORKERS = int(os.getenv("CLIP_IO_WORKERS", "8"))
 SERVICE_ACCOUNT = os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON")
-vision_client = (
-    vision.ImageAnnotatorClient.from_service_account_json(SERVICE_ACCOUNT)
-    if SERVICE_ACCOUNT
-    else vision.ImageAnnotatorClient()
-)
+VISION_API_ENDPOINT = os.getenv("VISION_API_ENDPOINT")
+VISION_API_KEY = os.getenv("VISION_API_KEY")
+
+_vision_client: vision.ImageAnnotatorClient | None = None
+_vision_batcher: vision_batcher.VisionBatcher | None = None
+_vision_lock = threading.Lock()
+_vision_batcher_lock = threading.Lock()
+
+
+def get_vision_client() -> vision.ImageAnnotatorClient:
+    """Return the shared Vision client, creating it on first use."""
+    global _vision_client
+    from google.cloud import vision  # type: ignore
+
+    with _vision_lock:
+        if _vision_client is None:
+            _vision_client = (
+                vision.ImageAnnotatorClient.from_service_account_json(SERVICE_ACCOUNT)
+                if SERVICE_ACCOUNT
+                else vision.ImageAnnotatorClient()
+            )
+        return _vision_client
+
+
+def get_vision_batcher() -> vision_batcher.VisionBatcher:
+    """Return the shared Vision batcher.
+
+    Uses the REST backend when ``VISION_API_ENDPOINT`` or ``VISION_API_KEY``
+    is set (handy for pointing at a local fake server) and the gRPC client
+    otherwise.
+    """
+    global _vision_batcher
+    with _vision_batcher_lock:
+        if _vision_batcher is None:
+            if VISION_API_ENDPOINT or VISION_API_KEY:
+                backend = vision_batcher.rest_backend(
+                    VISION_API_ENDPOINT or "https://vision.googleapis.com", VISION_API_KEY
+                )
+            else:
+                backend = vision_batcher.grpc_backend(get_vision_client())
+            _vision_batcher = vision_batcher.VisionBatcher(backend)
+        return _vision_batcher
+
+
+@traced("transcribe")
+def transcribe(
+    video: Path,
+    sha256: str | None = None,
+    windows: List[Dict[str, Any]] | None = None,
+    audio: Path | None = None,
+) -> List[Dict[str, Any]]:
+    """Return Whisper segments for ``video``.
+
+    With ``windows`` (highlight windows with ``start``/``end``) only those
+    time ranges are transcribed. ``audio`` is the source's decoded PCM from
+    ``audio_cache``, which Whisper reads instead of decoding the video.
+
+    Transcripts are cached by ``sha256``, model name and whether the PCM
+    was silence-trimmed (``VAD_TRIM``). Windowed results record which ranges
+    they cover, so only the parts of ``windows`` no earlier run transcribed
+    go to Whisper. That happens through the resident worker from
+    ``transcribe_worker.py`` when ``WHISPER_WORKER_SOCKET`` is set and
+    reachable, and in-process otherwise.
+    """
+    ranges = [[w["start"], w["end"]] for w in windows or []]
+    cache = TranscriptCache()
+    # Trimmed PCM can decode slightly differently, so it gets its own entries.
+    key = WHISPER_MODEL + ("+vad" if audio is not None and transcribe_worker.VAD_TRIM else "")
+    if not ranges:
+        cached = cache.get(sha256, key) if sha256 else None
+        if cached is not None:
+            return cached
+        segments = _whisper(video, None, audio)
+        if sha256:
+            cache.put(sha256, key, segments)
+        return segments
+    if not sha256:
+        return _whisper(video, ranges, audio)
+    hits, missing = cache.lookup(sha256, key, ranges)
+    if not missing:
+        return hits
+    segments = _whisper(video, missing, audio)
+    cache.add(sha256, key, segments, missing)
+    return merge_segments(hits, segments)
+
+
+def _whisper(
+    video: Path, ranges: List[List[float]] | None, audio: Path | None
+) -> List[Dict[str, Any]]:
+    """Transcribe through the resident worker if reachable, else in-process."""
+    if WHISPER_WORKER_SOCKET:
+        try:
+            return transcribe_worker.request_transcription(
+                WHISPER_WORKER_SOCKET, video, WHISPER_MODEL, windows=ranges, audio=audio
+            )
+        except (OSError, RuntimeError) as e:
+            print("whisper worker unavailable, transcribing locally", e)
+    return transcribe_worker.transcribe_file(video, WHISPER_MODEL, ranges, audio)
 
 
+@traced("download")
 def download_raw_clips() -> None:
     """Pull the latest raw clips from Google Drive into ``RAW_DIR``."""
+    import gdown  # type: ignore
+
     RAW_DIR.mkdir(exist_ok=True)
     gdown.download_folder(id=DRIVE_ID, output=str(RAW_DIR), quiet=True, use_cookies=False)
 
 
-def load_log() -> dict:
-    if LOG_PATH.exists():
-        return json.loads(LOG_PATH.read_text())
-    return {"clips": []}
+def iter_raw_clips() -> Iterator[Path]:
+    """Yield raw videos as they become available locally.
 
+    With ``DRIVE_API_KEY`` the Drive folder is streamed in name order:
+    unchanged files are not downloaded again and each file is yielded as soon
+    as it and the files before it are ready. Without a
+    key the whole folder is fetched with gdown first. Local videos that are
+    not in the Drive folder are yielded last.
+    """
+    seen = set()
+    if drive_stream.DRIVE_API_KEY:
+        try:
+            for video in drive_stream.stream_folder(DRIVE_ID, RAW_DIR, drive_stream.DRIVE_API_KEY):
+                seen.add(video)
+                yield video
+        except Exception as e:
+            print("drive listing failed, using local clips", e)
+    else:
+        download_raw_clips()
+    for video in sorted(RAW_DIR.glob("*.mp4")):
+        if video not in seen:
+            yield video
 
-def save_log(data: dict) -> None:
-    LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
-    LOG_PATH.write_text(json.dumps(data, indent=2))
 
+def load_log() -> ClipLog:
+    return ClipLog(export_path=LOG_PATH)
 
-def load_pack() -> dict:
-    if PACK_PATH.exists():
-        return json.loads(PACK_PATH.read_text())
-    return {"generated_at": datetime.utcnow().isoformat() + "Z", "worker": WORKER_URL, "queue": []}
 
+class PackBatch:
+    """Collect queue entries for a run and flush them in batches.
 
-def save_pack(data: dict) -> None:
-    PACK_PATH.parent.mkdir(parents=True, exist_ok=True)
-    PACK_PATH.write_text(json.dumps(data, indent=2))
+    Entries are written to the SQLite schedule queue in one transaction and
+    ``.schedule-pack.json`` is re-exported every ``checkpoint`` additions
+    (0 = only on ``flush``/exit). ``on_flush`` callbacks run once the entries
+    added before them are durably queued. Every use of the queue happens
+    under ``_lock``, so any thread may add or flush.
+    """
 
+    def __init__(self, checkpoint: int = PACK_CHECKPOINT) -> None:
+        self.queue = ScheduleQueue(pack_path=PACK_PATH)
+        self.checkpoint = checkpoint
+        self.pending: List[Dict[str, Any]] = []
+        self.callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
 
-def fetch_trend() -> Dict[str, str]:
-    try:
-        resp = requests.get("https://www.tiktok.com/api/trending/item_list/?count=30", timeout=10)
-        items = resp.json().get("itemList", [])
-        if items:
-            it = random.choice(items)
-            return {
-                "sound": it.get("music", {}).get("title", ""),
-                "caption": it.get("desc", ""),
-                "url": it.get("music", {}).get("playUrl", ""),
-            }
-    except Exception:
-        pass
-    return {}
+    def __enter__(self) -> "PackBatch":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.flush()
+
+    def add(self, entry: Dict[str, Any], on_flush: Callable[[], None] | None = None) -> None:
+        with self._lock:
+            self.pending.append(entry)
+            if on_flush is not None:
+                self.callbacks.append(on_flush)
+            if self.checkpoint and len(self.pending) >= self.checkpoint:
+                self._flush_locked()
+
+    def on_flush(self, callback: Callable[[], None]) -> None:
+        """Run ``callback`` after the next flush (immediately if nothing is pending)."""
+        with self._lock:
+            self.callbacks.append(callback)
+            if not self.pending:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if self.pending:
+            self.queue.add(self.pending)
+            self.queue.export()
+            self.pending = []
+        callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            callback()
+
+
+_trend_store = TrendStore()
+_trend_index: TrendIndex | None = None
+_trend_source: List[Dict[str, Any]] | None = None
+_trend_lock = threading.Lock()
 
 
+def fetch_trending_items() -> List[Dict[str, Any]]:
+    """Return TikTok trending items from the TTL-cached trend store."""
+    return _trend_store.items()
+
+
+def fetch_trend(keywords: List[str] | None = None) -> Dict[str, str]:
+    """Return the trend best matching ``keywords`` (random when none overlap)."""
+    global _trend_index, _trend_source
+    items = fetch_trending_items()
+    with _trend_lock:
+        if _trend_index is None or _trend_source is not items:
+            _trend_index = TrendIndex([to_trend(it) for it in items])
+            _trend_source = items
+        index = _trend_index
+    return index.match(keywords or [])
+
+
+_notifier: TelegramNotifier | None = None
+
+
+def get_notifier() -> TelegramNotifier:
+    """Return the run's shared Telegram notifier, creating it on first use."""
+    global _notifier
+    if _notifier is None:
+        _notifier = TelegramNotifier()
+    return _notifier
+
+
+@traced("telegram")
 def send_preview(entry: Dict[str, Any], clip_path: Path) -> None:
-    token = os.getenv("TELEGRAM_BOT_TOKEN")
-    chat = os.getenv("TELEGRAM_CHAT_ID")
-    if not token or not chat:
-        return
+    """Queue a preview; previews are sent as albums in the background."""
     thumb = Path(entry.get("cover_frame", clip_path.with_suffix(".jpg")))
     caption = (
         f"{entry.get('emoji', '')} {entry['title']}\n{entry['caption']}\n{' '.join(entry['hashtags'])}\n{entry['suggested_time']}"
     ).strip()
-    buttons = {
-        "inline_keyboard": [[
-            {"text": "Approve", "callback_data": f"approve:{entry['slug']}"},
-            {"text": "Edit Caption", "callback_data": f"edit:{entry['slug']}"},
-            {"text": "Skip", "callback_data": f"skip:{entry['slug']}"},
-        ]]
-    }
-    with thumb.open("rb") as img:
-        try:
-            requests.post(
-                f"https://api.telegram.org/bot{token}/sendPhoto",
-                data={"chat_id": chat, "caption": caption, "reply_markup": json.dumps(buttons)},
-                files={"photo": img},
-            )
-        except Exception as e:
-            print("telegram send failed", e)
+    buttons = [
+        {"text": "Approve", "callback_data": f"approve:{entry['slug']}"},
+        {"text": "Edit Caption", "callback_data": f"edit:{entry['slug']}"},
+        {"text": "Skip", "callback_data": f"skip:{entry['slug']}"},
+    ]
+    get_notifier().preview(thumb, caption, buttons)
 
 
+@traced("telegram")
 def send_summary(count: int) -> None:
     if count <= 0:
         return
-    token = os.getenv("TELEGRAM_BOT_TOKEN")
-    chat = os.getenv("TELEGRAM_CHAT_ID")
-    if not token or not chat:
-        return
-    try:
-        requests.post(
-            f"https://api.telegram.org/bot{token}/sendMessage",
-            data={"chat_id": chat, "text": f"{count} new edits ready"},
-        )
-    except Exception as e:
-        print("telegram summary failed", e)
+    get_notifier().message(f"{count} new edits ready")
 
 
-def enqueue_clip(entry: Dict[str, Any]) -> None:
-    pack = load_pack()
-    trend = fetch_trend()
+@traced("enqueue")
+def enqueue_clip(
+    entry: Dict[str, Any],
+    batch: PackBatch | None = None,
+    on_flush: Callable[[], None] | None = None,
+) -> None:
+    """Queue ``entry`` for posting.
+
+    With ``batch`` the pack stays in memory and is flushed by the caller;
+    without it the pack file is updated immediately. ``on_flush`` runs once
+    the entry is actually in the queue.
+    """
+    own_batch = batch is None
+    if batch is None:
+        batch = PackBatch(checkpoint=0)
+    trend = fetch_trend(entry.get("keywords", []))
     suggested = datetime.utcnow() + timedelta(hours=1)
     clip_path = Path(entry["clip"])
-    thumb = clip_path.with_suffix(".jpg")
-    subprocess.run([
-        "ffmpeg",
-        "-y",
-        "-i",
-        str(clip_path),
-        "-ss",
-        "0",
-        "-vframes",
-        "1",
-        str(thumb),
-    ], check=True)
+    thumb = Path(entry.get("cover_frame") or clip_path.with_suffix(".jpg"))
+    if not thumb.exists():
+        subprocess.run([
+            "ffmpeg",
+            "-y",
+            "-i",
+            str(clip_path),
+            "-ss",
+            "0",
+            "-vframes",
+            "1",
+            str(thumb),
+        ], check=True)
     caption, hashtags = generate_caption(entry.get("keywords", []))
     queue_entry = {
         "fileId": entry.get("source", clip_path.stem),
@@ -173,10 +401,9 @@ def enqueue_clip(entry: Dict[str, Any]) -> None:
         "status": "queued",
         "clip": entry["clip"],
     }
-    pack.setdefault("queue", []).append(queue_entry)
-    pack["generated_at"] = datetime.utcnow().isoformat() + "Z"
-    pack.setdefault("worker", WORKER_URL)
-    save_pack(pack)
+    batch.add(queue_entry, on_flush)
+    if own_batch:
+        batch.flush()
     send_preview(queue_entry, clip_path)
 
 
@@ -296,17 +523,6 @@ def bulk_update_profiles() -> None:
         time.sleep(random.uniform(1, 3))
 
 
-def _parse_time(ts: str | None) -> datetime | None:
-    if not ts:
-        return None
-    try:
-        if ts.endswith("Z"):
-            ts = ts[:-1] + "+00:00"
-        return datetime.fromisoformat(ts)
-    except ValueError:
-        return None
-
-
 COMMENTS = {
     "humor": ["😂", "lol this is great", "🤣"],
     "support": ["love this", "so good", "🔥"],
@@ -373,53 +589,37 @@ def autopost_queue() -> None:
         return
     usernames = _load_usernames()
     main_session = sessions["MAIN"]
-    pack = load_pack()
-    queue = [
-        q
-        for q in pack.get("queue", [])
-        if q.get("status") == "queued" and q.get("autopost")
-    ]
+    queue = ScheduleQueue(pack_path=PACK_PATH)
     now = datetime.utcnow()
-    ready = []
-    for q in queue:
-        ts = _parse_time(q.get("scheduled_time")) or _parse_time(q.get("suggested_time"))
-        if ts and ts <= now:
-            ready.append(q)
-    if not ready:
+    item = queue.claim(now)
+    if item is None:
         return
-    ready.sort(key=lambda x: x.get("scheduled_time") or x.get("suggested_time") or "")
-    item = ready[0]
     print("[tiktok] posting", item.get("fileId"))
     try:
-        requests.post(
+        resp = requests.post(
             "https://www.tiktok.com/api/post",
             headers={"Cookie": f"sessionid={main_session}"},
             timeout=10,
         )
-    except Exception:
-        pass
+        resp.raise_for_status()
+    except Exception as e:
+        queue.transition(item["slug"], "failed", error=str(e), failed_at=now.isoformat() + "Z")
+        queue.export()
+        print("[tiktok] post failed", e)
+        return
     boosters = {r: s for r, s in sessions.items() if r != "MAIN"}
     if boosters:
         booster_engage(item, boosters, usernames)
-    item["status"] = "posted"
-    item["posted_at"] = now.isoformat() + "Z"
-    save_pack(pack)
-    token = os.getenv("TELEGRAM_BOT_TOKEN")
-    chat = os.getenv("TELEGRAM_CHAT_ID")
-    if token and chat:
-        roles = {r: usernames.get(r, f"@{r}") for r in sessions}
-        msg = "TikTok autopost complete\n" + "\n".join(
-            f"{role}: {name}" for role, name in roles.items()
-        )
-        try:
-            requests.post(
-                f"https://api.telegram.org/bot{token}/sendMessage",
-                data={"chat_id": chat, "text": msg},
-            )
-        except Exception:
-            pass
+    queue.transition(item["slug"], "posted", posted_at=now.isoformat() + "Z")
+    queue.export()
+    roles = {r: usernames.get(r, f"@{r}") for r in sessions}
+    msg = "TikTok autopost complete\n" + "\n".join(
+        f"{role}: {name}" for role, name in roles.items()
+    )
+    get_notifier().message(msg)
 
 
+@traced("get_duration")
 def get_duration(path: Path) -> float:
     """Return duration of ``path`` in seconds using ffprobe."""
     cmd = [
@@ -436,52 +636,88 @@ def get_duration(path: Path) -> float:
     return float(res.stdout.strip())
 
 
-def detect_scenes(path: Path) -> List[float]:
-    """Return a list of timestamps where large visual changes occur."""
+_DURATION_RE = re.compile(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)")
+_VIDEO_RE = re.compile(r"Stream #\d+:\d+.*?: Video: (\w+).*?, (\d{2,5})x(\d{2,5})")
+_FPS_RE = re.compile(r"([\d.]+) fps")
+_AUDIO_RE = re.compile(r"Stream #\d+:\d+.*?: Audio: (\w+)")
+
+
+@traced("detect_scenes")
+def probe_video(path: Path, threshold: float = SCENE_THRESHOLD) -> Dict[str, Any]:
+    """Probe ``path`` once for duration, stream info and scene cuts.
+
+    A single ffmpeg run decodes a downscaled, frame-rate reduced copy of the
+    video stream (skipping non-reference frames and loop filtering) and prints
+    the frames whose scene score exceeds ``threshold``. Duration and stream
+    metadata come from the same run's input header.
+    """
+    vf = (
+        f"fps={SCENE_FPS},scale=-2:{SCENE_HEIGHT},"
+        f"select='gt(scene,{threshold})',metadata=print:file=-"
+    )
     cmd = [
-        "ffprobe",
-        "-f",
-        "lavfi",
+        "ffmpeg",
+        "-hide_banner",
+        "-nostats",
+        "-skip_frame",
+        "noref",
+        "-skip_loop_filter",
+        "all",
         "-i",
-        f"movie={path},select=gt(scene\\,0.4)",
-        "-show_entries",
-        "frame=pkt_pts_time",
-        "-of",
-        "csv=p=0",
+        str(path),
+        "-map",
+        "0:v:0",
+        "-an",
+        "-sn",
+        "-dn",
+        "-vf",
+        vf,
+        "-f",
+        "null",
+        "-",
     ]
     res = subprocess.run(cmd, capture_output=True, text=True, check=True)
-    if not res.stdout.strip():
-        return []
-    return [float(t) for t in res.stdout.strip().splitlines()]
+    scenes: List[Dict[str, float]] = []
+    pts: float | None = None
+    for line in res.stdout.splitlines():
+        if "pts_time:" in line:
+            pts = float(line.rsplit("pts_time:", 1)[1].split()[0])
+        elif line.startswith("lavfi.scene_score=") and pts is not None:
+            scenes.append({"time": pts, "score": float(line.split("=", 1)[1])})
+            pts = None
+    info: Dict[str, Any] = {"duration": 0.0, "scenes": scenes, "threshold": threshold}
+    m = _DURATION_RE.search(res.stderr)
+    if m:
+        h, mi, sec = m.groups()
+        info["duration"] = int(h) * 3600 + int(mi) * 60 + float(sec)
+    else:
+        info["duration"] = get_duration(path)
+    m = _VIDEO_RE.search(res.stderr)
+    if m:
+        info["codec"] = m.group(1)
+        info["width"] = int(m.group(2))
+        info["height"] = int(m.group(3))
+        line = res.stderr[m.start() :].splitlines()[0]
+        fps = _FPS_RE.search(line)
+        if fps:
+            info["fps"] = float(fps.group(1))
+    audio = _AUDIO_RE.search(res.stderr)
+    info["audio_codec"] = audio.group(1) if audio else None
+    return info
+
+
+def detect_scenes(path: Path, threshold: float = SCENE_THRESHOLD) -> List[float]:
+    """Return a list of timestamps where large visual changes occur."""
+    return [s["time"] for s in probe_video(path, threshold)["scenes"]]
 
 
 def keywords_from_text(text: str) -> List[str]:
-    """Extract a few keywords from the transcript."""
-    stop = {
-        "the",
-        "and",
-        "a",
-        "to",
-        "of",
-        "in",
-        "is",
-        "it",
-        "that",
-        "for",
-        "on",
-    }
-    words = [re.sub(r"[^0-9a-z]+", "", w.lower()) for w in text.split()]
-    words = [w for w in words if w and w not in stop]
-    return words[:5]
+    """Extract a few keywords from ``text`` on its own (no corpus IDF)."""
+    return text_scoring.TextScorer([text]).keywords(text)
 
 
 def detect_emotion(text: str) -> str:
-    lower = text.lower()
-    if any(k in lower for k in ["laugh", "funny", "joke", "haha"]):
-        return "funny"
-    if any(k in lower for k in ["cry", "love", "heart", "feel", "sad"]):
-        return "emotional"
-    return "inspiring"
+    return text_scoring.top_emotion(text_scoring.emotion_scores(text))
 
 
 def generate_caption(keywords: List[str]) -> Tuple[str, List[str]]:
@@ -491,93 +727,212 @@ def generate_caption(keywords: List[str]) -> Tuple[str, List[str]]:
     return caption, hashtags
 
 
-def cut_clip(src: Path, start: float, end: float, dest: Path) -> None:
-    dest.parent.mkdir(parents=True, exist_ok=True)
-    cmd = [
-        "ffmpeg",
-        "-y",
-        "-i",
-        str(src),
-        "-ss",
-        str(start),
-        "-to",
-        str(end),
-        "-c",
-        "copy",
-        str(dest),
-    ]
+@traced("cut_clip")
+def cut_clips(src: Path, ranges: List[Tuple[float, float, Path]]) -> None:
+    """Stream-copy every ``(start, end, dest)`` range of ``src`` in one ffmpeg run.
+
+    Each range is opened as its own input with input-side seeking, so ffmpeg
+    jumps straight to the keyframe before ``start`` instead of reading the
+    file from the beginning for every clip.
+    """
+    if not ranges:
+        return
+    cmd = ["ffmpeg", "-y"]
+    for start, end, dest in ranges:
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        cmd += ["-ss", str(start), "-t", str(max(end - start, 0.0)), "-i", str(src)]
+    for i, (_, _, dest) in enumerate(ranges):
+        cmd += ["-map", f"{i}:v:0?", "-map", f"{i}:a:0?", "-c", "copy", str(dest)]
     subprocess.run(cmd, check=True)
 
 
-def pick_boundary(points: Iterable[float], t: float, default: float, reverse: bool = False) -> float:
-    pts = [p for p in points if p <= t] if reverse else [p for p in points if p >= t]
-    if not pts:
-        return default
-    return pts[-1] if reverse else pts[0]
-
-
-def analyze_visual(path: Path) -> Tuple[vision.SafeSearchAnnotation, List[str]]:
-    """Return safe-search annotation and label descriptions."""
-    with path.open("rb") as f:
-        content = f.read()
-    image = vision.Image(content=content)
-    response = vision_client.annotate_image(
-        {
-            "image": image,
-            "features": [
-                {"type": vision.Feature.Type.SAFE_SEARCH_DETECTION},
-                {"type": vision.Feature.Type.LABEL_DETECTION, "max_results": 10},
-            ],
-        }
-    )
-    annotation = response.safe_search_annotation
-    labels = [lab.description.lower() for lab in response.label_annotations]
-    return annotation, labels
+def cut_clip(src: Path, start: float, end: float, dest: Path) -> None:
+    cut_clips(src, [(start, end, dest)])
+
+
+class SceneIndex:
+    """Sorted scene cut timestamps with O(log n) boundary queries."""
+
+    def __init__(self, times: Iterable[float], scores: Iterable[float] | None = None) -> None:
+        times = list(times)
+        scores = list(scores) if scores is not None else []
+        if len(scores) != len(times):
+            scores = [0.0] * len(times)
+        pairs = sorted(zip(times, scores))
+        self.times = [t for t, _ in pairs]
+        self.scores = [sc for _, sc in pairs]
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def before(self, t: float, default: float) -> float:
+        """Return the last cut at or before ``t``."""
+        i = bisect.bisect_right(self.times, t)
+        return self.times[i - 1] if i else default
+
+    def after(self, t: float, default: float) -> float:
+        """Return the first cut at or after ``t``."""
+        i = bisect.bisect_left(self.times, t)
+        return self.times[i] if i < len(self.times) else default
+
+    def between(self, start: float, end: float) -> List[Tuple[float, float]]:
+        """Return ``(time, score)`` for every cut in ``[start, end]``."""
+        lo = bisect.bisect_left(self.times, start)
+        hi = bisect.bisect_right(self.times, end)
+        return list(zip(self.times[lo:hi], self.scores[lo:hi]))
+
+
+def pick_boundary(
+    points: SceneIndex | Iterable[float], t: float, default: float, reverse: bool = False
+) -> float:
+    index = points if isinstance(points, SceneIndex) else SceneIndex(points)
+    return index.before(t, default) if reverse else index.after(t, default)
+
+
+def combine_annotations(
+    results: List[Dict[str, Any]]
+) -> Tuple[vision.SafeSearchAnnotation, List[str]]:
+    """Merge per-frame results, keeping the most likely rating per category."""
+    from google.cloud import vision  # type: ignore
+
+    fields = ("adult", "violence", "racy")
+    worst = {f: max((r[f] for r in results), default=0) for f in fields}
+    labels: List[str] = []
+    for r in results:
+        labels.extend(lab for lab in r["labels"] if lab not in labels)
+    return vision.SafeSearchAnnotation(**worst), labels
+
+
+@traced("analyze_visual")
+def analyze_frames(
+    frames: List[frame_filter.Frame],
+) -> Tuple[vision.SafeSearchAnnotation, List[str]]:
+    """Return safe-search annotation and labels for sampled ``frames``.
+
+    At least one frame per clip is sent to Vision, plus any other frame the
+    skin/motion prefilter flags, batched with frames from other clips and
+    cached by content hash.
+    """
+    images = [f.jpeg for f in frame_filter.vision_frames(frames)]
+    return combine_annotations(get_vision_batcher().annotate(images) if images else [])
+
+
+def analyze_visual(
+    path: Path, duration: float | None = None
+) -> Tuple[vision.SafeSearchAnnotation, List[str]]:
+    """Return safe-search annotation and label descriptions for a clip."""
+    if duration is None:
+        duration = get_duration(path)
+    return analyze_frames(frame_filter.sample_frames(path, duration))
 
 
 def is_high(flag: vision.Likelihood) -> bool:
+    from google.cloud import vision  # type: ignore
+
     return flag in (vision.Likelihood.LIKELY, vision.Likelihood.VERY_LIKELY)
 
 
 def is_mild(flag: vision.Likelihood) -> bool:
+    from google.cloud import vision  # type: ignore
+
     return flag == vision.Likelihood.POSSIBLE
 
 
+ENCODER_PRESETS: Dict[str, List[str]] = {
+    "ultrafast": ["-c:v", "libx264", "-preset", "ultrafast", "-crf", "28"],
+    "fast": ["-c:v", "libx264", "-preset", "veryfast", "-crf", "23"],
+    "archival": ["-c:v", "libx264", "-preset", "slow", "-crf", "18"],
+}
+ENCODER_PRESET = os.getenv("CLIP_ENCODER_PRESET", "fast")
+CONTACT_SHEET = bool(os.getenv("COVER_CONTACT_SHEET"))
+
+
+class FilterGraph:
+    """Composable ``-vf`` chain so every censoring step shares one encode."""
+
+    def __init__(self) -> None:
+        self.filters: List[str] = []
+
+    def __bool__(self) -> bool:
+        return bool(self.filters)
+
+    def add(self, expr: str) -> "FilterGraph":
+        self.filters.append(expr)
+        return self
+
+    def blur(self, radius: int = 10, power: int = 1) -> "FilterGraph":
+        return self.add(f"boxblur={radius}:{power}")
+
+    def drawtext(self, text: str, fontsize: int = 64) -> "FilterGraph":
+        return self.add(
+            f"drawtext=text='{text}':fontcolor=white:fontsize={fontsize}"
+            ":x=(w-text_w)/2:y=(h-text_h)/2"
+        )
+
+    def render(self) -> str:
+        return ",".join(self.filters)
+
+
+@traced("overlay_blur")
+def encode_clip(
+    src: Path,
+    dest: Path,
+    graph: FilterGraph,
+    start: float | None = None,
+    end: float | None = None,
+    preset: str = ENCODER_PRESET,
+    cover: Path | None = None,
+    cover_at: float = 0.0,
+) -> None:
+    """Cut ``[start, end]`` of ``src`` and apply ``graph`` in a single encode.
+
+    ``dest`` may be the same file as ``src``; the result is written to a
+    temporary file and moved into place. When ``cover`` is given, the
+    filtered frame at ``cover_at`` seconds is saved there by the same run.
+    """
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(dest.stem + "_encoding" + dest.suffix)
+    cmd = ["ffmpeg", "-y"]
+    if start is not None:
+        cmd += ["-ss", str(start)]
+    if start is not None and end is not None:
+        cmd += ["-t", str(max(end - start, 0.0))]
+    cmd += ["-i", str(src)]
+    encoder = ENCODER_PRESETS.get(preset, ENCODER_PRESETS["fast"])
+    if cover is not None:
+        chain = graph.render() or "null"
+        cmd += [
+            "-filter_complex",
+            f"[0:v]{chain},split=2[v][c];[c]select='gte(t,{cover_at:.3f})'[cover]",
+            "-map",
+            "[v]",
+            "-map",
+            "0:a?",
+            *encoder,
+            "-c:a",
+            "copy",
+            str(tmp),
+            "-map",
+            "[cover]",
+            "-frames:v",
+            "1",
+            str(cover),
+        ]
+    else:
+        if graph:
+            cmd += ["-vf", graph.render()]
+        cmd += [*encoder, "-c:a", "copy", str(tmp)]
+    subprocess.run(cmd, check=True)
+    os.replace(tmp, dest)
+
+
 def overlay_emoji(path: Path, emoji: str) -> None:
     """Overlay ``emoji`` on ``path`` using ffmpeg."""
-    censored = path.with_name(path.stem + "_censored" + path.suffix)
-    cmd = [
-        "ffmpeg",
-        "-y",
-        "-i",
-        str(path),
-        "-vf",
-        f"drawtext=text='{emoji}':fontcolor=white:fontsize=64:x=(w-text_w)/2:y=(h-text_h)/2",
-        "-codec:a",
-        "copy",
-        str(censored),
-    ]
-    subprocess.run(cmd, check=True)
-    path.unlink()
-    censored.rename(path)
+    encode_clip(path, path, FilterGraph().drawtext(emoji))
 
 
 def blur_video(path: Path) -> None:
-    blurred = path.with_name(path.stem + "_blur" + path.suffix)
-    cmd = [
-        "ffmpeg",
-        "-y",
-        "-i",
-        str(path),
-        "-vf",
-        "boxblur=10:1",
-        "-c:a",
-        "copy",
-        str(blurred),
-    ]
-    subprocess.run(cmd, check=True)
-    path.unlink()
-    blurred.rename(path)
+    encode_clip(path, path, FilterGraph().blur())
 
 
 def combine_clips(clips: List[Path]) -> Path | None:
@@ -606,8 +961,28 @@ def combine_clips(clips: List[Path]) -> Path | None:
     return dest
 
 
-def sanitize_clip(path: Path) -> Dict[str, Any] | None:
-    annotation, labels = analyze_visual(path)
+def sanitize_clip(
+    path: Path,
+    duration: float | None = None,
+    source: Tuple[Path, float, float] | None = None,
+) -> Dict[str, Any] | None:
+    """Check ``path`` and censor it if needed.
+
+    Blur and emoji overlay are combined into one filter graph. When
+    ``source`` (``(video, start, end)``) is given the censored clip is
+    re-encoded straight from the original footage, so a flagged clip costs a
+    single encode on top of the stream-copy cut.
+
+    The sharpest, best exposed sampled frame becomes the cover (written next
+    to the clip as ``.jpg``); for censored clips the cover is taken from the
+    filtered encode so it is censored too.
+    """
+    if duration is None:
+        duration = get_duration(path)
+    sheet = path.with_name(path.stem + "_covers.jpg") if CONTACT_SHEET else None
+    with stage("sample_frames"):
+        frames = frame_filter.sample_frames(path, duration, contact_sheet=sheet)
+    annotation, labels = analyze_frames(frames)
     info: Dict[str, Any] = {
         "safe_search": {
             "adult": int(annotation.adult),
@@ -618,77 +993,511 @@ def sanitize_clip(path: Path) -> Dict[str, Any] | None:
     }
     if is_high(annotation.violence):
         path.unlink(missing_ok=True)
+        if sheet:
+            sheet.unlink(missing_ok=True)
         return None
+    best = frame_filter.best_cover(frames)
+    cover = path.with_suffix(".jpg")
+    graph = FilterGraph()
     emoji = None
     if is_high(annotation.adult) or is_high(annotation.racy):
         emoji = "🫣"
     elif any("shirtless" in l and "child" in l for l in labels):
         emoji = "👕"
-        blur_video(path)
-    if emoji:
-        overlay_emoji(path, emoji)
-        info["overlay"] = emoji
+        graph.blur()
     elif any(
         is_mild(v) for v in [annotation.adult, annotation.violence, annotation.racy]
     ):
-        overlay_emoji(path, "🫣")
-        info["overlay"] = "🫣"
+        emoji = "🫣"
+    if emoji:
+        graph.drawtext(emoji)
+        info["overlay"] = emoji
+    cover_at = best.time if best else 0.0
+    if graph:
+        if sheet:
+            sheet.unlink(missing_ok=True)
+        if source:
+            video, start, end = source
+            encode_clip(video, path, graph, start, end, cover=cover, cover_at=cover_at)
+        else:
+            encode_clip(path, path, graph, cover=cover, cover_at=cover_at)
+    elif best:
+        cover.write_bytes(best.jpeg)
+    if cover.exists():
+        info["cover_frame"] = str(cover)
+    if sheet and sheet.exists():
+        info["cover_sheet"] = str(sheet)
     return info
 
 
-def process_video(video: Path, log: dict) -> int:
-    scenes = detect_scenes(video)
-    duration = get_duration(video)
-    result = model.transcribe(str(video), verbose=False)
-    segments = result.get("segments", [])
-    count = 0
+@traced("extract_audio")
+def extract_audio(video: Path, sha256: str | None, probe: Dict[str, Any]) -> Path | None:
+    """Decode the soundtrack of ``video`` once into the shared PCM cache.
+
+    Returns ``None`` when the video has no audio stream or decoding fails;
+    Whisper then falls back to decoding the file itself.
+    """
+    if not probe.get("audio_codec"):
+        return None
+    try:
+        return audio_cache.extract(video, sha256)
+    except subprocess.CalledProcessError as e:
+        print("audio extraction failed", video, e)
+        return None
+
+
+@traced("audio_highlights")
+def find_highlights(pcm: Any, probe: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Rank up to ``HIGHLIGHT_WINDOWS`` windows of ``pcm`` by audio energy and scene cuts.
+
+    Returns an empty list (meaning: transcribe everything) when ranking is
+    disabled or there is no decoded audio.
+    """
+    if HIGHLIGHT_WINDOWS <= 0 or pcm is None:
+        return []
+    cuts = probe.get("scenes", [])
+    return audio_highlights.find_highlights(
+        pcm,
+        probe.get("duration", 0.0),
+        CLIP_MAX_SECONDS,
+        HIGHLIGHT_WINDOWS,
+        [c["time"] for c in cuts],
+        [c["score"] for c in cuts],
+    )
+
+
+def analyze_source(
+    video: Path, sha256: str | None = None
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Probe, decode audio, rank highlights and transcribe ``video``.
+
+    The soundtrack is decoded once to memory-mapped PCM that both the
+    highlight ranking and Whisper read. Executed in a worker process, so only
+    plain data is returned: the probe (with its ``highlights``), the
+    transcript segments of the highlight windows and this worker's trace
+    events.
+    """
+    probe = probe_video(video)
+    audio = extract_audio(video, sha256, probe)
+    pcm = audio_cache.open_pcm(audio) if audio else None
+    probe["highlights"] = find_highlights(pcm, probe)
+    segments = transcribe(video, sha256, probe["highlights"], audio)
+    return probe, segments, stage_trace.drain()
+
+
+def overlap_ratio(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    """Return the overlap of two windows relative to the shorter one."""
+    inter = min(a[1], b[1]) - max(a[0], b[0])
+    shorter = min(a[1] - a[0], b[1] - b[0])
+    if inter <= 0 or shorter <= 0:
+        return 0.0
+    return inter / shorter
+
+
+def score_window(window: Dict[str, Any]) -> float:
+    """Rank a candidate window by speech density with a bonus for strong emotion."""
+    length = max(window["end"] - window["start"], 1e-6)
+    score = len(window["text"].split()) / length
+    if detect_emotion(window["text"]) != "inspiring":
+        score += 0.5
+    return score
+
+
+def highlight_score(window: Dict[str, Any], highlights: List[Dict[str, Any]]) -> float:
+    """Score of the audio highlight overlapping ``window`` the most (0 if none)."""
+    best, score = 0.0, 0.0
+    for hl in highlights:
+        ratio = overlap_ratio((window["start"], window["end"]), (hl["start"], hl["end"]))
+        if ratio > best:
+            best, score = ratio, hl["score"]
+    return score
+
+
+def merge_windows(
+    windows: List[Dict[str, Any]], min_overlap: float = CLIP_MERGE_OVERLAP
+) -> List[Dict[str, Any]]:
+    """Merge or deduplicate windows overlapping by at least ``min_overlap``.
+
+    Overlapping windows are combined when the union still fits within
+    ``CLIP_MAX_SECONDS``; otherwise only the higher scoring one is kept.
+    """
+    merged: List[Dict[str, Any]] = []
+    for win in sorted(windows, key=lambda w: (w["start"], w["end"])):
+        if merged:
+            last = merged[-1]
+            if overlap_ratio((last["start"], last["end"]), (win["start"], win["end"])) >= min_overlap:
+                start, end = min(last["start"], win["start"]), max(last["end"], win["end"])
+                if end - start <= CLIP_MAX_SECONDS:
+                    text = last["text"] if win["text"] in last["text"] else f"{last['text']} {win['text']}"
+                    merged[-1] = {"start": start, "end": end, "text": text.strip()}
+                elif score_window(win) > score_window(last):
+                    merged[-1] = win
+                continue
+        merged.append(win)
+    return merged
+
+
+def plan_clips(
+    video: Path,
+    scenes: SceneIndex | List[float],
+    duration: float,
+    segments: List[Dict[str, Any]],
+    limit: int = CLIP_MAX_PER_SOURCE,
+    highlights: List[Dict[str, Any]] | None = None,
+) -> List[Tuple[Dict[str, Any], float, float, Path]]:
+    """Turn transcript segments into ``(segment, start, end, clip_path)`` windows.
+
+    Segments are padded and snapped to scene boundaries, near-duplicate
+    windows are merged, and only the ``limit`` best scoring windows are kept
+    (all of them when ``limit`` is 0), returned in chronological order. The
+    score of an overlapping audio highlight is added to the text score.
+    """
+    index = scenes if isinstance(scenes, SceneIndex) else SceneIndex(scenes)
+    windows = []
     for seg in segments:
         start = max(seg.get("start", 0.0) - 0.5, 0.0)
         end = seg.get("end", 0.0) + 0.5
-        if end - start < 5:
-            end = start + 5
-        if end - start > 15:
-            end = start + 15
-        start = pick_boundary(scenes, start, 0.0, reverse=True)
-        end = pick_boundary(scenes, end, duration, reverse=False)
+        if end - start < CLIP_MIN_SECONDS:
+            end = start + CLIP_MIN_SECONDS
+        if end - start > CLIP_MAX_SECONDS:
+            end = start + CLIP_MAX_SECONDS
+        start = index.before(start, 0.0)
+        end = index.after(end, duration)
         if end <= start:
             continue
+        windows.append({"start": start, "end": end, "text": seg.get("text", "").strip()})
+    windows = merge_windows(windows)
+    if limit > 0 and len(windows) > limit:
+        ranked = sorted(
+            windows,
+            key=lambda w: (-score_window(w) - highlight_score(w, highlights or []), w["start"]),
+        )
+        windows = sorted(ranked[:limit], key=lambda w: w["start"])
+    plan = []
+    for win in windows:
+        start, end = win["start"], win["end"]
         clip_name = f"{video.stem}_{int(start*1000):06d}-{int(end*1000):06d}.mp4"
-        clip_path = STAGING_DIR / clip_name
+        plan.append((win, start, end, STAGING_DIR / clip_name))
+    return plan
+
+
+def cut_batch(
+    video: Path, ranges: List[Tuple[float, float, Path]], manifest: ClipManifest, record: dict
+) -> None:
+    cut_clips(video, ranges)
+    for _, _, dest in ranges:
+        manifest.mark_clip(record, dest.name, "cut")
+
+
+def prepare_clip(
+    video: Path,
+    start: float,
+    end: float,
+    clip_path: Path,
+    manifest: ClipManifest,
+    record: dict,
+    cut: Future | None = None,
+) -> Dict[str, Any] | None:
+    """Cut and sanitize one clip, skipping whatever the manifest says is done.
+
+    ``cut`` is the batched cut job covering this clip, if any.
+    """
+    if cut is not None:
+        cut.result()
+    state = manifest.clip(record, clip_path.name)
+    if not state.get("cut"):
         cut_clip(video, start, end, clip_path)
-        info = sanitize_clip(clip_path)
+        manifest.mark_clip(record, clip_path.name, "cut")
+    if "sanitized" not in state:
+        info = sanitize_clip(clip_path, end - start, (video, start, end))
+        manifest.mark_clip(record, clip_path.name, "sanitized", info)
+    return state["sanitized"]
+
+
+def schedule_clips(
+    video: Path, manifest: ClipManifest, record: dict, pool: ThreadPoolExecutor
+) -> List[Tuple[Dict[str, Any], Path, Future]]:
+    """Submit the missing cut/sanitize work for ``video`` to ``pool``.
+
+    Missing cuts are grouped into batches of ``CUT_BATCH_SIZE`` ranges per
+    ffmpeg run. Batch jobs are queued before the per-clip jobs that wait on
+    them, so the FIFO pool never has every thread blocked on an unstarted cut.
+    """
+    todo = []
+    seen = set()
+    scenes = SceneIndex(record["scenes"], record.get("scene_scores"))
+    plan = plan_clips(
+        video, scenes, record["duration"], record["segments"], highlights=record.get("highlights")
+    )
+    for seg, start, end, clip_path in plan:
+        if clip_path in seen:
+            continue
+        seen.add(clip_path)
+        state = manifest.clip(record, clip_path.name)
+        if state.get("enqueued"):
+            continue
+        if "sanitized" in state and state["sanitized"] is None:
+            continue
+        if not clip_path.exists():
+            manifest.clear_clip(record, clip_path.name)
+        todo.append((seg, start, end, clip_path))
+    uncut = [
+        (start, end, clip_path)
+        for _, start, end, clip_path in todo
+        if not manifest.clip(record, clip_path.name).get("cut")
+    ]
+    batches: Dict[Path, Future] = {}
+    size = max(1, CUT_BATCH_SIZE)
+    for i in range(0, len(uncut), size):
+        chunk = uncut[i : i + size]
+        fut = pool.submit(cut_batch, video, chunk, manifest, record)
+        for _, _, dest in chunk:
+            batches[dest] = fut
+    jobs = []
+    for seg, start, end, clip_path in todo:
+        fut = pool.submit(
+            prepare_clip, video, start, end, clip_path, manifest, record, batches.get(clip_path)
+        )
+        jobs.append((seg, clip_path, fut))
+    return jobs
+
+
+def score_windows(
+    windows: List[Dict[str, Any]],
+    corpus: List[str],
+    base: text_scoring.TextScorer | None = None,
+) -> None:
+    """Attach TF-IDF keywords and an emotion to every clip window of a video.
+
+    IDF comes from ``base`` (the transcripts already in the manifest) plus
+    ``corpus``, so keywords favour words that set a clip apart from the rest
+    of the footage.
+    """
+    scorer = text_scoring.TextScorer(corpus, base)
+    for win, scored in zip(windows, scorer.score(w.get("text", "") for w in windows)):
+        win["keywords"] = scored.keywords
+        win["emotion"] = scored.emotion
+
+
+def commit_clips(
+    video: Path,
+    jobs: List[Tuple[Dict[str, Any], Path, Future]],
+    log: ClipLog,
+    manifest: ClipManifest,
+    record: dict,
+    batch: PackBatch | None = None,
+) -> int:
+    """Log and enqueue finished clips in segment order.
+
+    Clips (and the video) are only marked ``enqueued`` in the manifest once
+    ``batch`` has flushed them to the queue.
+    """
+    count = 0
+    for seg, clip_path, fut in jobs:
+        info = fut.result()
         if info is None:
             continue
-        kws = keywords_from_text(seg.get("text", ""))
+        text = seg.get("text", "")
+        kws = seg["keywords"] if "keywords" in seg else keywords_from_text(text)
         entry = {
             "source": video.name,
             "clip": str(clip_path),
+            "slug": clip_path.stem,
             "timestamp": datetime.utcnow().isoformat() + "Z",
             "keywords": kws,
-            "emotion": detect_emotion(seg.get("text", "")),
+            "emotion": seg.get("emotion") or detect_emotion(text),
             **info,
         }
-        log["clips"].append(entry)
-        enqueue_clip(entry)
+        log.append([entry])
+        enqueue_clip(
+            entry,
+            batch,
+            lambda name=clip_path.name: manifest.mark_clip(record, name, "enqueued"),
+        )
         count += 1
+    for video_stage in ("cut", "sanitized"):
+        manifest.mark(record, video_stage)
+    if batch is None:
+        manifest.mark(record, "enqueued")
+    else:
+        batch.on_flush(lambda: manifest.mark(record, "enqueued"))
+    return count
+
+
+def process_videos(
+    videos: Iterable[Path],
+    log: ClipLog,
+    manifest: ClipManifest,
+    cpu_workers: int = CPU_WORKERS,
+    io_workers: int = IO_WORKERS,
+    batch: PackBatch | None = None,
+) -> int:
+    """Process ``videos`` with overlapping analysis, cutting and enqueueing.
+
+    ``videos`` may be a stream (e.g. files finishing a download): each video
+    is submitted as soon as it arrives. Scene detection and Whisper run in a
+    process pool while ffmpeg cuts and Vision requests run in a bounded
+    thread pool. As soon as a video's analysis is done its clips are
+    scheduled. A committer thread logs and enqueues the videos in stream
+    order, and the clips of each video in segment order, so the log and the
+    pack come out the same however the work interleaves.
+
+    Keyword IDF is fitted once on the transcripts the manifest holds when the
+    run starts; a video analysed in this run adds its own segments on top.
+    """
+    records: Dict[Path, dict] = {}
+    ready: Queue[Tuple[Path, Future] | None] = Queue()
+    errors: List[Exception] = []
+    count = 0
+    known = {sha for sha, entry in manifest.videos.items() if entry.get("segments")}
+    base = text_scoring.TextScorer(
+        s.get("text", "") for sha in known for s in manifest.videos[sha]["segments"]
+    )
+    # Spawned rather than forked: the thread pool and the notifier thread are
+    # already running, and forking a threaded process can deadlock.
+    procs = ProcessPoolExecutor(
+        max_workers=max(1, cpu_workers), mp_context=multiprocessing.get_context("spawn")
+    )
+    with ThreadPoolExecutor(max_workers=max(1, io_workers)) as threads:
+
+        def schedule(video: Path, done: Future, analysis: Future | None = None) -> None:
+            """Record ``analysis``, submit the clip work and resolve ``done`` with the jobs."""
+            record = records[video]
+            try:
+                if analysis is not None:
+                    probe, segments, events = analysis.result()
+                    stage_trace.extend(events)
+                    cuts = probe.pop("scenes")
+                    highlights = probe.pop("highlights", [])
+                    manifest.mark(
+                        record,
+                        "scenes",
+                        scenes=[c["time"] for c in cuts],
+                        scene_scores=[c["score"] for c in cuts],
+                        duration=probe.pop("duration"),
+                        stream=probe,
+                    )
+                    manifest.mark(record, "transcribed", segments=segments, highlights=highlights)
+                jobs = schedule_clips(video, manifest, record, threads)
+                own = [] if record["sha256"] in known else record.get("segments", [])
+                score_windows([seg for seg, _, _ in jobs], [s.get("text", "") for s in own], base)
+            except Exception as e:
+                done.set_exception(e)
+            else:
+                done.set_result(jobs)
+
+        def commit() -> None:
+            nonlocal count
+            while True:
+                item = ready.get()
+                if item is None:
+                    return
+                video, done = item
+                try:
+                    jobs = done.result()
+                    count += commit_clips(video, jobs, log, manifest, records[video], batch)
+                except Exception as e:
+                    print(f"failed to process {video.name}: {e}")
+                    errors.append(e)
+
+        committer = threading.Thread(target=commit, name="clip-commit")
+        committer.start()
+        try:
+            with procs:
+                for video in videos:
+                    record = records[video] = manifest.entry(video)
+                    if manifest.done(record, "enqueued"):
+                        continue
+                    done: Future = Future()
+                    if manifest.done(record, "scenes") and manifest.done(record, "transcribed"):
+                        ready.put((video, done))
+                        schedule(video, done)
+                    else:
+                        fut = procs.submit(analyze_source, video, record["sha256"])
+                        ready.put((video, done))
+                        fut.add_done_callback(
+                            lambda f, video=video, done=done: schedule(video, done, f)
+                        )
+        finally:
+            # Leaving ``procs`` waited for every analysis callback.
+            ready.put(None)
+            committer.join()
+    if errors:
+        raise errors[0]
     return count
 
 
-def main() -> None:
+def process_video(video: Path, log: ClipLog, manifest: ClipManifest) -> int:
+    return process_videos([video], log, manifest, cpu_workers=1)
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="reprocess every video even if the manifest says it is done",
+    )
+    parser.add_argument(
+        "--only",
+        action="append",
+        default=[],
+        metavar="STEM",
+        help="only (re)process the raw video with this file stem; repeatable",
+    )
+    parser.add_argument(
+        "--cpu-workers",
+        type=int,
+        default=CPU_WORKERS,
+        help="processes for scene detection and Whisper (env CLIP_CPU_WORKERS)",
+    )
+    parser.add_argument(
+        "--io-workers",
+        type=int,
+        default=IO_WORKERS,
+        help="threads for ffmpeg cuts and Vision requests (env CLIP_IO_WORKERS)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] | None = None) -> None:
+    args = parse_args(argv)
     bulk_update_profiles()
-    download_raw_clips()
+    manifest = ClipManifest()
     log = load_log()
-    new_count = 0
-    for video in RAW_DIR.glob("*.mp4"):
-        new_count += process_video(video, log)
-    log["updated"] = datetime.utcnow().isoformat() + "Z"
-    save_log(log)
+
+    def videos() -> Iterator[Path]:
+        for video in iter_raw_clips():
+            if args.only and video.stem not in args.only:
+                continue
+            if args.force or args.only:
+                manifest.reset(video)
+            record = manifest.entry(video)
+            if not manifest.done(record, "downloaded"):
+                manifest.mark(record, "downloaded")
+            yield video
+
+    try:
+        with PackBatch() as batch:
+            new_count = process_videos(
+                videos(), log, manifest, args.cpu_workers, args.io_workers, batch
+            )
+    finally:
+        manifest.flush()
+        if _vision_batcher is not None:
+            _vision_batcher.close()
+    log.export()
     send_summary(new_count)
     if os.getenv("COMBINE_CLIPS"):
         today = datetime.utcnow().strftime("%Y-%m-%d")
-        clips = [Path(c["clip"]) for c in log["clips"] if c["timestamp"].startswith(today)]
+        clips = [
+            Path(c["clip"]) for c in log.records() if str(c.get("timestamp", "")).startswith(today)
+        ]
         combine_clips(clips)
     autopost_queue()
+    with stage("telegram"):
+        get_notifier().close()
+    stage_trace.finish()
 
 
 if __name__ == "__main__":
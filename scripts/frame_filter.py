@@ -0,0 +1,165 @@
+"""Frame sampling, a cheap local safety prefilter and cover picking for clips.
+
+A handful of evenly spaced frames is pulled from each clip in one ffmpeg run:
+tiny RGB thumbnails for local heuristics and downscaled JPEGs suitable for
+Google Vision. Skin tone and motion only say something about adult/racy
+content, so they can't clear a clip on their own: every clip still gets at
+least one frame annotated (for violence and labels), and beyond that only the
+frames with notable skin or motion are sent. The same frames are scored for
+sharpness and brightness so the best one can be used as the clip's cover
+without another ffmpeg run.
+"""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List
+
+import numpy as np  # type: ignore
+
+FRAME_SAMPLES = int(os.getenv("FRAME_SAMPLES", "4"))
+FRAME_WIDTH = int(os.getenv("FRAME_WIDTH", "512"))
+SKIN_THRESHOLD = float(os.getenv("SKIN_THRESHOLD", "0.08"))
+MOTION_THRESHOLD = float(os.getenv("MOTION_THRESHOLD", "0.25"))
+CONTACT_SHEET_WIDTH = 160
+
+_THUMB = 64
+
+
+@dataclass
+class Frame:
+    index: int
+    time: float
+    jpeg: bytes
+    rgb: np.ndarray
+    skin: float = 0.0
+    motion: float = 0.0
+    cover: float = 0.0
+
+    @property
+    def ambiguous(self) -> bool:
+        return self.skin >= SKIN_THRESHOLD or self.motion >= MOTION_THRESHOLD
+
+
+def sample_frames(
+    path: Path,
+    duration: float,
+    count: int = FRAME_SAMPLES,
+    contact_sheet: Path | None = None,
+) -> List[Frame]:
+    """Return up to ``count`` evenly spaced frames of ``path``.
+
+    When ``contact_sheet`` is given, a strip of the sampled frames is written
+    there by the same ffmpeg run.
+    """
+    fps = max(count, 1) / max(duration, 0.1)
+    outputs = "[a][b][c]" if contact_sheet else "[a][b]"
+    graph = (
+        f"[0:v]fps={fps:.6f},split={3 if contact_sheet else 2}{outputs};"
+        f"[a]scale={_THUMB}:{_THUMB}[thumb];"
+        f"[b]scale='min({FRAME_WIDTH},iw)':-2[full]"
+    )
+    if contact_sheet:
+        graph += f";[c]scale={CONTACT_SHEET_WIDTH}:-2,tile={max(count, 1)}x1[sheet]"
+    with tempfile.TemporaryDirectory() as tmp:
+        cmd = [
+            "ffmpeg",
+            "-y",
+            "-v",
+            "error",
+            "-i",
+            str(path),
+            "-filter_complex",
+            graph,
+            "-map",
+            "[thumb]",
+            "-frames:v",
+            str(count),
+            "-f",
+            "rawvideo",
+            "-pix_fmt",
+            "rgb24",
+            "pipe:1",
+            "-map",
+            "[full]",
+            "-frames:v",
+            str(count),
+            "-q:v",
+            "3",
+            str(Path(tmp) / "%03d.jpg"),
+        ]
+        if contact_sheet:
+            contact_sheet.parent.mkdir(parents=True, exist_ok=True)
+            cmd += ["-map", "[sheet]", "-frames:v", "1", "-q:v", "4", str(contact_sheet)]
+        res = subprocess.run(cmd, capture_output=True, check=True)
+        size = _THUMB * _THUMB * 3
+        raw = np.frombuffer(res.stdout[: len(res.stdout) // size * size], dtype=np.uint8)
+        thumbs = raw.reshape(-1, _THUMB, _THUMB, 3)
+        jpegs = sorted(Path(tmp).glob("*.jpg"))
+        frames = [
+            Frame(index=i, time=i / fps, jpeg=jpg.read_bytes(), rgb=thumb)
+            for i, (thumb, jpg) in enumerate(zip(thumbs, jpegs))
+        ]
+    score_frames(frames)
+    return frames
+
+
+def skin_ratio(rgb: np.ndarray) -> float:
+    """Fraction of pixels inside a classic YCbCr skin-tone box."""
+    px = rgb.astype(np.float32)
+    r, g, b = px[..., 0], px[..., 1], px[..., 2]
+    cb = 128 - 0.168736 * r - 0.331264 * g + 0.5 * b
+    cr = 128 + 0.5 * r - 0.418688 * g - 0.081312 * b
+    mask = (cb >= 77) & (cb <= 127) & (cr >= 133) & (cr <= 173)
+    return float(mask.mean())
+
+
+def cover_score(rgb: np.ndarray) -> float:
+    """Score a frame as a cover: sharp (Laplacian variance) and well exposed."""
+    gray = rgb.astype(np.float32).mean(axis=2) / 255.0
+    lap = (
+        -4 * gray[1:-1, 1:-1]
+        + gray[:-2, 1:-1]
+        + gray[2:, 1:-1]
+        + gray[1:-1, :-2]
+        + gray[1:-1, 2:]
+    )
+    exposure = 1.0 - 2.0 * abs(float(gray.mean()) - 0.5)
+    return float(lap.var()) * max(exposure, 0.0)
+
+
+def best_cover(frames: List[Frame]) -> Frame | None:
+    return max(frames, key=lambda f: (f.cover, -f.index), default=None)
+
+
+def vision_frames(frames: List[Frame]) -> List[Frame]:
+    """Frames to annotate with Vision: the ambiguous ones, and never none.
+
+    When every frame looks clear locally, the one with the most skin and
+    motion (the middle one on ties) is still sent so violence is checked.
+    """
+    picked = [f for f in frames if f.ambiguous]
+    if picked or not frames:
+        return picked
+    mid = (len(frames) - 1) / 2
+    return [max(frames, key=lambda f: (f.skin + f.motion, -abs(f.index - mid)))]
+
+
+def score_frames(frames: List[Frame]) -> None:
+    """Fill in skin ratio, motion and cover score.
+
+    Motion is the larger mean absolute difference to the previous or next
+    sampled frame, so the first frame is scored too.
+    """
+    diffs = [
+        float(np.abs(b.rgb.astype(np.int16) - a.rgb.astype(np.int16)).mean() / 255.0)
+        for a, b in zip(frames, frames[1:])
+    ]
+    for i, frame in enumerate(frames):
+        frame.skin = skin_ratio(frame.rgb)
+        frame.cover = cover_score(frame.rgb)
+        frame.motion = max(diffs[max(i - 1, 0) : i + 1], default=0.0)
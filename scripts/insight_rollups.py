@@ -0,0 +1,200 @@
+"""Incrementally maintained daily counters for the insights reports.
+
+Clip log lines are read as a stream from where the previous run stopped and
+folded into per-day counters of hooks (keywords), emotions and suggested
+sounds stored in ``data/insights/rollups.json``. Queue rows are streamed by
+``updated_seq`` only while the same SQLite database lives; CI rebuilds it
+from ``.schedule-pack.json`` on every checkout, so there the queue side is
+skipped when the pack is the one already read (same ``generated_at``) and is
+otherwise a full scan of the pack. Each slug's current contribution is
+remembered, so a later partial update or a full rescan (after the clip log
+was compacted, or of a rebuilt queue) replaces its old counts instead of
+double counting. Reports for any date range just sum the daily counters.
+Days (and the per-slug contributions dated on them) older than
+``INSIGHTS_ROLLUP_DAYS`` are dropped on save, so the file stays bounded.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from collections import Counter
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, Tuple
+
+from atomic_file import atomic_write
+from clip_log import ClipLog, slug_of
+from schedule_queue import ScheduleQueue, parse_time
+
+ROLLUP_PATH = Path(os.getenv("INSIGHTS_ROLLUPS", "data/insights/rollups.json"))
+ROLLUP_DAYS = int(os.getenv("INSIGHTS_ROLLUP_DAYS", "90"))
+KINDS = ("hooks", "emotions", "sounds")
+
+
+def _empty() -> Dict[str, Any]:
+    return {"days": {}, "contrib": {}, "cursor": {}}
+
+
+class DailyRollups:
+    """Per-day hook/emotion/sound counters with streaming catch-up."""
+
+    def __init__(self, path: Path = ROLLUP_PATH) -> None:
+        self.path = path
+        try:
+            self.data = json.loads(path.read_text())
+        except (OSError, ValueError):
+            self.data = _empty()
+
+    def prune(self, today: date | None = None) -> None:
+        """Drop days and contributions older than ``ROLLUP_DAYS`` before ``today``."""
+        cutoff = ((today or date.today()) - timedelta(days=ROLLUP_DAYS - 1)).isoformat()
+        for day in [d for d in self.data["days"] if d < cutoff]:
+            del self.data["days"][day]
+        contrib = self.data["contrib"]
+        for key in [k for k, c in contrib.items() if c.get("date") and c["date"] < cutoff]:
+            del contrib[key]
+
+    def save(self) -> None:
+        self.prune()
+        atomic_write(self.path, json.dumps(self.data, separators=(",", ":")))
+
+    def _bump(self, contrib: Dict[str, Any], sign: int) -> None:
+        day = contrib.get("date")
+        if not day:
+            return
+        counters = self.data["days"].setdefault(day, {k: {} for k in KINDS})
+        for kind in KINDS:
+            bucket = counters.setdefault(kind, {})
+            for key in contrib.get(kind, []):
+                n = bucket.get(key, 0) + sign
+                if n > 0:
+                    bucket[key] = n
+                else:
+                    bucket.pop(key, None)
+
+    def _apply(self, key: str, fields: Dict[str, Any]) -> None:
+        """Merge ``fields`` into ``key``'s contribution and adjust the counters."""
+        old = self.data["contrib"].get(key, {})
+        new = {**old, **fields}
+        if new == old:
+            return
+        self._bump(old, -1)
+        self._bump(new, 1)
+        self.data["contrib"][key] = new
+
+    # -- sources -----------------------------------------------------------
+
+    def ingest_clips(self, log: ClipLog) -> int:
+        """Fold clip log lines written since the last call; returns lines read."""
+        log.migrate()
+        with log.locked(shared=True):
+            return self._ingest_clips_locked(log)
+
+    def _ingest_clips_locked(self, log: ClipLog) -> int:
+        cursor = self.data["cursor"].setdefault("clips", {})
+        compacted = log.index().get("compacted")
+        if cursor.get("compacted") != compacted:
+            # Segments read so far were folded into a new base: rescan it.
+            cursor.clear()
+            cursor["compacted"] = compacted
+            sources = [log.base] if log.base.exists() else []
+        else:
+            sources = []
+        offsets = cursor.setdefault("segments", {})
+        live = {seg.name for seg in log.segments()}
+        for name in list(offsets):
+            if name not in live:
+                del offsets[name]
+        count = 0
+        for path in sources + log.segments():
+            start = offsets.get(path.name, 0) if path != log.base else 0
+            end = start
+            for end, line in _read_from(path, start):
+                if line is None:
+                    continue
+                self._apply("clip:" + line["slug"], _clip_fields(line))
+                count += 1
+            if path != log.base:
+                offsets[path.name] = end
+        return count
+
+    def ingest_queue(self, queue: ScheduleQueue) -> int:
+        """Fold queue rows added or updated since the last call; returns rows read.
+
+        A database we have not seen before is scanned in full unless it
+        mirrors the same pack as the last call.
+        """
+        cursor = self.data["cursor"].setdefault("queue", {})
+        ident = queue.identity()
+        stamp = queue.pack_stamp()
+        if cursor.get("db") != ident:
+            unchanged = stamp is not None and cursor.get("pack") == stamp
+            cursor.clear()
+            cursor["db"] = ident
+            if unchanged:
+                cursor["seq"] = queue.last_seq()
+        count = 0
+        for seq, entry in queue.rows_after(cursor.get("seq", 0)):
+            due = parse_time(entry.get("scheduled_time")) or parse_time(entry.get("suggested_time"))
+            sound = entry.get("suggested_sound")
+            self._apply(
+                "queue:" + slug_of(entry),
+                {"date": due.date().isoformat() if due else None, "sounds": [sound] if sound else []},
+            )
+            cursor["seq"] = seq
+            count += 1
+        cursor["pack"] = stamp
+        return count
+
+    # -- reports -----------------------------------------------------------
+
+    def report(self, start: date, end: date) -> Dict[str, Counter[str]]:
+        """Sum the daily counters for ``start <= day <= end``."""
+        totals: Dict[str, Counter[str]] = {k: Counter() for k in KINDS}
+        days = self.data["days"]
+        day = start
+        while day <= end:
+            counters = days.get(day.isoformat())
+            if counters:
+                for kind in KINDS:
+                    totals[kind].update(counters.get(kind, {}))
+            day += timedelta(days=1)
+        return totals
+
+
+def _clip_fields(line: Dict[str, Any]) -> Dict[str, Any]:
+    fields: Dict[str, Any] = {}
+    if "timestamp" in line:
+        fields["date"] = str(line["timestamp"])[:10] or None
+    if "keywords" in line:
+        fields["hooks"] = list(line["keywords"] or [])
+    if "emotion" in line:
+        fields["emotions"] = [line["emotion"]] if line["emotion"] else []
+    return fields
+
+
+def _read_from(path: Path, offset: int) -> Iterator[Tuple[int, Dict[str, Any] | None]]:
+    """Yield ``(end_offset, record)`` for complete lines after ``offset``.
+
+    Unparseable lines yield ``None`` so the offset still moves past them.
+    """
+    with path.open("rb") as fh:
+        fh.seek(offset)
+        pos = offset
+        for raw in fh:
+            if not raw.endswith(b"\n"):
+                break
+            pos += len(raw)
+            try:
+                rec = json.loads(raw)
+            except ValueError:
+                rec = None
+            yield pos, rec if isinstance(rec, dict) and rec.get("slug") else None
+
+
+def window(name: str, today: date | None = None) -> Tuple[date, date]:
+    """Return the inclusive date range for ``week`` or ``month`` ending today."""
+    today = today or date.today()
+    days = {"week": 7, "month": 30}[name]
+    return today - timedelta(days=days - 1), today
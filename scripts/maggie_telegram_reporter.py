@@ -4,11 +4,16 @@ Sends twice-daily summaries of posted videos, trends, and flops.
 """
 import os
 from datetime import datetime
-from telegram import Bot
+from pathlib import Path
+
+from telegram_notifier import Outbox, TelegramNotifier
 
 TOKEN = os.environ.get("TELEGRAM_TOKEN")  # <-- insert Telegram bot token
 CHAT_ID = os.environ.get("TELEGRAM_CHAT_ID")  # <-- insert Telegram chat ID
 TONE_FILE = os.environ.get("TONE_FILE", "tone.json")
+# Kept apart from the shared outbox: nothing commits this script's outbox, so
+# draining the shared one here would resend items the workflows still hold.
+OUTBOX_PATH = Path(os.environ.get("REPORTER_OUTBOX", "data/telegram-reporter-outbox.json"))
 
 
 def build_message() -> str:
@@ -24,9 +29,8 @@ def build_message() -> str:
 def main() -> None:
     if not TOKEN or not CHAT_ID:
         raise SystemExit("Missing TELEGRAM_TOKEN or TELEGRAM_CHAT_ID")
-    bot = Bot(TOKEN)
-    message = build_message()
-    bot.send_message(chat_id=CHAT_ID, text=message)
+    with TelegramNotifier(TOKEN, CHAT_ID, outbox=Outbox(OUTBOX_PATH)) as notifier:
+        notifier.message(build_message())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,299 @@
+"""SQLite-backed posting queue with a JSON export for the static pages.
+
+``.schedule-pack.json`` stays the committed source of truth, read by the
+worker and ``schedule.html``. This module mirrors its entries in a local
+SQLite database indexed on ``(status, autopost, scheduled_time)``, so within
+a run picking the next post is a single indexed query and status changes go
+through transactions: ``queued -> posting -> posted`` or ``failed`` (and
+``failed -> queued`` for a retry).
+
+The database is not committed or cached between CI runs: whenever the pack
+was changed by something else since the last export (always the case on a
+fresh checkout) the database is re-synced from it, inserting, updating and
+deleting rows to match. That sync is linear in the pack size, once per run.
+Re-adding an existing slug keeps its status, so re-enqueueing a posted clip
+never makes it postable again. Every insert or change stamps the row with the
+next ``updated_seq`` so readers can stream just the rows changed since their
+last visit.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List
+
+from atomic_file import atomic_write
+
+DB_PATH = Path(os.getenv("SCHEDULE_DB", ".schedule-queue.sqlite"))
+PACK_PATH = Path(".schedule-pack.json")
+WORKER_URL = "https://tight-snow-2840.messyandmagnetic.workers.dev"
+
+TRANSITIONS = {
+    "queued": {"posting"},
+    "posting": {"posted", "failed"},
+    "failed": {"queued"},
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS queue (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    slug TEXT NOT NULL UNIQUE,
+    status TEXT NOT NULL,
+    autopost INTEGER NOT NULL DEFAULT 0,
+    scheduled_time TEXT,
+    data TEXT NOT NULL,
+    updated_seq INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS queue_ready ON queue (status, autopost, scheduled_time);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def parse_time(ts: str | None) -> datetime | None:
+    """Parse an ISO timestamp into naive UTC, or ``None`` if missing/invalid."""
+    if not ts:
+        return None
+    try:
+        if ts.endswith("Z"):
+            ts = ts[:-1] + "+00:00"
+        dt = datetime.fromisoformat(ts)
+    except ValueError:
+        return None
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def _due(entry: Dict[str, Any]) -> str | None:
+    ts = parse_time(entry.get("scheduled_time")) or parse_time(entry.get("suggested_time"))
+    return ts.isoformat() if ts else None
+
+
+def _slug(entry: Dict[str, Any]) -> str:
+    return entry.get("slug") or Path(entry.get("clip", "")).stem or entry.get("fileId", "")
+
+
+class ScheduleQueue:
+    def __init__(self, db_path: Path = DB_PATH, pack_path: Path = PACK_PATH) -> None:
+        self.pack_path = pack_path
+        # Callers may hand the queue to a worker thread (extract_clips' committer
+        # flushes ``PackBatch`` from one); they serialize access themselves.
+        self.conn = sqlite3.connect(str(db_path), isolation_level=None, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+        if self._meta("created") is None:
+            with self.transaction():
+                self._set_meta("created", datetime.utcnow().isoformat() + "Z")
+        self.sync_from_pack()
+
+    def _migrate(self) -> None:
+        """Add ``updated_seq`` to databases created before it existed."""
+        columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(queue)")}
+        if "updated_seq" not in columns:
+            with self.transaction():
+                self.conn.execute(
+                    "ALTER TABLE queue ADD COLUMN updated_seq INTEGER NOT NULL DEFAULT 0"
+                )
+                self.conn.execute("UPDATE queue SET updated_seq = seq")
+                last = self.conn.execute("SELECT MAX(seq) FROM queue").fetchone()[0]
+                self._set_meta("updated_seq", str(last or 0))
+        self.conn.execute("CREATE INDEX IF NOT EXISTS queue_updated ON queue (updated_seq)")
+
+    def close(self) -> None:
+        self.conn.close()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.conn
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def _meta(self, key: str) -> str | None:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _next_seqs(self, n: int) -> range:
+        """Reserve ``n`` consecutive ``updated_seq`` values; call inside a transaction."""
+        last = int(self._meta("updated_seq") or 0)
+        self._set_meta("updated_seq", str(last + n))
+        return range(last + 1, last + n + 1)
+
+    def sync_from_pack(self) -> None:
+        """Import the JSON pack if it changed since our last export."""
+        if not self.pack_path.exists():
+            return
+        mtime = str(self.pack_path.stat().st_mtime_ns)
+        if self._meta("pack_mtime") == mtime:
+            return
+        try:
+            pack = json.loads(self.pack_path.read_text())
+        except ValueError:
+            return
+        entries = pack.get("queue", [])
+        with self.transaction():
+            self._upsert(entries, keep_status=False)
+            self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS pack_slugs (slug TEXT PRIMARY KEY)")
+            self.conn.execute("DELETE FROM pack_slugs")
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO pack_slugs (slug) VALUES (?)", [(_slug(e),) for e in entries]
+            )
+            self.conn.execute("DELETE FROM queue WHERE slug NOT IN (SELECT slug FROM pack_slugs)")
+            for key in ("generated_at", "worker"):
+                if pack.get(key):
+                    self._set_meta(key, pack[key])
+            self._set_meta("pack_mtime", mtime)
+
+    def _upsert(self, entries: Iterable[Dict[str, Any]], keep_status: bool = True) -> None:
+        """Insert or update entries by slug.
+
+        With ``keep_status`` an existing row keeps its status (also inside
+        ``data``); otherwise the entry's status wins, as when syncing from a
+        pack edited elsewhere. Rows that end up unchanged keep their
+        ``updated_seq``.
+        """
+        if keep_status:
+            status, data = "queue.status", "json_set(excluded.data, '$.status', queue.status)"
+        else:
+            status, data = "excluded.status", "excluded.data"
+        entries = list(entries)
+        self.conn.executemany(
+            f"""
+            INSERT INTO queue (slug, status, autopost, scheduled_time, data, updated_seq)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(slug) DO UPDATE SET
+                status = {status},
+                autopost = excluded.autopost,
+                scheduled_time = excluded.scheduled_time,
+                data = {data},
+                updated_seq = excluded.updated_seq
+            WHERE {status} IS NOT queue.status OR json({data}) IS NOT json(queue.data)
+            """,
+            [
+                (
+                    _slug(e),
+                    e.get("status", "queued"),
+                    1 if e.get("autopost") else 0,
+                    _due(e),
+                    json.dumps({**e, "slug": _slug(e), "status": e.get("status", "queued")}),
+                    seq,
+                )
+                for e, seq in zip(entries, self._next_seqs(len(entries)))
+            ],
+        )
+
+    def add(self, entries: Iterable[Dict[str, Any]]) -> None:
+        with self.transaction():
+            self._upsert(entries)
+
+    def next_ready(self, now: datetime | None = None) -> Dict[str, Any] | None:
+        """Return the earliest queued autopost entry due at ``now``."""
+        now = now or datetime.utcnow()
+        row = self.conn.execute(
+            """
+            SELECT data FROM queue
+            WHERE status = 'queued' AND autopost = 1 AND scheduled_time <= ?
+            ORDER BY scheduled_time LIMIT 1
+            """,
+            (now.isoformat(),),
+        ).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def transition(self, slug: str, status: str, **fields: Any) -> Dict[str, Any]:
+        """Move ``slug`` to ``status``, merging ``fields`` into its entry."""
+        with self.transaction():
+            return self._transition(slug, status, fields)
+
+    def _transition(self, slug: str, status: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+        row = self.conn.execute("SELECT status, data FROM queue WHERE slug = ?", (slug,)).fetchone()
+        if row is None:
+            raise KeyError(slug)
+        if status not in TRANSITIONS.get(row["status"], set()):
+            raise ValueError(f"cannot move {slug} from {row['status']} to {status}")
+        entry = json.loads(row["data"])
+        entry.update(fields)
+        entry["status"] = status
+        self.conn.execute(
+            "UPDATE queue SET status = ?, data = ?, updated_seq = ? WHERE slug = ?",
+            (status, json.dumps(entry), self._next_seqs(1)[0], slug),
+        )
+        return entry
+
+    def claim(self, now: datetime | None = None) -> Dict[str, Any] | None:
+        """Atomically pick the next ready entry and mark it ``posting``."""
+        now = now or datetime.utcnow()
+        with self.transaction():
+            row = self.conn.execute(
+                """
+                SELECT slug FROM queue
+                WHERE status = 'queued' AND autopost = 1 AND scheduled_time <= ?
+                ORDER BY scheduled_time LIMIT 1
+                """,
+                (now.isoformat(),),
+            ).fetchone()
+            if row is None:
+                return None
+            return self._transition(row["slug"], "posting", {})
+
+    def identity(self) -> str:
+        """Creation stamp of this database; ``updated_seq`` is only comparable within one."""
+        return self._meta("created") or ""
+
+    def pack_stamp(self) -> str | None:
+        """``generated_at`` of the pack this database last synced from or exported."""
+        return self._meta("generated_at")
+
+    def last_seq(self) -> int:
+        """The highest ``updated_seq`` handed out so far."""
+        return int(self._meta("updated_seq") or 0)
+
+    def rows_after(self, seq: int) -> Iterator[tuple[int, Dict[str, Any]]]:
+        """Stream ``(updated_seq, entry)`` for rows inserted or changed after ``seq``."""
+        rows = self.conn.execute(
+            "SELECT updated_seq, data FROM queue WHERE updated_seq > ? ORDER BY updated_seq", (seq,)
+        )
+        for row in rows:
+            yield row["updated_seq"], json.loads(row["data"])
+
+    def entries(self) -> List[Dict[str, Any]]:
+        rows = self.conn.execute("SELECT data FROM queue ORDER BY seq")
+        return [json.loads(r["data"]) for r in rows]
+
+    def export(self, path: Path | None = None) -> Dict[str, Any]:
+        """Write the queue as ``.schedule-pack.json`` for the worker and static pages."""
+        path = path or self.pack_path
+        pack = {
+            "generated_at": datetime.utcnow().isoformat() + "Z",
+            "worker": self._meta("worker") or WORKER_URL,
+            "queue": self.entries(),
+        }
+        atomic_write(path, json.dumps(pack, indent=2))
+        if path == self.pack_path:
+            with self.transaction():
+                self._set_meta("pack_mtime", str(path.stat().st_mtime_ns))
+                self._set_meta("generated_at", pack["generated_at"])
+        return pack
+
+
+def main() -> None:
+    """Rebuild ``.schedule-pack.json`` from the SQLite queue."""
+    queue = ScheduleQueue()
+    pack = queue.export()
+    print(f"exported {len(pack['queue'])} entries to {queue.pack_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,71 +7,39 @@ updates grant recommendations, and tags memoir-worthy events.
 
 import argparse
 import datetime as dt
-import json
-from pathlib import Path
 
-ROOT = Path(__file__).resolve().parent.parent
-BRAIN_DIR = ROOT / "brain"
-MEMORY_FILE = BRAIN_DIR / "memory.json"
-LOG_FILE = BRAIN_DIR / "learning_log.json"
+from brain_store import BRAIN_DIR, LearningLog, Memory
 
 
-def load_json(path: Path, default):
-    try:
-        return json.loads(path.read_text())
-    except Exception:
-        return default
-
-
-def save_json(path: Path, data, dry_run: bool):
-    if dry_run:
-        return
-    path.write_text(json.dumps(data, indent=2))
-
-
-def clean_old_logs(log, days: int = 30):
-    cutoff = dt.datetime.utcnow() - dt.timedelta(days=days)
-    cleaned = []
-    for entry in log:
-        ts = entry.get("ts")
-        try:
-            if dt.datetime.fromisoformat(ts) > cutoff:
-                cleaned.append(entry)
-        except Exception:
-            cleaned.append(entry)
-    return cleaned
-
-
-def refresh_tiktok_strategy(mem):
-    strat = mem.setdefault("tiktok_strategy", {"last_refresh": None, "notes": []})
+def refresh_tiktok_strategy(mem: Memory) -> Memory:
+    strat = mem.data.setdefault("tiktok_strategy", {"last_refresh": None, "notes": []})
     strat["last_refresh"] = dt.datetime.utcnow().isoformat()
     return mem
 
 
-def update_grant_recommendations(mem):
-    grants = mem.setdefault("grant_recommendations", [])
-    grants.append({"ts": dt.datetime.utcnow().isoformat(), "notes": "Auto refresh"})
+def update_grant_recommendations(mem: Memory) -> Memory:
+    mem.push("grant_recommendations", {"ts": dt.datetime.utcnow().isoformat(), "notes": "Auto refresh"})
     return mem
 
 
-def tag_memoir_events(mem):
-    tags = mem.setdefault("memoir_worthy", [])
-    tags.append({"ts": dt.datetime.utcnow().isoformat(), "tag": "auto"})
+def tag_memoir_events(mem: Memory) -> Memory:
+    mem.push("memoir_worthy", {"ts": dt.datetime.utcnow().isoformat(), "tag": "auto"})
     return mem
 
 
 def main(dry_run: bool = False):
-    mem = load_json(MEMORY_FILE, {})
-    log = load_json(LOG_FILE, [])
-    log = clean_old_logs(log)
+    mem = Memory(BRAIN_DIR)
+    log = LearningLog(BRAIN_DIR)
+    mem.compact()
     mem = refresh_tiktok_strategy(mem)
     mem = update_grant_recommendations(mem)
     mem = tag_memoir_events(mem)
-    save_json(MEMORY_FILE, mem, dry_run)
-    save_json(LOG_FILE, log, dry_run)
-    if not dry_run:
-        log.append({"ts": dt.datetime.utcnow().isoformat(), "event": "self_update"})
-        save_json(LOG_FILE, log, False)
+    if dry_run:
+        return
+    log.ingest_inbox()
+    log.prune()
+    log.append({"event": "self_update"})
+    mem.save()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,200 @@
+"""Per-stage timing and resource instrumentation for the clip pipeline.
+
+Wrap a stage with ``with stage("transcribe", video=...)`` or decorate it
+with ``@traced("cut_clip")``. Each stage records:
+
+* wall time and the calling thread's CPU time;
+* CPU time of child processes (ffmpeg, ffprobe) waited for during the stage;
+* the peak RSS of any child process so far (``ru_maxrss`` is a high-water
+  mark, so this is an upper bound for the stage);
+* bytes read and written by the process and its reaped children
+  (``/proc/self/io``; unavailable outside Linux).
+
+Child and I/O counters are process wide, so stages running in parallel
+threads share them; the numbers are meant to show where a run spends its
+time, not exact per-clip accounting.
+
+Events are kept in Chrome trace format (``ph: "X"``) and can be opened in
+``chrome://tracing`` or Perfetto. Worker processes hand their events back to
+the parent with ``drain`` / ``extend``.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+import resource
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List
+
+from atomic_file import atomic_write
+
+TRACE_DIR = Path(os.getenv("TRACE_DIR", ".cache/traces"))
+HEALTH_PATH = Path("public/health.json")
+
+_events: List[Dict[str, Any]] = []
+_lock = threading.Lock()
+_started = time.time()
+
+
+def _io() -> Dict[str, int]:
+    try:
+        with open("/proc/self/io") as fh:
+            fields = dict(line.split(":", 1) for line in fh)
+    except OSError:
+        return {"read": 0, "write": 0}
+    return {"read": int(fields["rchar"]), "write": int(fields["wchar"])}
+
+
+def _children() -> resource.struct_rusage:
+    return resource.getrusage(resource.RUSAGE_CHILDREN)
+
+
+@contextmanager
+def stage(name: str, **args: Any) -> Iterator[Dict[str, Any]]:
+    """Record ``name`` as a complete trace event; ``args`` end up in the event."""
+    ts = time.time()
+    wall = time.perf_counter()
+    cpu = time.thread_time()
+    child = _children()
+    io = _io()
+    event: Dict[str, Any] = {"name": name, "args": dict(args)}
+    try:
+        yield event["args"]
+    except BaseException as e:
+        event["args"]["error"] = type(e).__name__
+        raise
+    finally:
+        after = _children()
+        io_after = _io()
+        event.update(
+            {
+                "cat": "stage",
+                "ph": "X",
+                "ts": int(ts * 1e6),
+                "dur": int((time.perf_counter() - wall) * 1e6),
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+            }
+        )
+        event["args"].update(
+            {
+                "cpu_ms": round((time.thread_time() - cpu) * 1000, 1),
+                "child_cpu_ms": round(
+                    (after.ru_utime + after.ru_stime - child.ru_utime - child.ru_stime) * 1000, 1
+                ),
+                "child_maxrss_kb": after.ru_maxrss,
+                "read_bytes": io_after["read"] - io["read"],
+                "write_bytes": io_after["write"] - io["write"],
+            }
+        )
+        with _lock:
+            _events.append(event)
+
+
+def traced(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator form of ``stage``."""
+
+    def wrap(fn: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(fn)
+        def inner(*a: Any, **kw: Any) -> Any:
+            with stage(name):
+                return fn(*a, **kw)
+
+        return inner
+
+    return wrap
+
+
+def drain() -> List[Dict[str, Any]]:
+    """Remove and return the events recorded by this process.
+
+    Forked workers inherit the parent's list, so only events with our pid
+    are returned.
+    """
+    pid = os.getpid()
+    with _lock:
+        mine = [e for e in _events if e["pid"] == pid]
+        _events.clear()
+    return mine
+
+
+def extend(events: List[Dict[str, Any]]) -> None:
+    with _lock:
+        _events.extend(events)
+
+
+def events() -> List[Dict[str, Any]]:
+    with _lock:
+        return list(_events)
+
+
+def summarize(evts: List[Dict[str, Any]] | None = None) -> Dict[str, Dict[str, float]]:
+    """Aggregate events per stage name."""
+    out: Dict[str, Dict[str, float]] = {}
+    for e in events() if evts is None else evts:
+        a = e["args"]
+        s = out.setdefault(
+            e["name"],
+            {
+                "count": 0,
+                "wall_s": 0.0,
+                "max_s": 0.0,
+                "cpu_s": 0.0,
+                "child_cpu_s": 0.0,
+                "child_maxrss_mb": 0.0,
+                "read_mb": 0.0,
+                "write_mb": 0.0,
+                "errors": 0,
+            },
+        )
+        s["count"] += 1
+        s["wall_s"] += e["dur"] / 1e6
+        s["max_s"] = max(s["max_s"], e["dur"] / 1e6)
+        s["cpu_s"] += a["cpu_ms"] / 1000
+        s["child_cpu_s"] += a["child_cpu_ms"] / 1000
+        s["child_maxrss_mb"] = max(s["child_maxrss_mb"], a["child_maxrss_kb"] / 1024)
+        s["read_mb"] += a["read_bytes"] / 1e6
+        s["write_mb"] += a["write_bytes"] / 1e6
+        s["errors"] += 1 if "error" in a else 0
+    return {name: {k: round(v, 3) for k, v in s.items()} for name, s in out.items()}
+
+
+def format_table(summary: Dict[str, Dict[str, float]]) -> str:
+    cols = ["count", "wall_s", "max_s", "cpu_s", "child_cpu_s", "child_maxrss_mb", "read_mb", "write_mb", "errors"]
+    width = max([len("stage")] + [len(n) for n in summary])
+    lines = ["stage".ljust(width) + "".join(c.rjust(16) for c in cols)]
+    for name, s in sorted(summary.items(), key=lambda kv: -kv[1]["wall_s"]):
+        lines.append(name.ljust(width) + "".join(f"{s[c]:>16g}" for c in cols))
+    return "\n".join(lines)
+
+
+def finish(run: str = "extract_clips", health_path: Path | None = HEALTH_PATH) -> Dict[str, Any]:
+    """Write the Chrome trace, print the summary table and publish it to ``health.json``."""
+    evts = events()
+    summary = summarize(evts)
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+    TRACE_DIR.mkdir(parents=True, exist_ok=True)
+    trace_path = TRACE_DIR / f"{run}-{stamp}.json"
+    trace_path.write_text(json.dumps({"traceEvents": evts, "displayTimeUnit": "ms"}))
+    print(format_table(summary))
+    print(f"trace written to {trace_path}")
+    report = {
+        "run": run,
+        "finished": datetime.utcnow().isoformat() + "Z",
+        "wall_s": round(time.time() - _started, 3),
+        "stages": summary,
+    }
+    if health_path is not None:
+        try:
+            health = json.loads(health_path.read_text())
+        except (OSError, ValueError):
+            health = {"ok": True}
+        health.setdefault("pipelines", {})[run] = report
+        atomic_write(health_path, json.dumps(health, indent=2))
+    return report
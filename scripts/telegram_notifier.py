@@ -0,0 +1,375 @@
+"""Shared Telegram notifier with batching, rate limiting and an outbox.
+
+Callers hand messages to ``TelegramNotifier`` and return immediately. The
+notifier persists every item to an outbox file first, then an asyncio loop
+in a background thread sends them over one pooled HTTP session:
+
+* clip previews queued close together are sent as ``sendMediaGroup``
+  albums (up to 10 covers), followed by one message carrying the
+  Approve/Edit/Skip buttons for every clip in the album, since albums
+  cannot have inline keyboards;
+* a token bucket keeps the bot under Telegram's per-chat limits, and a
+  429 response pauses the bucket for the ``retry_after`` Telegram asks for;
+* items that fail stay in the outbox and are retried on the next run, so a
+  Telegram outage never blocks clip processing.
+
+Blocking HTTP calls run in the loop's executor; no async HTTP client is
+needed on top of ``requests``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Any, Dict, List
+
+import requests  # type: ignore
+from requests.adapters import HTTPAdapter  # type: ignore
+
+from atomic_file import atomic_write
+
+API_URL = "https://api.telegram.org"
+OUTBOX_PATH = Path(os.getenv("TELEGRAM_OUTBOX", "data/telegram-outbox.json"))
+RATE = float(os.getenv("TELEGRAM_RATE", "1"))
+BURST = int(os.getenv("TELEGRAM_BURST", "3"))
+LINGER = float(os.getenv("TELEGRAM_LINGER", "2"))
+TIMEOUT = float(os.getenv("TELEGRAM_TIMEOUT", "20"))
+FLUSH_TIMEOUT = float(os.getenv("TELEGRAM_FLUSH_TIMEOUT", "60"))
+MAX_ATTEMPTS = int(os.getenv("TELEGRAM_MAX_ATTEMPTS", "8"))
+ALBUM_SIZE = 10
+
+
+class RetryAfter(Exception):
+    def __init__(self, seconds: float) -> None:
+        super().__init__(f"retry after {seconds}s")
+        self.seconds = seconds
+
+
+class PermanentError(Exception):
+    """Telegram rejected the request; retrying will not help."""
+
+
+class TokenBucket:
+    """Async token bucket that can be paused for a server-imposed delay."""
+
+    def __init__(self, rate: float = RATE, capacity: int = BURST) -> None:
+        self.rate = max(rate, 0.01)
+        self.capacity = max(capacity, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def pause(self, seconds: float) -> None:
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+    async def acquire(self) -> None:
+        while True:
+            now = time.monotonic()
+            if now < self.paused_until:
+                await asyncio.sleep(self.paused_until - now)
+                continue
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class Outbox:
+    """JSON file of unsent items, rewritten atomically on every change."""
+
+    def __init__(self, path: Path = OUTBOX_PATH) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            self.items: List[Dict[str, Any]] = json.loads(path.read_text())
+        except (OSError, ValueError):
+            self.items = []
+
+    def save(self) -> None:
+        with self._lock:
+            self._save_locked()
+
+    def _save_locked(self) -> None:
+        atomic_write(self.path, json.dumps(self.items, indent=2, ensure_ascii=False))
+
+    def add(self, item: Dict[str, Any]) -> None:
+        with self._lock:
+            self.items.append(item)
+            self._save_locked()
+
+    def pending(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self.items)
+
+    def done(self, ids: List[str]) -> None:
+        with self._lock:
+            self.items = [it for it in self.items if it["id"] not in ids]
+            self._save_locked()
+
+    def mark(self, ids: List[str], **fields: Any) -> None:
+        with self._lock:
+            for it in self.items:
+                if it["id"] in ids:
+                    it.update(fields)
+            self._save_locked()
+
+    def failed(self, ids: List[str], error: str) -> None:
+        """Count a failed attempt; items past ``MAX_ATTEMPTS`` are dropped."""
+        with self._lock:
+            keep = []
+            for it in self.items:
+                if it["id"] in ids:
+                    it["attempts"] = it.get("attempts", 0) + 1
+                    it["error"] = error
+                    if it["attempts"] >= MAX_ATTEMPTS:
+                        print("telegram giving up on", it["kind"], error)
+                        continue
+                keep.append(it)
+            self.items = keep
+            self._save_locked()
+
+
+class TelegramNotifier:
+    """Non-blocking Telegram sender shared by the posting scripts."""
+
+    def __init__(
+        self,
+        token: str | None = None,
+        chat: str | None = None,
+        outbox: Outbox | None = None,
+        rate: float = RATE,
+        linger: float = LINGER,
+    ) -> None:
+        self.token = token or os.getenv("TELEGRAM_BOT_TOKEN") or os.getenv("TELEGRAM_TOKEN")
+        self.chat = chat or os.getenv("TELEGRAM_CHAT_ID")
+        self.outbox = outbox or Outbox()
+        self.bucket = TokenBucket(rate)
+        self.linger = linger
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        self._executor = ThreadPoolExecutor(max_workers=2)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wake: asyncio.Event | None = None
+        self._thread: threading.Thread | None = None
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+        self._inflight: set = set()
+        self._deadline = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.token and self.chat)
+
+    def __enter__(self) -> "TelegramNotifier":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    # -- producers ---------------------------------------------------------
+
+    def _enqueue(self, kind: str, **fields: Any) -> None:
+        if not self.enabled:
+            return
+        self.outbox.add({"id": uuid.uuid4().hex, "kind": kind, **fields})
+        self._start()
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def message(self, text: str, buttons: Dict[str, Any] | None = None) -> None:
+        self._enqueue("message", text=text, buttons=buttons)
+
+    def preview(self, photo: Path, caption: str, buttons: List[Dict[str, str]]) -> None:
+        """Queue a clip preview; nearby previews are grouped into one album."""
+        self._enqueue("preview", photo=str(photo), caption=caption, buttons=buttons)
+
+    # -- sending -----------------------------------------------------------
+
+    def _post(self, method: str, data: Dict[str, Any], files: Dict[str, Path] | None = None) -> Any:
+        with ExitStack() as stack:
+            handles = {k: stack.enter_context(p.open("rb")) for k, p in (files or {}).items()}
+            resp = self.session.post(
+                f"{API_URL}/bot{self.token}/{method}", data=data, files=handles or None, timeout=TIMEOUT
+            )
+        try:
+            body = resp.json()
+        except ValueError:
+            body = {}
+        if resp.status_code == 429:
+            raise RetryAfter(float(body.get("parameters", {}).get("retry_after", 5)))
+        if 400 <= resp.status_code < 500:
+            raise PermanentError(body.get("description") or resp.text)
+        resp.raise_for_status()
+        return body.get("result")
+
+    async def _call(self, method: str, data: Dict[str, Any], files: Dict[str, Path] | None = None) -> Any:
+        assert self._loop is not None
+        await self.bucket.acquire()
+        return await self._loop.run_in_executor(self._executor, self._post, method, data, files)
+
+    async def _send_group(self, group: List[Dict[str, Any]]) -> None:
+        chat = self.chat
+        if group[0]["kind"] == "message":
+            item = group[0]
+            data = {"chat_id": chat, "text": item["text"]}
+            if item.get("buttons"):
+                data["reply_markup"] = json.dumps(item["buttons"])
+            await self._call("sendMessage", data)
+            return
+        photos = [it for it in group if Path(it["photo"]).exists()]
+        if len(photos) == 1 and len(group) == 1:
+            it = photos[0]
+            await self._call(
+                "sendPhoto",
+                {
+                    "chat_id": chat,
+                    "caption": it["caption"],
+                    "reply_markup": json.dumps({"inline_keyboard": [it["buttons"]]}),
+                },
+                {"photo": Path(it["photo"])},
+            )
+            return
+        if len(photos) > 1:
+            media = [
+                {"type": "photo", "media": f"attach://p{i}", "caption": f"{i + 1}. {it['caption']}"[:1024]}
+                for i, it in enumerate(photos)
+            ]
+            files = {f"p{i}": Path(it["photo"]) for i, it in enumerate(photos)}
+            if not all(it.get("album_sent") for it in photos):
+                await self._call("sendMediaGroup", {"chat_id": chat, "media": json.dumps(media)}, files)
+                # Only the buttons are left if the follow-up message has to be retried.
+                for it in photos:
+                    it["album_sent"] = True
+                self.outbox.mark([it["id"] for it in photos], album_sent=True)
+        else:
+            photos = []
+        # Buttons for the album (and text fallback for previews without a cover).
+        keyboard = []
+        lines = []
+        numbered = photos + [it for it in group if it not in photos]
+        for i, it in enumerate(numbered, 1):
+            keyboard.append([{**b, "text": f"{b['text']} {i}"} for b in it["buttons"]])
+            if it not in photos:
+                lines.append(f"{i}. {it['caption']}")
+        text = "\n\n".join(lines) or f"{len(numbered)} new previews"
+        await self._call(
+            "sendMessage",
+            {"chat_id": chat, "text": text[:4096], "reply_markup": json.dumps({"inline_keyboard": keyboard})},
+        )
+
+    def _groups(self, items: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Split pending items into sends: runs of previews become albums."""
+        groups: List[List[Dict[str, Any]]] = []
+        for it in items:
+            last = groups[-1] if groups else None
+            if (
+                last
+                and it["kind"] == "preview"
+                and last[0]["kind"] == "preview"
+                and bool(last[0].get("album_sent")) == bool(it.get("album_sent"))
+                and len(last) < ALBUM_SIZE
+            ):
+                last.append(it)
+            else:
+                groups.append([it])
+        return groups
+
+    async def _drain(self) -> bool:
+        """Send pending items; returns False after a transient failure."""
+        items = [it for it in self.outbox.pending() if it["id"] not in self._inflight]
+        for group in self._groups(items):
+            ids = [it["id"] for it in group]
+            self._inflight.update(ids)
+            try:
+                await self._send_group(group)
+                self.outbox.done(ids)
+            except RetryAfter as e:
+                self.bucket.pause(e.seconds)
+                print(f"telegram rate limited, retrying in {e.seconds}s")
+                return True
+            except PermanentError as e:
+                print("telegram rejected", group[0]["kind"], e)
+                self.outbox.done(ids)
+            except Exception as e:
+                print("telegram send failed", e)
+                self.outbox.failed(ids, str(e))
+                self.bucket.pause(min(2 ** group[0].get("attempts", 0), 60))
+                return False
+            finally:
+                self._inflight.difference_update(ids)
+        return True
+
+    async def _run(self) -> None:
+        assert self._wake is not None
+        while True:
+            if self._stopping:
+                if not self.outbox.pending() or time.monotonic() > self._deadline:
+                    return
+            else:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self.linger)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+                # Give previews queued in the same burst a chance to join the album.
+                await asyncio.sleep(self.linger)
+            if not await self._drain() and self._stopping:
+                # Leave the rest in the outbox for the next run.
+                return
+
+    def _start(self) -> None:
+        if self._thread is not None:
+            return
+        self._loop = asyncio.new_event_loop()
+        self._wake = asyncio.Event()
+        loop = self._loop
+        task = self._task = loop.create_task(self._run())
+
+        def run() -> None:
+            try:
+                loop.run_until_complete(task)
+            except asyncio.CancelledError:
+                pass
+
+        self._thread = threading.Thread(target=run, name="telegram-notifier", daemon=True)
+        self._thread.start()
+
+    def close(self, timeout: float = FLUSH_TIMEOUT) -> None:
+        """Send what can be sent within ``timeout``; the rest stays in the outbox."""
+        if self.enabled and self.outbox.pending():
+            self._start()
+        if self._thread is not None and self._loop is not None:
+            self._deadline = time.monotonic() + timeout
+            self._stopping = True
+            if self._wake is not None:
+                self._loop.call_soon_threadsafe(self._wake.set)
+            self._thread.join(timeout)
+            if self._thread.is_alive() and self._task is not None:
+                # Still sleeping through a retry_after (or mid-send): stop it so
+                # the executor and session are not closed under a live loop.
+                self._loop.call_soon_threadsafe(self._task.cancel)
+                self._thread.join()
+            self._thread = None
+        self._executor.shutdown(wait=True)
+        if self._loop is not None:
+            self._loop.close()
+            self._loop = None
+        self.session.close()
+        self.outbox.save()
+
+
+def notify(text: str, timeout: float = FLUSH_TIMEOUT) -> None:
+    """Send one message (plus any outbox backlog) and wait up to ``timeout``."""
+    notifier = TelegramNotifier()
+    notifier.message(text)
+    notifier.close(timeout)
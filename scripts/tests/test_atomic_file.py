@@ -0,0 +1,23 @@
+import threading
+
+from atomic_file import atomic_write
+
+
+def test_creates_parents_and_leaves_no_temp_files(tmp_path):
+    path = tmp_path / "a" / "b.json"
+    atomic_write(path, "[]")
+    atomic_write(path, '{"x": "é"}')
+    assert path.read_text(encoding="utf-8") == '{"x": "é"}'
+    assert [p.name for p in path.parent.iterdir()] == ["b.json"]
+
+
+def test_concurrent_writers_do_not_share_a_temp_file(tmp_path):
+    path = tmp_path / "state.json"
+    texts = [str(i) * 1000 for i in range(8)]
+    threads = [threading.Thread(target=atomic_write, args=(path, t)) for t in texts]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert path.read_text() in texts
+    assert [p.name for p in tmp_path.iterdir()] == ["state.json"]
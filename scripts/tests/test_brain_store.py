@@ -0,0 +1,55 @@
+import datetime as dt
+import json
+
+from brain_store import LearningLog, Memory, week_end, week_key
+
+
+def test_week_keys_follow_iso_weeks():
+    assert week_key(dt.date(2024, 12, 30)) == "2025-W01"
+    assert week_end("2025-W01") == dt.date(2025, 1, 5)
+
+
+def test_entries_land_in_week_partitions(tmp_path):
+    log = LearningLog(tmp_path)
+    log.append({"event": "a"}, now=dt.datetime(2024, 5, 1, 9))
+    log.append({"event": "b"}, now=dt.datetime(2024, 5, 9, 9))
+    assert log.partitions() == ["2024-W18", "2024-W19"]
+    assert [e["event"] for e in log.entries()] == ["a", "b"]
+    assert [e["event"] for e in log.entries(since=dt.date(2024, 5, 6))] == ["b"]
+
+
+def test_inbox_is_moved_into_partitions(tmp_path):
+    log = LearningLog(tmp_path)
+    log.inbox.write_text(json.dumps([{"ts": "2024-05-01T09:00:00Z", "event": "old"}]))
+    assert log.ingest_inbox() == 1
+    assert json.loads(log.inbox.read_text()) == []
+    assert log.ingest_inbox() == 0
+    assert [e["event"] for e in log.entries()] == ["old"]
+
+
+def test_prune_drops_whole_expired_weeks(tmp_path):
+    log = LearningLog(tmp_path)
+    log.append({"event": "a"}, now=dt.datetime(2024, 4, 1))
+    log.append({"event": "b"}, now=dt.datetime(2024, 5, 1))
+    assert log.prune(days=14, today=dt.date(2024, 5, 10)) == ["2024-W14"]
+    assert log.partitions() == ["2024-W18"]
+
+
+def test_capped_sections_roll_up_the_oldest(tmp_path):
+    memory = Memory(tmp_path)
+    for i in range(5):
+        memory.push("notes", {"ts": f"2024-05-0{i + 1}", "n": i}, cap=3)
+    assert [it["n"] for it in memory.get("notes")] == [2, 3, 4]
+    assert memory.get("rollups")["notes"] == {
+        "count": 2, "first_ts": "2024-05-01", "last_ts": "2024-05-02"
+    }
+    memory.save()
+    assert Memory(tmp_path).get("notes") == memory.get("notes")
+
+
+def test_compact_caps_sections_grown_before_the_cap(tmp_path):
+    (tmp_path / "memory.json").write_text(json.dumps({"memoir_worthy": [{"n": i} for i in range(60)]}))
+    memory = Memory(tmp_path)
+    memory.compact()
+    assert len(memory.get("memoir_worthy")) == 52
+    assert memory.get("rollups")["memoir_worthy"]["count"] == 8
@@ -0,0 +1,65 @@
+import json
+
+import clip_log
+from clip_log import ClipLog
+
+
+def make_log(tmp_path):
+    return ClipLog(root=tmp_path / "log", export_path=tmp_path / "mags-log.json")
+
+
+def test_updates_merge_per_slug(tmp_path):
+    log = make_log(tmp_path)
+    log.append([{"clip": "Staging/a.mp4", "timestamp": "2024-05-01T10:00:00Z", "status": "cut"}])
+    log.append([{"slug": "b", "timestamp": "2024-05-02T10:00:00Z"}])
+    log.update("a", status="posted")
+    assert log.records() == [
+        {"clip": "Staging/a.mp4", "timestamp": "2024-05-01T10:00:00Z", "status": "posted", "slug": "a"},
+        {"slug": "b", "timestamp": "2024-05-02T10:00:00Z"},
+    ]
+    assert log.get("a")["status"] == "posted"
+    assert log.get("missing") is None
+
+
+def test_compaction_keeps_lookups_and_filters(tmp_path):
+    log = make_log(tmp_path)
+    log.append([{"slug": "a", "timestamp": "2024-05-01T10:00:00Z", "status": "queued"}])
+    log.append([{"slug": "b", "timestamp": "2024-05-02T10:00:00Z", "status": "queued"}])
+    log.compact()
+    assert log.segments() == []
+    log.update("b", status="posted")
+    assert log.get("b") == {"slug": "b", "timestamp": "2024-05-02T10:00:00Z", "status": "posted"}
+    assert log.slugs(status="queued") == ["a"]
+    assert log.slugs(date="2024-05-02") == ["b"]
+
+
+def test_other_instances_see_compaction(tmp_path):
+    writer, reader = make_log(tmp_path), make_log(tmp_path)
+    writer.append([{"slug": "a", "status": "queued"}])
+    writer.compact()
+    assert reader.get("a")["status"] == "queued"
+    writer.append([{"slug": "b", "status": "queued"}])
+    writer.compact()
+    assert reader.get("b")["status"] == "queued"
+
+
+def test_segments_roll_over_and_compact(tmp_path, monkeypatch):
+    monkeypatch.setattr(clip_log, "SEGMENT_MAX_BYTES", 1)
+    monkeypatch.setattr(clip_log, "COMPACT_SEGMENTS", 3)
+    log = make_log(tmp_path)
+    for i in range(4):
+        log.append([{"slug": f"c{i}"}])
+    assert log.segments() == []
+    assert [r["slug"] for r in log.records()] == ["c0", "c1", "c2", "c3"]
+
+
+def test_migrates_and_exports_mags_log(tmp_path):
+    export = tmp_path / "mags-log.json"
+    export.write_text(json.dumps({"updated": "old", "clips": [{"clip": "Staging/x.mp4"}]}))
+    log = make_log(tmp_path)
+    assert log.records() == [{"clip": "Staging/x.mp4", "slug": "x"}]
+    data = log.export()
+    assert data["updated"] != "old"
+    assert log.export() == data  # unchanged clips leave the file alone
+    log.update("x", status="posted")
+    assert log.export()["clips"][0]["status"] == "posted"
@@ -0,0 +1,70 @@
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import extract_clips as ec
+from clip_manifest import ClipManifest
+
+
+@pytest.fixture
+def staged(tmp_path, monkeypatch):
+    monkeypatch.setattr(ec, "STAGING_DIR", tmp_path / "staging")
+    monkeypatch.setattr(ec, "CUT_BATCH_SIZE", 2)
+    cuts = []
+
+    def fake_cut(src, ranges):
+        cuts.append([dest.name for _, _, dest in ranges])
+        for _, _, dest in ranges:
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            dest.write_bytes(b"clip")
+
+    monkeypatch.setattr(ec, "cut_clips", fake_cut)
+    monkeypatch.setattr(ec, "sanitize_clip", lambda path, duration, source: {"overlay": None})
+    manifest = ClipManifest(tmp_path / "manifest.json")
+    record = {
+        "scenes": [float(t) for t in range(0, 101, 5)],
+        "duration": 100.0,
+        "segments": [{"start": t, "end": t + 6, "text": f"line {t}"} for t in (0, 20, 40, 60, 80)],
+    }
+    return manifest, record, cuts
+
+
+def test_missing_cuts_run_in_batches(staged, tmp_path):
+    manifest, record, cuts = staged
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        jobs = ec.schedule_clips(tmp_path / "src.mp4", manifest, record, pool)
+        results = [fut.result() for _, _, fut in jobs]
+    assert [len(batch) for batch in cuts] == [2, 2, 1]
+    assert sorted(name for batch in cuts for name in batch) == sorted(p.name for _, p, _ in jobs)
+    assert results == [{"overlay": None}] * 5
+    assert all(manifest.clip(record, p.name)["cut"] for _, p, _ in jobs)
+
+
+def test_rescheduling_skips_finished_clips(staged, tmp_path):
+    manifest, record, cuts = staged
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        jobs = ec.schedule_clips(tmp_path / "src.mp4", manifest, record, pool)
+        for _, _, fut in jobs:
+            fut.result()
+        manifest.mark_clip(record, jobs[0][1].name, "enqueued")
+        cuts.clear()
+        again = ec.schedule_clips(tmp_path / "src.mp4", manifest, record, pool)
+        for _, _, fut in again:
+            fut.result()
+    assert cuts == []
+    assert [p for _, p, _ in again] == [p for _, p, _ in jobs[1:]]
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="needs ffmpeg")
+def test_cut_clips_writes_every_range_in_one_run(tmp_path):
+    src = tmp_path / "src.mp4"
+    subprocess.run(
+        ["ffmpeg", "-y", "-v", "error", "-f", "lavfi", "-i", "testsrc=size=160x120:rate=10",
+         "-t", "6", "-g", "10", str(src)],
+        check=True,
+    )
+    dests = [tmp_path / "a.mp4", tmp_path / "b.mp4"]
+    ec.cut_clips(src, [(0.0, 2.0, dests[0]), (3.0, 5.0, dests[1])])
+    assert all(dest.stat().st_size > 0 for dest in dests)
@@ -0,0 +1,85 @@
+from datetime import date
+
+import insight_rollups
+from clip_log import ClipLog
+from insight_rollups import DailyRollups, window
+from schedule_queue import ScheduleQueue
+
+TODAY = date(2024, 5, 10)
+
+
+def make(tmp_path):
+    log = ClipLog(root=tmp_path / "log", export_path=tmp_path / "mags-log.json")
+    queue = ScheduleQueue(db_path=tmp_path / "queue.sqlite", pack_path=tmp_path / "pack.json")
+    return log, queue, DailyRollups(tmp_path / "rollups.json")
+
+
+def test_window_is_inclusive():
+    assert window("week", TODAY) == (date(2024, 5, 4), TODAY)
+    assert window("month", TODAY)[0] == date(2024, 4, 11)
+
+
+def test_clip_updates_replace_their_old_counts(tmp_path):
+    log, _, rollups = make(tmp_path)
+    log.append(
+        [{"slug": "a", "timestamp": "2024-05-09T10:00:00Z", "keywords": ["dog"], "emotion": "funny"}]
+    )
+    assert rollups.ingest_clips(log) == 1
+    assert rollups.ingest_clips(log) == 0
+    log.update("a", keywords=["cat"])
+    rollups.ingest_clips(log)
+    totals = rollups.report(date(2024, 5, 9), TODAY)
+    assert totals["hooks"] == {"cat": 1}
+    assert totals["emotions"] == {"funny": 1}
+
+
+def test_compaction_triggers_a_rescan_without_double_counting(tmp_path):
+    log, _, rollups = make(tmp_path)
+    log.append([{"slug": "a", "timestamp": "2024-05-09T10:00:00Z", "keywords": ["dog"]}])
+    rollups.ingest_clips(log)
+    log.compact()
+    assert rollups.ingest_clips(log) == 1
+    assert rollups.report(TODAY.replace(day=1), TODAY)["hooks"] == {"dog": 1}
+
+
+def test_queue_rows_count_again_when_they_change(tmp_path):
+    _, queue, rollups = make(tmp_path)
+    queue.add([{"slug": "a", "scheduled_time": "2024-05-09T10:00:00Z", "suggested_sound": "beat"}])
+    rollups.ingest_queue(queue)
+    queue.add([{"slug": "a", "scheduled_time": "2024-05-10T10:00:00Z", "suggested_sound": "song"}])
+    assert rollups.ingest_queue(queue) == 1
+    assert rollups.report(date(2024, 5, 9), date(2024, 5, 9))["sounds"] == {}
+    assert rollups.report(TODAY, TODAY)["sounds"] == {"song": 1}
+    queue.close()
+
+
+def test_rebuilt_queue_is_skipped_only_when_the_pack_is_unchanged(tmp_path):
+    _, queue, rollups = make(tmp_path)
+    queue.add([{"slug": "a", "scheduled_time": "2024-05-09T10:00:00Z", "suggested_sound": "beat"}])
+    queue.export()
+    assert rollups.ingest_queue(queue) == 1
+    queue.close()
+    (tmp_path / "queue.sqlite").unlink()
+    fresh = ScheduleQueue(db_path=tmp_path / "queue.sqlite", pack_path=tmp_path / "pack.json")
+    assert rollups.ingest_queue(fresh) == 0
+    fresh.add([{"slug": "b", "scheduled_time": "2024-05-10T10:00:00Z", "suggested_sound": "song"}])
+    fresh.export()
+    fresh.close()
+    (tmp_path / "queue.sqlite").unlink()
+    again = ScheduleQueue(db_path=tmp_path / "queue.sqlite", pack_path=tmp_path / "pack.json")
+    assert rollups.ingest_queue(again) == 2
+    assert rollups.report(date(2024, 5, 9), TODAY)["sounds"] == {"beat": 1, "song": 1}
+    again.close()
+
+
+def test_prune_drops_days_outside_the_window(tmp_path, monkeypatch):
+    monkeypatch.setattr(insight_rollups, "ROLLUP_DAYS", 7)
+    log, _, rollups = make(tmp_path)
+    log.append([
+        {"slug": "old", "timestamp": "2024-04-01T10:00:00Z", "keywords": ["dog"]},
+        {"slug": "new", "timestamp": "2024-05-09T10:00:00Z", "keywords": ["cat"]},
+    ])
+    rollups.ingest_clips(log)
+    rollups.prune(TODAY)
+    assert list(rollups.data["days"]) == ["2024-05-09"]
+    assert list(rollups.data["contrib"]) == ["clip:new"]
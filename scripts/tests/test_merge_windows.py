@@ -0,0 +1,41 @@
+from pathlib import Path
+
+import extract_clips as ec
+
+
+def win(start, end, text="words"):
+    return {"start": start, "end": end, "text": text}
+
+
+def test_overlap_ratio_is_relative_to_the_shorter_window():
+    assert ec.overlap_ratio((0, 10), (8, 12)) == 0.5
+    assert ec.overlap_ratio((0, 10), (2, 4)) == 1.0
+    assert ec.overlap_ratio((0, 5), (5, 9)) == 0.0
+
+
+def test_overlapping_windows_merge_and_keep_text_once():
+    merged = ec.merge_windows([win(3, 10, "and then"), win(0, 6, "so and then")])
+    assert merged == [win(0, 10, "so and then")]
+    merged = ec.merge_windows([win(0, 6, "first"), win(3, 9, "second")])
+    assert merged == [win(0, 9, "first second")]
+
+
+def test_disjoint_and_slightly_overlapping_windows_stay_apart():
+    windows = [win(0, 6), win(5.5, 12), win(20, 25)]
+    assert ec.merge_windows(windows) == windows
+
+
+def test_too_long_union_keeps_the_better_window():
+    dense = win(4, 16, "haha that was so funny i cried laughing")
+    sparse = win(0, 10, "um")
+    assert ec.merge_windows([sparse, dense]) == [dense]
+
+
+def test_plan_clips_merges_duplicates_before_cutting():
+    segments = [
+        {"start": 1.0, "end": 7.0, "text": "hello there"},
+        {"start": 1.2, "end": 7.1, "text": "hello there"},
+        {"start": 30.0, "end": 36.0, "text": "later on"},
+    ]
+    plan = ec.plan_clips(Path("v.mp4"), [0.0, 8.0, 29.0, 37.0], 60.0, segments, limit=0)
+    assert [(start, end) for _, start, end, _ in plan] == [(0.0, 8.0), (29.0, 37.0)]
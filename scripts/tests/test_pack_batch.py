@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+import extract_clips as ec
+
+
+@pytest.fixture
+def pack(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / ".schedule-pack.json"
+    monkeypatch.setattr(ec, "PACK_PATH", path)
+    return path
+
+
+def entry(slug):
+    return {"slug": slug, "clip": f"Staging/{slug}.mp4", "status": "queued"}
+
+
+def slugs(path):
+    return [e["slug"] for e in json.loads(path.read_text())["queue"]]
+
+
+def test_entries_are_held_until_the_checkpoint(pack):
+    batch = ec.PackBatch(checkpoint=2)
+    batch.add(entry("a"))
+    assert not pack.exists()
+    batch.add(entry("b"))
+    assert slugs(pack) == ["a", "b"]
+    batch.add(entry("c"))
+    assert slugs(pack) == ["a", "b"]
+    batch.flush()
+    assert slugs(pack) == ["a", "b", "c"]
+
+
+def test_callbacks_run_after_their_entries_are_queued(pack):
+    seen = []
+    with ec.PackBatch(checkpoint=0) as batch:
+        batch.add(entry("a"), lambda: seen.append(slugs(pack)))
+        batch.on_flush(lambda: seen.append("video"))
+        assert seen == []
+    assert seen == [["a"], "video"]
+
+
+def test_on_flush_without_pending_entries_runs_at_once(pack):
+    seen = []
+    batch = ec.PackBatch(checkpoint=0)
+    batch.on_flush(lambda: seen.append(1))
+    assert seen == [1]
+    assert not pack.exists()
+
+
+def test_trend_index_is_built_once_per_trend_list(monkeypatch):
+    items = [
+        {"desc": "Cooking pasta #food", "music": {"title": "Chill beat"}},
+        {"desc": "dog tricks", "music": {"title": "Funny dog song"}},
+    ]
+    monkeypatch.setattr(ec._trend_store, "items", lambda: items)
+    assert ec.fetch_trend(["dog"])["sound"] == "Funny dog song"
+    index = ec._trend_index
+    assert ec.fetch_trend(["pasta"])["sound"] == "Chill beat"
+    assert ec._trend_index is index
@@ -0,0 +1,80 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import extract_clips as ec
+from clip_log import ClipLog
+from clip_manifest import ClipManifest
+
+CLIPS_PER_VIDEO = 10
+
+
+class InlinePool(ThreadPoolExecutor):
+    """Stands in for the spawn process pool: spawned children miss monkeypatches."""
+
+    def __init__(self, max_workers=None, mp_context=None):
+        super().__init__(max_workers=max_workers)
+
+
+def fake_analysis(video, sha256=None):
+    # Later videos finish first, so completion order is the reverse of stream order.
+    time.sleep(0.05 * (4 - int(video.stem[-1])))
+    probe = {
+        "scenes": [{"time": float(t), "score": 0.5} for t in range(0, 201, 5)],
+        "duration": 200.0,
+        "highlights": [],
+    }
+    segments = [
+        {"start": t + 1.0, "end": t + 7.0, "text": f"{video.stem} line {t} about dogs"}
+        for t in range(0, 20 * CLIPS_PER_VIDEO, 20)
+    ]
+    return probe, segments, []
+
+
+@pytest.fixture
+def run(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(ec, "PACK_PATH", tmp_path / "pack.json")
+    monkeypatch.setattr(ec, "STAGING_DIR", tmp_path / "staging")
+    monkeypatch.setattr(ec, "ProcessPoolExecutor", InlinePool)
+    monkeypatch.setattr(ec, "analyze_source", fake_analysis)
+    cover = tmp_path / "cover.jpg"
+    cover.write_bytes(b"jpg")
+
+    def fake_cut(src, ranges):
+        for _, _, dest in ranges:
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            dest.write_bytes(b"clip")
+
+    monkeypatch.setattr(ec, "cut_clips", fake_cut)
+    monkeypatch.setattr(ec, "sanitize_clip", lambda path, d, s: {"cover_frame": str(cover)})
+    monkeypatch.setattr(ec, "fetch_trend", lambda keywords=None: {})
+    monkeypatch.setattr(ec, "send_preview", lambda entry, clip_path: None)
+    videos = []
+    for i in range(4):
+        video = tmp_path / f"raw{i}.mp4"
+        video.write_bytes(f"video {i}".encode())
+        videos.append(video)
+    log = ClipLog(root=tmp_path / "log", export_path=tmp_path / "mags-log.json")
+    return videos, log, ClipManifest(tmp_path / "manifest.json")
+
+
+def test_commits_span_several_pack_checkpoints(run, tmp_path):
+    videos, log, manifest = run
+    with ec.PackBatch(checkpoint=25) as batch:
+        count = ec.process_videos(videos, log, manifest, cpu_workers=4, io_workers=4, batch=batch)
+    assert count == 4 * CLIPS_PER_VIDEO
+    pack = json.loads((tmp_path / "pack.json").read_text())
+    assert len(pack["queue"]) == 4 * CLIPS_PER_VIDEO
+    assert all(manifest.done(manifest.entry(v), "enqueued") for v in videos)
+
+
+def test_commit_order_follows_the_stream_not_completion(run, tmp_path):
+    videos, log, manifest = run
+    with ec.PackBatch(checkpoint=25) as batch:
+        ec.process_videos(videos, log, manifest, cpu_workers=4, io_workers=4, batch=batch)
+    slugs = [e["slug"] for e in json.loads((tmp_path / "pack.json").read_text())["queue"]]
+    assert slugs == sorted(slugs)
+    assert [r["slug"] for r in log.records()] == slugs
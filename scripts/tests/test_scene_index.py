@@ -0,0 +1,42 @@
+import extract_clips as ec
+
+
+def test_before_and_after_bracket_a_time():
+    index = ec.SceneIndex([12.0, 3.0, 7.5])
+    assert index.times == [3.0, 7.5, 12.0]
+    assert index.before(8.0, 0.0) == 7.5
+    assert index.after(8.0, 99.0) == 12.0
+
+
+def test_exact_cuts_count_on_both_sides():
+    index = ec.SceneIndex([3.0, 7.5])
+    assert index.before(7.5, 0.0) == 7.5
+    assert index.after(3.0, 99.0) == 3.0
+
+
+def test_defaults_outside_the_cuts():
+    index = ec.SceneIndex([3.0, 7.5])
+    assert index.before(1.0, 0.0) == 0.0
+    assert index.after(9.0, 42.0) == 42.0
+    empty = ec.SceneIndex([])
+    assert len(empty) == 0
+    assert empty.before(5.0, 1.0) == 1.0
+
+
+def test_scores_follow_their_times_when_sorted():
+    index = ec.SceneIndex([9.0, 2.0], [0.9, 0.2])
+    assert index.scores == [0.2, 0.9]
+    assert ec.SceneIndex([1.0, 2.0], [0.5]).scores == [0.0, 0.0]
+
+
+def test_between_is_an_inclusive_range_query():
+    index = ec.SceneIndex([12.0, 3.0, 7.5, 9.0], [0.4, 0.1, 0.2, 0.3])
+    assert index.between(7.5, 12.0) == [(7.5, 0.2), (9.0, 0.3), (12.0, 0.4)]
+    assert index.between(4.0, 7.0) == []
+    assert index.between(0.0, 3.0) == [(3.0, 0.1)]
+
+
+def test_pick_boundary_matches_the_index():
+    cuts = [3.0, 7.5, 12.0]
+    assert ec.pick_boundary(cuts, 8.0, 0.0, reverse=True) == 7.5
+    assert ec.pick_boundary(ec.SceneIndex(cuts), 8.0, 99.0) == 12.0
@@ -0,0 +1,104 @@
+import json
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+from schedule_queue import ScheduleQueue, parse_time
+
+
+@pytest.fixture
+def queue(tmp_path):
+    q = ScheduleQueue(db_path=tmp_path / "queue.sqlite", pack_path=tmp_path / "pack.json")
+    yield q
+    q.close()
+
+
+def entry(slug, when="2024-05-01T10:00:00Z", autopost=True, **fields):
+    return {"slug": slug, "scheduled_time": when, "autopost": autopost, **fields}
+
+
+NOW = datetime(2024, 5, 2)
+
+
+def test_parse_time_normalises_to_naive_utc():
+    assert parse_time("2024-05-01T12:00:00+02:00") == datetime(2024, 5, 1, 10)
+    assert parse_time("2024-05-01T10:00:00Z") == datetime(2024, 5, 1, 10)
+    assert parse_time("soon") is None
+    assert parse_time(None) is None
+
+
+def test_claim_takes_the_earliest_due_autopost_entry(queue):
+    queue.add([
+        entry("late", "2024-05-01T12:00:00Z"),
+        entry("early", "2024-05-01T08:00:00Z"),
+        entry("manual", "2024-05-01T07:00:00Z", autopost=False),
+        entry("future", "2024-06-01T00:00:00Z"),
+    ])
+    assert queue.next_ready(NOW)["slug"] == "early"
+    assert queue.claim(NOW)["status"] == "posting"
+    assert queue.claim(NOW)["slug"] == "late"
+    assert queue.claim(NOW) is None
+
+
+def test_transitions_are_checked(queue):
+    queue.add([entry("a")])
+    with pytest.raises(ValueError):
+        queue.transition("a", "posted")
+    queue.transition("a", "posting")
+    assert queue.transition("a", "posted", url="https://x")["url"] == "https://x"
+    with pytest.raises(KeyError):
+        queue.transition("missing", "posting")
+
+
+def test_re_adding_keeps_the_status(queue):
+    queue.add([entry("a")])
+    queue.claim(NOW)
+    queue.add([entry("a", caption="new")])
+    (stored,) = queue.entries()
+    assert stored["status"] == "posting"
+    assert stored["caption"] == "new"
+    assert queue.claim(NOW) is None
+
+
+def test_export_and_sync_mirror_the_pack(tmp_path, queue):
+    queue.add([entry("a"), entry("b")])
+    queue.export()
+    pack = json.loads(queue.pack_path.read_text())
+    pack["queue"] = [dict(pack["queue"][1], status="failed")]
+    queue.pack_path.write_text(json.dumps(pack))
+    other = ScheduleQueue(db_path=tmp_path / "queue.sqlite", pack_path=queue.pack_path)
+    assert [(e["slug"], e["status"]) for e in other.entries()] == [("b", "failed")]
+    other.close()
+
+
+def test_rows_after_streams_inserted_and_changed_rows(queue):
+    queue.add([entry("a"), entry("b")])
+    seen = list(queue.rows_after(0))
+    assert [e["slug"] for _, e in seen] == ["a", "b"]
+    last = seen[-1][0]
+    queue.add([entry("b")])
+    assert list(queue.rows_after(last)) == []
+    queue.transition("a", "posting")
+    assert [(e["slug"], e["status"]) for _, e in queue.rows_after(last)] == [("a", "posting")]
+
+
+def test_old_databases_gain_updated_seq(tmp_path):
+    db = tmp_path / "old.sqlite"
+    conn = sqlite3.connect(db)
+    conn.executescript(
+        """
+        CREATE TABLE queue (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT, slug TEXT NOT NULL UNIQUE,
+            status TEXT NOT NULL, autopost INTEGER NOT NULL DEFAULT 0,
+            scheduled_time TEXT, data TEXT NOT NULL
+        );
+        INSERT INTO queue (slug, status, data) VALUES ('old', 'queued', '{"slug": "old"}');
+        """
+    )
+    conn.close()
+    q = ScheduleQueue(db_path=db, pack_path=tmp_path / "pack.json")
+    assert [seq for seq, _ in q.rows_after(0)] == [1]
+    q.add([entry("new")])
+    assert [e["slug"] for _, e in q.rows_after(1)] == ["new"]
+    q.close()
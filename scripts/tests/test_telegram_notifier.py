@@ -0,0 +1,54 @@
+import asyncio
+import time
+
+import telegram_notifier
+from telegram_notifier import Outbox, RetryAfter, TelegramNotifier, TokenBucket
+
+
+def acquire_times(bucket, n):
+    async def run():
+        start = time.monotonic()
+        stamps = []
+        for _ in range(n):
+            await bucket.acquire()
+            stamps.append(time.monotonic() - start)
+        return stamps
+
+    return asyncio.run(run())
+
+
+def test_bucket_allows_a_burst_then_paces():
+    stamps = acquire_times(TokenBucket(rate=20, capacity=3), 5)
+    assert stamps[2] < 0.02
+    assert stamps[4] >= 0.08
+
+
+def test_pause_empties_the_bucket():
+    bucket = TokenBucket(rate=1000, capacity=5)
+    bucket.pause(0.1)
+    assert acquire_times(bucket, 1)[0] >= 0.09
+
+
+def test_outbox_drops_items_after_max_attempts(tmp_path, monkeypatch):
+    monkeypatch.setattr(telegram_notifier, "MAX_ATTEMPTS", 2)
+    outbox = Outbox(tmp_path / "outbox.json")
+    outbox.add({"id": "a", "kind": "message"})
+    outbox.failed(["a"], "boom")
+    assert Outbox(outbox.path).pending()[0]["attempts"] == 1
+    outbox.failed(["a"], "boom")
+    assert Outbox(outbox.path).pending() == []
+
+
+def test_close_stops_a_loop_waiting_out_retry_after(tmp_path):
+    notifier = TelegramNotifier("token", "chat", outbox=Outbox(tmp_path / "outbox.json"), linger=0.01)
+
+    def rate_limited(*args, **kwargs):
+        raise RetryAfter(300)
+
+    notifier._post = rate_limited
+    notifier.message("hello")
+    start = time.monotonic()
+    notifier.close(timeout=0.5)
+    assert time.monotonic() - start < 5
+    assert notifier._thread is None
+    assert [it["text"] for it in Outbox(tmp_path / "outbox.json").pending()] == ["hello"]
@@ -0,0 +1,40 @@
+import text_scoring
+from text_scoring import TextScorer, emotion_scores, tokenize, top_emotion
+
+
+def test_tokenize_drops_apostrophes_and_punctuation():
+    assert tokenize("Don't STOP, it's 2am!") == ["dont", "stop", "its", "2am"]
+
+
+def test_common_words_rank_below_distinctive_ones():
+    corpus = ["the dog ran home", "the cat ran home", "the kayak flipped and we ran"]
+    scorer = TextScorer(corpus)
+    assert scorer.keywords("we ran home and the kayak flipped")[:2] == ["kayak", "flipped"]
+
+
+def test_base_scorer_counts_as_part_of_the_corpus():
+    base = TextScorer(["the dog ran home", "the cat ran home"])
+    scorer = TextScorer(["the kayak flipped and we ran"], base=base)
+    whole = TextScorer(["the dog ran home", "the cat ran home", "the kayak flipped and we ran"])
+    assert (scorer.docs, scorer.idf) == (whole.docs, whole.idf)
+    assert base.docs == 2 and "kayak" not in base.df
+
+
+def test_keywords_skip_stopwords_and_keep_first_seen_order_on_ties():
+    scorer = TextScorer()
+    assert scorer.keywords("um so like pasta sauce pasta") == ["pasta", "sauce"]
+    assert scorer.keywords("yeah okay") == []
+    assert len(scorer.keywords(" ".join(f"word{i}" for i in range(20)))) == text_scoring.TOP_KEYWORDS
+
+
+def test_emotions_are_scored_per_word_with_lexicon_ties():
+    assert emotion_scores("haha that joke") == {"funny": 2 / 3}
+    assert top_emotion({"funny": 0.5, "emotional": 0.5}) == "funny"
+    assert top_emotion({}) == text_scoring.DEFAULT_EMOTION
+
+
+def test_score_returns_keywords_and_emotion_per_text():
+    scored = TextScorer(["i love this"]).score(["i love this heart", ""])
+    assert scored[0].emotion == "emotional"
+    assert scored[0].keywords[0] == "heart"
+    assert scored[1].keywords == [] and scored[1].emotion == text_scoring.DEFAULT_EMOTION
@@ -0,0 +1,77 @@
+import os
+
+from transcript_cache import TranscriptCache, merge_ranges, merge_segments, uncovered
+
+SEGMENTS = [{"start": 0.0, "end": 2.5, "text": "hello there"}]
+
+
+def test_round_trip_per_model(tmp_path):
+    cache = TranscriptCache(tmp_path)
+    assert cache.get("abc", "small") is None
+    cache.put("abc", "small", SEGMENTS)
+    assert cache.get("abc", "small") == SEGMENTS
+    assert cache.get("abc", "medium") is None
+    assert cache.get("def", "small") is None
+
+
+def test_model_names_are_safe_file_names(tmp_path):
+    cache = TranscriptCache(tmp_path)
+    path = cache.put("abc", "large/v3 turbo", SEGMENTS)
+    assert path.parent == tmp_path
+    assert cache.get("abc", "large/v3 turbo") == SEGMENTS
+
+
+def test_prune_evicts_least_recently_used(tmp_path):
+    cache = TranscriptCache(tmp_path, max_bytes=10**9)
+    for i, sha in enumerate(["a", "b", "c"]):
+        path = cache.put(sha, "small", SEGMENTS)
+        os.utime(path, (1000 + i, 1000 + i))
+    cache.get("a", "small")  # a becomes the most recently used
+    size = cache.path_for("a", "small").stat().st_size
+    removed = cache.prune(max_bytes=2 * size)
+    assert [p.name for p in removed] == ["b-small.json"]
+    assert cache.get("a", "small") == SEGMENTS
+    assert cache.get("c", "small") == SEGMENTS
+
+
+def test_prune_older_than(tmp_path):
+    cache = TranscriptCache(tmp_path)
+    old = cache.put("old", "small", SEGMENTS)
+    os.utime(old, (0, 0))
+    cache.put("new", "small", SEGMENTS)
+    assert cache.prune(older_than=1) == [old]
+    assert [p.name for p in cache.entries()] == ["new-small.json"]
+
+
+def test_windows_reuse_whatever_was_covered(tmp_path):
+    cache = TranscriptCache(tmp_path)
+    assert cache.lookup("abc", "small", [[0, 10]]) == ([], [[0, 10]])
+    first = [{"start": 1.0, "end": 3.0, "text": "a"}, {"start": 21.0, "end": 24.0, "text": "b"}]
+    cache.add("abc", "small", first, [[0, 10], [20, 30]])
+    assert cache.get("abc", "small") is None  # partial entries are not a whole transcript
+    hits, missing = cache.lookup("abc", "small", [[5, 15], [22, 28]])
+    assert hits == [first[1]]
+    assert missing == [[10.0, 15.0]]
+    cache.add("abc", "small", [{"start": 11.0, "end": 12.0, "text": "c"}], missing)
+    hits, missing = cache.lookup("abc", "small", [[0, 15]])
+    assert [s["text"] for s in hits] == ["a", "c"]
+    assert missing == []
+
+
+def test_whole_transcript_covers_any_window(tmp_path):
+    cache = TranscriptCache(tmp_path)
+    cache.put("abc", "small", SEGMENTS)
+    assert cache.lookup("abc", "small", [[2, 40]]) == (SEGMENTS, [])
+    cache.add("abc", "small", [{"start": 9.0, "end": 9.5, "text": "x"}], [[9, 10]])
+    assert cache.get("abc", "small") == SEGMENTS
+
+
+def test_range_helpers():
+    assert merge_ranges([[5, 8], [0, 2], [1, 3], [8, 9]]) == [[0.0, 3.0], [5.0, 9.0]]
+    assert uncovered([0, 10], [[2, 4], [6, 7]]) == [[0.0, 2], [4, 6], [7, 10.0]]
+    assert uncovered([0, 10], [[0, 9.99]]) == []
+    seg = {"start": 1.0, "end": 2.0, "text": "a"}
+    assert merge_segments([seg], [dict(seg)], [{"start": 0.5, "end": 1.0, "text": "b"}]) == [
+        {"start": 0.5, "end": 1.0, "text": "b"},
+        seg,
+    ]
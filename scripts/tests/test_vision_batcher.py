@@ -0,0 +1,102 @@
+import base64
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import vision_batcher
+from vision_batcher import VisionBatcher
+
+
+class FakeVision(BaseHTTPRequestHandler):
+    """``images:annotate`` stand-in: an image's bytes decide its ratings."""
+
+    calls: list = []
+
+    def do_POST(self) -> None:
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        images = [base64.b64decode(r["image"]["content"]) for r in body["requests"]]
+        type(self).calls.append(len(images))
+        responses = []
+        for img in images:
+            if img == b"broken":
+                responses.append({"error": {"code": 3, "message": "bad image"}})
+                continue
+            responses.append(
+                {
+                    "safeSearchAnnotation": {
+                        "adult": "VERY_UNLIKELY",
+                        "violence": "LIKELY" if img.startswith(b"fight") else "UNLIKELY",
+                        "racy": "POSSIBLE",
+                    },
+                    "labelAnnotations": [{"description": "Dog"}],
+                }
+            )
+        data = json.dumps({"responses": responses}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def server():
+    FakeVision.calls = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), FakeVision)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+
+
+def make_batcher(server, tmp_path, **kw):
+    kw.setdefault("batch_size", 4)
+    kw.setdefault("linger", 0.01)
+    return VisionBatcher(vision_batcher.rest_backend(server), cache_dir=tmp_path, **kw)
+
+
+def test_batches_requests_and_parses_ratings(server, tmp_path):
+    batcher = make_batcher(server, tmp_path)
+    results = batcher.annotate([b"fight-%d" % i for i in range(6)] + [b"calm"])
+    batcher.close()
+    assert sorted(FakeVision.calls) == [3, 4]
+    assert results[0] == {"adult": 1, "violence": 4, "racy": 3, "labels": ["dog"]}
+    assert results[-1]["violence"] == 2
+
+
+def test_cache_and_duplicates_skip_the_server(server, tmp_path):
+    batcher = make_batcher(server, tmp_path)
+    batcher.annotate([b"a", b"a", b"b"])
+    assert FakeVision.calls == [2]
+    assert batcher.annotate([b"b", b"a"])[1]["labels"] == ["dog"]
+    assert FakeVision.calls == [2]
+    batcher.close()
+
+
+def test_errors_fail_the_whole_batch(server, tmp_path):
+    batcher = make_batcher(server, tmp_path)
+    futures = [batcher.submit(img) for img in (b"ok", b"broken")]
+    batcher.flush()
+    for fut in futures:
+        with pytest.raises(RuntimeError, match="vision error"):
+            fut.result(timeout=5)
+    batcher.close()
+    assert not list(tmp_path.glob("*.json"))
+
+
+def test_close_evicts_least_recently_used(server, tmp_path):
+    batcher = make_batcher(server, tmp_path, cache_max_bytes=0)
+    batcher.annotate([b"a", b"b", b"c"])
+    entries = sorted(tmp_path.glob("*.json"))
+    size = entries[0].stat().st_size
+    for i, p in enumerate(entries):
+        os.utime(p, (1000 + i, 1000 + i))
+    batcher.cache_max_bytes = size * 2
+    batcher.close()
+    assert sorted(tmp_path.glob("*.json")) == entries[1:]
@@ -0,0 +1,105 @@
+"""Keyword and emotion scoring for transcript text.
+
+``TextScorer`` is fitted on a corpus of transcript segments and then scores
+any number of texts in one call. ``extract_clips`` fits it on every
+transcript in the clip manifest when the run starts (each segment is one
+document) plus the video being scored; a fitted scorer can serve as the
+``base`` of another, so that run-wide table is built only once. Keywords are
+ranked by TF-IDF against that corpus, so words that appear in every clip ("like", "just", "gonna") drop
+below the ones that make a clip distinctive, and the hashtags built from them
+say something about the clip. Emotions are counted with one precompiled
+alternation over all lexicons instead of a substring scan per word.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List
+
+TOP_KEYWORDS = 5
+DEFAULT_EMOTION = "inspiring"
+
+# Lexicon order breaks ties between equal scores.
+EMOTIONS: Dict[str, List[str]] = {
+    "funny": ["laugh", "funny", "joke", "haha"],
+    "emotional": ["cry", "love", "heart", "feel", "sad"],
+}
+
+STOPWORDS = frozenset(
+    """
+    a about after again all also am an and any are as at be because been but by
+    can could did do does doing dont down for from get got gonna had has have he
+    her here him his how i if im in into is it its just know like me more my no
+    not now of off oh ok okay on one only or our out over really right say see so
+    some that thats the their them then there they thing think this to too um uh
+    up us very want was we well were what when where which who why will with would
+    yeah yes you your youre
+    """.split()
+)
+
+_WORD = re.compile(r"[0-9a-z]+")
+_APOSTROPHE = re.compile(r"['’]")
+_LEXICON = {word: emotion for emotion, words in EMOTIONS.items() for word in words}
+_EMOTION_RE = re.compile("|".join(sorted(map(re.escape, _LEXICON), key=len, reverse=True)))
+
+
+def tokenize(text: str) -> List[str]:
+    return _WORD.findall(_APOSTROPHE.sub("", text.lower()))
+
+
+def emotion_scores(text: str) -> Dict[str, float]:
+    """Lexicon hits per emotion, normalised by the text's word count."""
+    counts = Counter(_LEXICON[m.group(0)] for m in _EMOTION_RE.finditer(text.lower()))
+    words = max(len(text.split()), 1)
+    return {emotion: counts[emotion] / words for emotion in EMOTIONS if counts[emotion]}
+
+
+def top_emotion(scores: Dict[str, float]) -> str:
+    if not scores:
+        return DEFAULT_EMOTION
+    order = list(EMOTIONS)
+    return max(scores, key=lambda e: (scores[e], -order.index(e)))
+
+
+@dataclass
+class Scored:
+    keywords: List[str]
+    emotion: str
+    emotions: Dict[str, float] = field(default_factory=dict)
+
+
+class TextScorer:
+    """TF-IDF keyword ranking fitted on a corpus of transcript segments."""
+
+    def __init__(self, corpus: Iterable[str] = (), base: TextScorer | None = None) -> None:
+        df: Counter[str] = Counter(base.df) if base is not None else Counter()
+        docs = base.docs if base is not None else 0
+        for text in corpus:
+            df.update(set(tokenize(text)))
+            docs += 1
+        self.df = df
+        self.docs = docs
+        self.idf = {w: math.log((1 + docs) / (1 + n)) + 1.0 for w, n in df.items()}
+        self._unseen = math.log(1 + docs) + 1.0
+
+    def keywords(self, text: str, top: int = TOP_KEYWORDS) -> List[str]:
+        words = [w for w in tokenize(text) if w not in STOPWORDS and len(w) > 1]
+        if not words:
+            return []
+        tf = Counter(words)
+        first = {}
+        for i, w in enumerate(words):
+            first.setdefault(w, i)
+        ranked = sorted(tf, key=lambda w: (-tf[w] * self.idf.get(w, self._unseen), first[w]))
+        return ranked[:top]
+
+    def score(self, texts: Iterable[str], top: int = TOP_KEYWORDS) -> List[Scored]:
+        """Score every text in one pass: ranked keywords plus emotion scores."""
+        out = []
+        for text in texts:
+            emotions = emotion_scores(text)
+            out.append(Scored(self.keywords(text, top), top_emotion(emotions), emotions))
+        return out
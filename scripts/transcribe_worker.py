@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""Long-lived Whisper transcription worker.
+
+Loading a Whisper model takes seconds and gigabytes of RAM, so this worker
+keeps models resident and answers transcription requests over a local Unix
+socket (or stdin/stdout with ``--stdio``). Each request is one JSON line::
+
+    {"path": "Raw Clips/foo.mp4", "model": "small", "windows": [[12.0, 27.0]],
+     "audio": ".cache/audio/<sha256>.f32"}
+
+``windows`` is optional and limits transcription to those time ranges.
+``audio`` is optional and points at the source's decoded PCM from
+``audio_cache.py``. It is memory-mapped instead of decoding the video again,
+and leading and trailing silence is trimmed unless ``VAD_TRIM=0``.
+
+Each response is one JSON line with either ``segments`` or ``error``.
+``extract_clips.py`` uses the socket when ``WHISPER_WORKER_SOCKET`` is set and
+falls back to loading the model in-process otherwise.
+"""
+
+from __future__ import annotations
+
+import argparse
+import inspect
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Dict, List
+
+import audio_cache
+
+DEFAULT_MODEL = os.getenv("WHISPER_MODEL", "small")
+VAD_TRIM = os.getenv("VAD_TRIM", "1") != "0"
+
+_models: Dict[str, Any] = {}
+_models_lock = threading.Lock()
+# Whisper models are not safe to use from several threads at once, and the
+# socket server handles each connection in its own thread.
+_transcribe_lock = threading.Lock()
+
+
+def get_model(name: str = DEFAULT_MODEL) -> Any:
+    """Return the Whisper model ``name``, loading it on first use."""
+    with _models_lock:
+        if name not in _models:
+            import whisper  # type: ignore
+
+            _models[name] = whisper.load_model(name)
+        return _models[name]
+
+
+def supports_clip_timestamps(model: Any) -> bool:
+    """Whether this Whisper release's ``transcribe`` accepts ``clip_timestamps``."""
+    try:
+        return "clip_timestamps" in inspect.signature(model.transcribe).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+def transcribe_file(
+    path: Path,
+    model: str = DEFAULT_MODEL,
+    windows: List[List[float]] | None = None,
+    audio: Path | None = None,
+) -> List[Dict[str, Any]]:
+    """Transcribe ``path`` and return plain ``start``/``end``/``text`` segments.
+
+    With ``audio`` (a PCM file from ``audio_cache``) Whisper gets the mapped
+    samples instead of decoding ``path`` itself, trimmed to the span between
+    the first and last voiced frame when ``VAD_TRIM`` is on; timestamps are
+    shifted back to the source's timeline. With ``windows`` (``[start, end]``
+    pairs in seconds) Whisper decodes only those ranges via
+    ``clip_timestamps``. Whisper releases without that option transcribe
+    everything and the segments outside the windows are dropped.
+    """
+    whisper_model = get_model(model)
+    source: Any = str(path)
+    offset = 0.0
+    ranges = sorted((float(a), float(b)) for a, b in windows or [])
+    if audio is not None:
+        pcm = audio_cache.open_pcm(Path(audio))
+        lo, hi = audio_cache.speech_bounds(pcm) if VAD_TRIM else (0, len(pcm))
+        if hi <= lo:
+            return []
+        source = pcm[lo:hi]
+        offset = lo / audio_cache.SAMPLE_RATE
+        length = (hi - lo) / audio_cache.SAMPLE_RATE
+        if ranges:
+            ranges = [
+                (max(a - offset, 0.0), min(b - offset, length))
+                for a, b in ranges
+                if b > offset and a - offset < length
+            ]
+            if not ranges:
+                return []
+    options: Dict[str, Any] = {}
+    if ranges and supports_clip_timestamps(whisper_model):
+        options["clip_timestamps"] = [t for r in ranges for t in r]
+    with _transcribe_lock:
+        result = whisper_model.transcribe(source, verbose=False, **options)
+    segments = [
+        {"start": s.get("start", 0.0), "end": s.get("end", 0.0), "text": s.get("text", "")}
+        for s in result.get("segments", [])
+    ]
+    if ranges:
+        segments = [
+            s for s in segments if any(s["start"] < b and s["end"] > a for a, b in ranges)
+        ]
+    if offset:
+        for s in segments:
+            s["start"] = round(s["start"] + offset, 3)
+            s["end"] = round(s["end"] + offset, 3)
+    return segments
+
+
+def handle(request: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        path = Path(request["path"])
+        audio = request.get("audio")
+        segments = transcribe_file(
+            path,
+            request.get("model") or DEFAULT_MODEL,
+            request.get("windows"),
+            Path(audio) if audio else None,
+        )
+        return {"segments": segments}
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def request_transcription(
+    socket_path: str,
+    path: Path,
+    model: str = DEFAULT_MODEL,
+    timeout: float | None = None,
+    windows: List[List[float]] | None = None,
+    audio: Path | None = None,
+) -> List[Dict[str, Any]]:
+    """Ask the worker at ``socket_path`` to transcribe ``path``.
+
+    Raises ``OSError`` when the worker cannot be reached and ``RuntimeError``
+    when it reports a failure.
+    """
+    request: Dict[str, Any] = {"path": str(Path(path).resolve()), "model": model}
+    if windows:
+        request["windows"] = windows
+    if audio is not None:
+        request["audio"] = str(Path(audio).resolve())
+    payload = json.dumps(request) + "\n"
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        sock.sendall(payload.encode())
+        with sock.makefile("r", encoding="utf-8") as f:
+            line = f.readline()
+    if not line:
+        raise OSError("transcription worker closed the connection")
+    resp = json.loads(line)
+    if "error" in resp:
+        raise RuntimeError(resp["error"])
+    return resp["segments"]
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                resp = handle(json.loads(line))
+            except ValueError as e:
+                resp = {"error": f"bad request: {e}"}
+            self.wfile.write((json.dumps(resp) + "\n").encode())
+            self.wfile.flush()
+
+
+def serve_socket(socket_path: str) -> None:
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    with socketserver.ThreadingUnixStreamServer(socket_path, _Handler) as server:
+        print(f"[whisper] listening on {socket_path}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        finally:
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+
+
+def serve_stdio() -> None:
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            resp = handle(json.loads(line))
+        except ValueError as e:
+            resp = {"error": f"bad request: {e}"}
+        sys.stdout.write(json.dumps(resp) + "\n")
+        sys.stdout.flush()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--socket",
+        default=os.getenv("WHISPER_WORKER_SOCKET", "/tmp/mags-whisper.sock"),
+        help="Unix socket path to listen on",
+    )
+    parser.add_argument("--stdio", action="store_true", help="speak JSON lines on stdin/stdout")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="model to preload")
+    args = parser.parse_args()
+    get_model(args.model)
+    if args.stdio:
+        serve_stdio()
+    else:
+        serve_socket(args.socket)
+
+
+if __name__ == "__main__":
+    main()
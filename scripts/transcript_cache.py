@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""On-disk cache of Whisper transcripts.
+
+Transcripts are stored as ``.cache/transcripts/<sha256>-<model>.json`` where
+``sha256`` is the content hash of the source video. An entry holds either the
+whole transcript or the segments of the time ranges transcribed so far along
+with the ``covered`` ranges, so a later request only needs Whisper for the
+parts no earlier run covered, however its windows were chosen. Reads bump the
+file's mtime so eviction can drop the least recently used entries once the
+cache grows past its size cap.
+
+Usage::
+
+    python scripts/transcript_cache.py list
+    python scripts/transcript_cache.py prune [--max-mb 256] [--older-than 30]
+    python scripts/transcript_cache.py clear
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+from atomic_file import atomic_write
+
+CACHE_DIR = Path(os.getenv("TRANSCRIPT_CACHE_DIR", ".cache/transcripts"))
+MAX_BYTES = int(float(os.getenv("TRANSCRIPT_CACHE_MAX_MB", "512")) * 1024 * 1024)
+
+
+# Uncovered slivers shorter than this are not worth a Whisper call.
+MIN_GAP = 0.05
+
+Segment = Dict[str, Any]
+
+
+def _safe(name: str) -> str:
+    return re.sub(r"[^0-9A-Za-z_.-]+", "_", name)
+
+
+def merge_ranges(ranges: Iterable[Iterable[float]]) -> List[List[float]]:
+    """Union of ``[start, end]`` ranges, sorted and non-overlapping."""
+    merged: List[List[float]] = []
+    for start, end in sorted((float(a), float(b)) for a, b in ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def uncovered(window: Iterable[float], covered: List[List[float]]) -> List[List[float]]:
+    """Parts of ``window`` outside the merged ``covered`` ranges."""
+    start, end = (float(t) for t in window)
+    gaps = []
+    for a, b in covered:
+        if b <= start or a >= end:
+            continue
+        if a - start > MIN_GAP:
+            gaps.append([start, a])
+        start = max(start, b)
+    if end - start > MIN_GAP:
+        gaps.append([start, end])
+    return gaps
+
+
+def merge_segments(*groups: Iterable[Segment]) -> List[Segment]:
+    """Combine segment lists in time order, dropping exact duplicates."""
+    seen = set()
+    out = []
+    for seg in sorted((s for g in groups for s in g), key=lambda s: (s["start"], s["end"])):
+        key = (seg["start"], seg["end"], seg.get("text", ""))
+        if key not in seen:
+            seen.add(key)
+            out.append(seg)
+    return out
+
+
+class TranscriptCache:
+    """Size-capped LRU cache of transcript segments keyed by hash and model."""
+
+    def __init__(self, root: Path = CACHE_DIR, max_bytes: int = MAX_BYTES) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+
+    def path_for(self, sha256: str, model: str) -> Path:
+        return self.root / f"{sha256}-{_safe(model)}.json"
+
+    def _load(self, sha256: str, model: str) -> Dict[str, Any] | None:
+        path = self.path_for(sha256, model)
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+        os.utime(path)
+        return data
+
+    def _write(self, sha256: str, model: str, data: Dict[str, Any]) -> Path:
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.path_for(sha256, model)
+        payload = {
+            "sha256": sha256,
+            "model": model,
+            "created": datetime.utcnow().isoformat() + "Z",
+            **data,
+        }
+        atomic_write(path, json.dumps(payload))
+        self.prune()
+        return path
+
+    def get(self, sha256: str, model: str) -> List[Segment] | None:
+        """Return the whole transcript, or ``None`` unless one was stored."""
+        data = self._load(sha256, model)
+        if data is None or "covered" in data:
+            return None
+        return data.get("segments")
+
+    def put(self, sha256: str, model: str, segments: List[Segment]) -> Path:
+        """Store the whole transcript, replacing any partial entry."""
+        return self._write(sha256, model, {"segments": segments})
+
+    def lookup(
+        self, sha256: str, model: str, windows: List[List[float]]
+    ) -> Tuple[List[Segment], List[List[float]]]:
+        """Return cached segments overlapping ``windows`` and the ranges still missing."""
+        data = self._load(sha256, model)
+        if data is None:
+            return [], [list(w) for w in windows]
+        covered = data.get("covered")
+        missing = [] if covered is None else [g for w in windows for g in uncovered(w, covered)]
+        hits = [
+            s
+            for s in data.get("segments", [])
+            if any(s["start"] < b and s["end"] > a for a, b in windows)
+        ]
+        return hits, missing
+
+    def add(
+        self, sha256: str, model: str, segments: List[Segment], windows: List[List[float]]
+    ) -> Path:
+        """Record ``segments`` transcribed for ``windows`` in the partial entry."""
+        data = self._load(sha256, model) or {"segments": [], "covered": []}
+        if "covered" not in data:
+            return self.path_for(sha256, model)  # already the whole transcript
+        return self._write(
+            sha256,
+            model,
+            {
+                "segments": merge_segments(data.get("segments", []), segments),
+                "covered": merge_ranges(data["covered"] + windows),
+            },
+        )
+
+    def entries(self) -> List[Path]:
+        """Return cached transcripts, least recently used first."""
+        if not self.root.exists():
+            return []
+        return sorted(self.root.glob("*.json"), key=lambda p: p.stat().st_mtime)
+
+    def size(self) -> int:
+        return sum(p.stat().st_size for p in self.entries())
+
+    def prune(self, max_bytes: int | None = None, older_than: float | None = None) -> List[Path]:
+        """Evict entries older than ``older_than`` days, then LRU down to ``max_bytes``."""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        removed: List[Path] = []
+        entries = self.entries()
+        if older_than is not None:
+            cutoff = time.time() - older_than * 86400
+            for p in list(entries):
+                if p.stat().st_mtime < cutoff:
+                    p.unlink(missing_ok=True)
+                    entries.remove(p)
+                    removed.append(p)
+        total = sum(p.stat().st_size for p in entries)
+        for p in entries:
+            if total <= limit:
+                break
+            total -= p.stat().st_size
+            p.unlink(missing_ok=True)
+            removed.append(p)
+        return removed
+
+    def clear(self) -> int:
+        entries = self.entries()
+        for p in entries:
+            p.unlink(missing_ok=True)
+        return len(entries)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Inspect or prune the transcript cache.")
+    parser.add_argument("--dir", type=Path, default=CACHE_DIR, help="cache directory")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list", help="show cached transcripts, least recently used first")
+    prune = sub.add_parser("prune", help="evict old or least recently used entries")
+    prune.add_argument("--max-mb", type=float, help="size cap in MB (default TRANSCRIPT_CACHE_MAX_MB)")
+    prune.add_argument("--older-than", type=float, metavar="DAYS", help="drop entries unused for DAYS")
+    sub.add_parser("clear", help="remove every cached transcript")
+    args = parser.parse_args()
+
+    cache = TranscriptCache(args.dir)
+    if args.cmd == "list":
+        for p in cache.entries():
+            st = p.stat()
+            used = datetime.utcfromtimestamp(st.st_mtime).strftime("%Y-%m-%d %H:%M")
+            print(f"{used}  {st.st_size:>10}  {p.name}")
+        print(f"{len(cache.entries())} entries, {cache.size() / 1024 / 1024:.1f} MB")
+    elif args.cmd == "prune":
+        max_bytes = int(args.max_mb * 1024 * 1024) if args.max_mb is not None else None
+        removed = cache.prune(max_bytes, args.older_than)
+        print(f"removed {len(removed)} entries")
+    elif args.cmd == "clear":
+        print(f"removed {cache.clear()} entries")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,53 +1,43 @@
 #!/usr/bin/env python3
 """Match cut clips with daily TikTok sound and caption trends."""
 
-import json
-import random
 import datetime
 import pathlib
 from typing import Dict, List
 
-import requests
+from clip_log import ClipLog
+from trend_store import TrendIndex, TrendStore
 
 LOG_PATH = pathlib.Path('public/mags-log.json')
 
 
-def load_log() -> Dict:
-    if LOG_PATH.exists():
-        return json.load(LOG_PATH.open())
-    return {"clips": []}
-
-
-def save_log(data: Dict) -> None:
-    json.dump(data, LOG_PATH.open('w'), indent=2)
+def load_log() -> ClipLog:
+    return ClipLog(export_path=LOG_PATH)
 
 
 def fetch_trends() -> List[Dict[str, str]]:
-    try:
-        resp = requests.get('https://www.tiktok.com/api/trending/item_list/?count=30')
-        data = resp.json()
-        items = data.get('itemList', [])
-        return [
-            {
-                'sound': it.get('music', {}).get('title', ''),
-                'caption': it.get('desc', '')
-            }
-            for it in items
-        ]
-    except Exception:
-        return []
+    return TrendStore().trends()
 
 
 def match() -> None:
     log = load_log()
     trends = fetch_trends()
-    for clip in log.get('clips', []):
-        if clip.get('status') == 'cut' and not clip.get('trend') and trends:
-            trend = random.choice(trends)
-            clip['trend'] = trend
-            clip['status'] = 'matched'
-            clip.setdefault('timestamps', {})['matched'] = datetime.datetime.utcnow().isoformat() + 'Z'
-    save_log(log)
+    updates = []
+    if trends:
+        index = TrendIndex(trends)
+        for clip in log.records():
+            if clip.get('status') != 'cut' or clip.get('trend'):
+                continue
+            timestamps = dict(clip.get('timestamps') or {})
+            timestamps['matched'] = datetime.datetime.utcnow().isoformat() + 'Z'
+            updates.append({
+                'slug': clip['slug'],
+                'trend': index.match(clip.get('keywords', [])),
+                'status': 'matched',
+                'timestamps': timestamps,
+            })
+    log.append(updates)
+    log.export()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,127 @@
+"""Cached TikTok trends and a keyword index for matching clips to them.
+
+``TrendStore`` keeps the last trending list in ``.cache/trends.json``. Within
+``TREND_TTL`` seconds it is used as is; after that the request is sent with
+``If-None-Match``/``If-Modified-Since`` so an unchanged list costs a 304, and
+any network error falls back to the stale (or empty) copy until the TTL runs
+out again, rather than retrying on every call. ``TrendIndex`` maps every
+word of the trend captions and sound titles to the trends containing it, so
+a clip is matched by looking up its keywords rather than comparing it with
+every trend.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Set
+
+import requests  # type: ignore
+
+from atomic_file import atomic_write
+
+TREND_URL = "https://www.tiktok.com/api/trending/item_list/?count=30"
+CACHE_PATH = Path(os.getenv("TREND_CACHE", ".cache/trends.json"))
+TREND_TTL = float(os.getenv("TREND_TTL", "900"))
+TREND_TIMEOUT = float(os.getenv("TREND_TIMEOUT", "10"))
+
+
+def tokens(text: str) -> Set[str]:
+    """Lowercased alphanumeric words, normalised like clip keywords."""
+    words = (re.sub(r"[^0-9a-z]+", "", w.lower()) for w in text.split())
+    return {w for w in words if len(w) > 1}
+
+
+def to_trend(item: Dict[str, Any]) -> Dict[str, str]:
+    music = item.get("music", {}) or {}
+    return {
+        "sound": music.get("title", ""),
+        "caption": item.get("desc", ""),
+        "url": music.get("playUrl", ""),
+    }
+
+
+class TrendStore:
+    """Persistent trending list with TTL and conditional revalidation."""
+
+    def __init__(
+        self,
+        path: Path = CACHE_PATH,
+        ttl: float = TREND_TTL,
+        timeout: float = TREND_TIMEOUT,
+        url: str = TREND_URL,
+    ) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.timeout = timeout
+        self.url = url
+        self._lock = threading.Lock()
+        try:
+            self.data: Dict[str, Any] = json.loads(path.read_text())
+        except (OSError, ValueError):
+            self.data = {"items": [], "fetched": 0.0}
+
+    def _save(self) -> None:
+        atomic_write(self.path, json.dumps(self.data))
+
+    def items(self) -> List[Dict[str, Any]]:
+        """Return raw trending items, revalidating once the TTL has expired."""
+        with self._lock:
+            if time.time() - self.data.get("fetched", 0.0) < self.ttl:
+                return self.data["items"]
+            headers = {}
+            if self.data.get("etag"):
+                headers["If-None-Match"] = self.data["etag"]
+            if self.data.get("last_modified"):
+                headers["If-Modified-Since"] = self.data["last_modified"]
+            try:
+                resp = requests.get(self.url, headers=headers, timeout=self.timeout)
+                if resp.status_code != 304:
+                    resp.raise_for_status()
+                    self.data["items"] = resp.json().get("itemList", [])
+                    self.data["etag"] = resp.headers.get("ETag")
+                    self.data["last_modified"] = resp.headers.get("Last-Modified")
+                self.data["fetched"] = time.time()
+                self._save()
+            except Exception as e:
+                print("trend fetch failed, using cached trends", e)
+                # Back off for a TTL in this process only; the next run retries.
+                self.data["fetched"] = time.time()
+            return self.data["items"]
+
+    def trends(self) -> List[Dict[str, str]]:
+        return [to_trend(it) for it in self.items()]
+
+
+class TrendIndex:
+    """Inverted index from caption/sound words to trends."""
+
+    def __init__(self, trends: List[Dict[str, str]]) -> None:
+        self.trends = trends
+        self.postings: Dict[str, List[int]] = {}
+        for i, trend in enumerate(trends):
+            for word in tokens(f"{trend.get('caption', '')} {trend.get('sound', '')}"):
+                self.postings.setdefault(word, []).append(i)
+
+    def best(self, keywords: Iterable[str]) -> Dict[str, str] | None:
+        """Return the trend sharing the most keywords, earlier (hotter) trends first."""
+        hits: Counter[int] = Counter()
+        for word in tokens(" ".join(keywords)):
+            hits.update(self.postings.get(word, ()))
+        if not hits:
+            return None
+        i = min(hits, key=lambda idx: (-hits[idx], idx))
+        return self.trends[i]
+
+    def match(self, keywords: Iterable[str]) -> Dict[str, str]:
+        """Best keyword match, or a random trend when nothing overlaps."""
+        found = self.best(keywords)
+        if found is not None:
+            return found
+        return random.choice(self.trends) if self.trends else {}
@@ -0,0 +1,250 @@
+"""Batched, cached Google Vision annotation for sampled clip frames.
+
+Frames submitted from any number of clip worker threads are grouped into
+``batch_annotate_images`` requests of up to ``VISION_BATCH_SIZE`` images, and
+up to ``VISION_CONCURRENCY`` batches are in flight at once. Results are stored
+on disk by the SHA-256 of the image bytes, so reprocessed or overlapping clips
+never pay for the same frame twice. Reads bump an entry's mtime and ``close``
+evicts the least recently used entries beyond ``VISION_CACHE_MAX_MB``.
+
+Two backends are available: the gRPC client from ``google-cloud-vision`` and
+the plain REST endpoint (``VISION_API_ENDPOINT`` / ``VISION_API_KEY``), which
+also makes it easy to run the batcher against a local fake server.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import requests  # type: ignore
+
+from atomic_file import atomic_write
+
+CACHE_DIR = Path(os.getenv("VISION_CACHE_DIR", ".cache/vision"))
+CACHE_MAX_BYTES = int(float(os.getenv("VISION_CACHE_MAX_MB", "64")) * 1024 * 1024)
+BATCH_SIZE = int(os.getenv("VISION_BATCH_SIZE", "16"))
+CONCURRENCY = int(os.getenv("VISION_CONCURRENCY", "4"))
+LINGER = float(os.getenv("VISION_LINGER", "0.05"))
+
+LIKELIHOOD = ["UNKNOWN", "VERY_UNLIKELY", "UNLIKELY", "POSSIBLE", "LIKELY", "VERY_LIKELY"]
+MAX_LABELS = 10
+
+Result = Dict[str, Any]
+Backend = Callable[[List[bytes]], List[Result]]
+
+
+def grpc_backend(client: Any) -> Backend:
+    """Annotate through a ``vision.ImageAnnotatorClient``."""
+    from google.cloud import vision  # type: ignore
+
+    def annotate(images: List[bytes]) -> List[Result]:
+        reqs = [
+            vision.AnnotateImageRequest(
+                image=vision.Image(content=img),
+                features=[
+                    vision.Feature(type_=vision.Feature.Type.SAFE_SEARCH_DETECTION),
+                    vision.Feature(
+                        type_=vision.Feature.Type.LABEL_DETECTION, max_results=MAX_LABELS
+                    ),
+                ],
+            )
+            for img in images
+        ]
+        resp = client.batch_annotate_images(requests=reqs)
+        out = []
+        for r in resp.responses:
+            if r.error.code:
+                raise RuntimeError(f"vision error {r.error.code}: {r.error.message}")
+            ann = r.safe_search_annotation
+            out.append(
+                {
+                    "adult": int(ann.adult),
+                    "violence": int(ann.violence),
+                    "racy": int(ann.racy),
+                    "labels": [lab.description.lower() for lab in r.label_annotations],
+                }
+            )
+        return out
+
+    return annotate
+
+
+def rest_backend(
+    endpoint: str = "https://vision.googleapis.com",
+    api_key: str | None = None,
+    timeout: float = 30,
+) -> Backend:
+    """Annotate through the ``images:annotate`` REST endpoint."""
+    session = requests.Session()
+    url = endpoint.rstrip("/") + "/v1/images:annotate"
+    params = {"key": api_key} if api_key else None
+
+    def annotate(images: List[bytes]) -> List[Result]:
+        body = {
+            "requests": [
+                {
+                    "image": {"content": base64.b64encode(img).decode()},
+                    "features": [
+                        {"type": "SAFE_SEARCH_DETECTION"},
+                        {"type": "LABEL_DETECTION", "maxResults": MAX_LABELS},
+                    ],
+                }
+                for img in images
+            ]
+        }
+        resp = session.post(url, params=params, json=body, timeout=timeout)
+        resp.raise_for_status()
+        out = []
+        for r in resp.json().get("responses", []):
+            if r.get("error"):
+                raise RuntimeError(f"vision error: {r['error']}")
+            ann = r.get("safeSearchAnnotation", {})
+            out.append(
+                {
+                    "adult": LIKELIHOOD.index(ann.get("adult", "UNKNOWN")),
+                    "violence": LIKELIHOOD.index(ann.get("violence", "UNKNOWN")),
+                    "racy": LIKELIHOOD.index(ann.get("racy", "UNKNOWN")),
+                    "labels": [
+                        lab.get("description", "").lower() for lab in r.get("labelAnnotations", [])
+                    ],
+                }
+            )
+        return out
+
+    return annotate
+
+
+class VisionBatcher:
+    """Thread-safe micro-batcher in front of a Vision ``Backend``."""
+
+    def __init__(
+        self,
+        backend: Backend,
+        batch_size: int = BATCH_SIZE,
+        concurrency: int = CONCURRENCY,
+        linger: float = LINGER,
+        cache_dir: Path | None = CACHE_DIR,
+        cache_max_bytes: int = CACHE_MAX_BYTES,
+    ) -> None:
+        self.backend = backend
+        self.batch_size = max(1, batch_size)
+        self.linger = linger
+        self.cache_dir = cache_dir
+        self.cache_max_bytes = cache_max_bytes
+        self._pool = ThreadPoolExecutor(max_workers=max(1, concurrency))
+        self._lock = threading.Lock()
+        self._pending: List[tuple[str, bytes]] = []
+        self._inflight: Dict[str, Future] = {}
+        self._timer: threading.Timer | None = None
+
+    def _cache_path(self, key: str) -> Path | None:
+        return self.cache_dir / f"{key}.json" if self.cache_dir else None
+
+    def _cached(self, key: str) -> Result | None:
+        path = self._cache_path(key)
+        if path is None:
+            return None
+        try:
+            result = json.loads(path.read_text())
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return result
+
+    def _store(self, key: str, result: Result) -> None:
+        path = self._cache_path(key)
+        if path is None:
+            return
+        atomic_write(path, json.dumps(result))
+
+    def submit(self, image: bytes) -> Future:
+        """Queue ``image`` for annotation and return a future for its result."""
+        key = hashlib.sha256(image).hexdigest()
+        cached = self._cached(key)
+        if cached is not None:
+            fut: Future = Future()
+            fut.set_result(cached)
+            return fut
+        with self._lock:
+            if key in self._inflight:
+                return self._inflight[key]
+            fut = Future()
+            self._inflight[key] = fut
+            self._pending.append((key, image))
+            if len(self._pending) >= self.batch_size:
+                self._flush_locked()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.linger, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        return fut
+
+    def annotate(self, images: List[bytes]) -> List[Result]:
+        """Annotate ``images``, blocking until every result is available."""
+        futures = [self.submit(img) for img in images]
+        return [f.result() for f in futures]
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending:
+            batch = self._pending[: self.batch_size]
+            self._pending = self._pending[self.batch_size :]
+            self._pool.submit(self._run, batch)
+
+    def _run(self, batch: List[tuple[str, bytes]]) -> None:
+        try:
+            results = self.backend([img for _, img in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"vision returned {len(results)} results for {len(batch)} images")
+        except BaseException as e:
+            with self._lock:
+                futures = [self._inflight.pop(key) for key, _ in batch]
+            for fut in futures:
+                fut.set_exception(e)
+            return
+        for (key, _), result in zip(batch, results):
+            self._store(key, result)
+            with self._lock:
+                fut = self._inflight.pop(key)
+            fut.set_result(result)
+
+    def prune(self, max_bytes: int | None = None) -> int:
+        """Evict least recently used cache entries until the cache fits; returns the count."""
+        if self.cache_dir is None or not self.cache_dir.exists():
+            return 0
+        limit = self.cache_max_bytes if max_bytes is None else max_bytes
+        entries = []
+        for p in self.cache_dir.glob("*.json"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, p in entries:
+            if total <= limit:
+                break
+            p.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
+
+    def close(self) -> None:
+        self.flush()
+        self._pool.shutdown(wait=True)
+        self.prune()
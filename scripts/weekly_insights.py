@@ -1,51 +1,64 @@
 #!/usr/bin/env python3
-"""Compile weekly social insights and share to Telegram and Notion."""
+"""Compile social insights and share to Telegram and Notion.
+
+Counts come from the daily rollups in ``insight_rollups``, which only read
+clip log lines added since the previous run. The queue database is rebuilt
+from the pack on every CI checkout, so its rows are skipped if the pack is
+unchanged since the last report and otherwise rescanned in full.
+
+Usage::
+
+    python scripts/weekly_insights.py [--window week|month] [--since DATE --until DATE]
+"""
 
 from __future__ import annotations
 
-import json
+import argparse
 import os
-from collections import Counter
+from datetime import date
 from pathlib import Path
+from typing import List
 
 import requests  # type: ignore
 
+from clip_log import ClipLog
+from insight_rollups import DailyRollups, window
+from schedule_queue import ScheduleQueue
+from telegram_notifier import notify
+
 LOG_PATH = Path("public/mags-log.json")
 PACK_PATH = Path(".schedule-pack.json")
 
 
-def main() -> None:
-    hooks: Counter[str] = Counter()
-    sounds: Counter[str] = Counter()
-    emotions: Counter[str] = Counter()
-    if LOG_PATH.exists():
-        log = json.loads(LOG_PATH.read_text())
-        for clip in log.get("clips", []):
-            for k in clip.get("keywords", []):
-                hooks[k] += 1
-            if clip.get("emotion"):
-                emotions[clip["emotion"]] += 1
-    if PACK_PATH.exists():
-        pack = json.loads(PACK_PATH.read_text())
-        for q in pack.get("queue", []):
-            if q.get("suggested_sound"):
-                sounds[q["suggested_sound"]] += 1
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--window", choices=["week", "month"], default="week")
+    parser.add_argument("--since", type=date.fromisoformat, help="custom range start (YYYY-MM-DD)")
+    parser.add_argument("--until", type=date.fromisoformat, help="custom range end, inclusive")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] | None = None) -> None:
+    args = parse_args(argv)
+    rollups = DailyRollups()
+    rollups.ingest_clips(ClipLog(export_path=LOG_PATH))
+    rollups.ingest_queue(ScheduleQueue(pack_path=PACK_PATH))
+    rollups.save()
+    start, end = window(args.window)
+    if args.since or args.until:
+        start, end = args.since or start, args.until or end
+        title = f"Insights {start.isoformat()} to {end.isoformat()}"
+    else:
+        title = "Weekly Insights" if args.window == "week" else "Monthly Insights"
+    totals = rollups.report(start, end)
+    hooks, sounds, emotions = totals["hooks"], totals["sounds"], totals["emotions"]
     message = (
-        "Weekly Insights\n" +
+        title + "\n" +
         "Top hooks: " + ", ".join(f"{k}({v})" for k, v in hooks.most_common(3)) +
         "\nTop sounds: " + ", ".join(f"{k}({v})" for k, v in sounds.most_common(3)) +
         "\nTop emotions: " + ", ".join(f"{k}({v})" for k, v in emotions.most_common(3))
     )
-    token = os.getenv("TELEGRAM_BOT_TOKEN")
-    chat = os.getenv("TELEGRAM_CHAT_ID")
-    if token and chat:
-        try:
-            requests.post(
-                f"https://api.telegram.org/bot{token}/sendMessage",
-                data={"chat_id": chat, "text": message},
-            )
-        except Exception:
-            pass
+    notify(message)
     notion_token = os.getenv("NOTION_TOKEN")
     notion_db = os.getenv("NOTION_TREND_DB")
     if notion_token and notion_db:
@@ -59,7 +72,7 @@ def main() -> None:
                 json={
                     "parent": {"database_id": notion_db},
                     "properties": {
-                        "Name": {"title": [{"text": {"content": "Weekly Insights"}}]},
+                        "Name": {"title": [{"text": {"content": title}}]},
                         "Summary": {"rich_text": [{"text": {"content": message}}]},
                     },
                 },